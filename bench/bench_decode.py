@@ -0,0 +1,84 @@
+"""任务输出解码的微基准测试
+
+对比旧实现（逐行依次尝试 utf-8/gbk/latin-1/cp1252）与 OutputDecoder
+（检测一次编码后使用增量解码器）解码每 MB 数据的耗时。
+"分块" 一列为 OutputDecoder 按 4 KB 固定大小分块解码的耗时，
+旧实现无法分块解码（被截断的多字节字符会被误判为其他编码）。
+
+用法: python bench/bench_decode.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src", "PowerShellMonitor_v1"))
+
+from output_decoder import OutputDecoder  # noqa: E402
+
+
+def legacy_decode(raw_line):
+    """旧的逐行解码方式"""
+    for encoding in ['utf-8', 'gbk', 'latin-1', 'cp1252']:
+        try:
+            return raw_line.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return raw_line.decode('utf-8', errors='replace')
+
+
+def make_lines(encoding, mixed=False, size=1024 * 1024):
+    """生成约 size 字节的按行输出"""
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        if mixed and i % 10:
+            text = f"[{i}] process id 1234 status ok ---\n"
+        else:
+            text = f"[{i}] 当前时间: 2024-01-01 12:00:00 运行状态: 正常\n"
+        raw = text.encode(encoding)
+        lines.append(raw)
+        total += len(raw)
+        i += 1
+    return lines, total
+
+
+def bench(name, lines, total, repeat=5, chunk_size=4096):
+    stream = b"".join(lines)
+    chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+    best_legacy = best_new = best_chunked = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in lines:
+            legacy_decode(raw)
+        best_legacy = min(best_legacy, time.perf_counter() - start)
+
+        decoder = OutputDecoder()
+        start = time.perf_counter()
+        for raw in lines:
+            decoder.decode(raw)
+        best_new = min(best_new, time.perf_counter() - start)
+
+        decoder = OutputDecoder()
+        start = time.perf_counter()
+        for chunk in chunks:
+            decoder.decode(chunk)
+        best_chunked = min(best_chunked, time.perf_counter() - start)
+
+    per_mb = 1024 * 1024 / total * 1000
+    print(f"{name:<8} 旧实现 {best_legacy * per_mb:8.2f} ms/MB   "
+          f"OutputDecoder {best_new * per_mb:8.2f} ms/MB "
+          f"({best_legacy / best_new:4.2f}x)   "
+          f"分块 {best_chunked * per_mb:8.2f} ms/MB "
+          f"({best_legacy / best_chunked:5.2f}x)")
+
+
+def main():
+    bench("utf-8", *make_lines("utf-8"))
+    bench("gbk", *make_lines("gbk"))
+    bench("mixed", *make_lines("gbk", mixed=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""预热解释器池的基准测试（POSIX）
+
+模拟按计划运行的短任务：每隔 interval 秒运行一次只输出一行就退出的脚本。
+对比每次启动新的解释器（冷启动）与从 InterpreterPool 取出预热进程（热启动）时，
+从请求启动到读到第一行输出、到进程退出的时间。
+
+默认使用 pwsh，没有安装时使用当前的 Python 解释器。
+用法: python bench/bench_pool.py [运行次数] [间隔秒数]
+"""
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src", "PowerShellMonitor_v1"))
+
+from interpreter_pool import InterpreterPool  # noqa: E402
+from process_backend import PosixProcessBackend  # noqa: E402
+
+
+SCRIPTS = {
+    "pwsh": 'Write-Output "tick $(Get-Date -Format o)"',
+    "python": "import datetime; print('tick', datetime.datetime.now().isoformat(), flush=True)",
+}
+
+
+def run_once(start):
+    """start() 返回进程，返回 (首行输出耗时, 退出耗时)"""
+    begin = time.perf_counter()
+    process = start()
+    process.stdout.readline()
+    first = time.perf_counter() - begin
+    process.stdout.read()
+    process.wait()
+    process.stdout.close()
+    return first, time.perf_counter() - begin
+
+
+def measure(start, runs, interval, pool):
+    results = []
+    for _ in range(runs):
+        time.sleep(interval)
+        results.append(run_once(start))
+        pool.maintain()
+    return ([first for first, _ in results], [total for _, total in results])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    interpreter = shutil.which("pwsh") or sys.executable
+    script = SCRIPTS["pwsh" if interpreter.endswith("pwsh") else "python"]
+    backend = PosixProcessBackend()
+    pool = InterpreterPool(backend, size=1)
+    pool.prewarm(interpreter)
+
+    def cold():
+        args = ([interpreter, "-Command", script] if interpreter.endswith("pwsh")
+                else [interpreter, "-c", script])
+        return backend.spawn(args)
+
+    def warm():
+        return pool.acquire(interpreter, script)
+
+    print(f"解释器 {interpreter}，运行 {runs} 次，间隔 {interval} 秒")
+    for name, start in (("冷启动", cold), ("热启动", warm)):
+        first, total = measure(start, runs, interval, pool)
+        print(f"{name}  首行输出 中位数 {statistics.median(first) * 1000:.1f} ms"
+              f"（最大 {max(first) * 1000:.1f} ms），"
+              f"退出 中位数 {statistics.median(total) * 1000:.1f} ms")
+    print(f"预热进程命中 {pool.hits} 次，未命中 {pool.misses} 次")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
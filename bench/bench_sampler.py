@@ -0,0 +1,54 @@
+"""任务资源采样的开销基准测试（Linux）
+
+启动 N 个任务（每个任务是一个带子进程的 shell），用 ResourceSampler 每秒采样一次，
+报告每次采样（遍历 /proc 并汇总全部任务的进程树）耗费的 CPU 时间及其占单核的比例。
+
+用法: python bench/bench_sampler.py [任务数] [采样次数]
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src", "PowerShellMonitor_v1"))
+
+from resource_sampler import ResourceSampler, sampler_supported  # noqa: E402
+
+
+TASK_COMMAND = ["sh", "-c", "sleep 1000 & sleep 1000; wait"]
+
+
+def main():
+    if not sampler_supported():
+        print("此基准测试需要 /proc")
+        return 1
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    processes = [subprocess.Popen(TASK_COMMAND, start_new_session=True) for _ in range(count)]
+    try:
+        time.sleep(0.5)  # 等待 shell 启动子进程
+        sampler = ResourceSampler(interval=1.0)
+        for index, process in enumerate(processes):
+            sampler.register(index, process.pid)
+        costs = []
+        for _ in range(rounds + 1):
+            time.sleep(1.0)
+            costs.append(sampler.sample_time)
+        sampler.stop()
+        costs = costs[1:]  # 第一次采样只记录基准
+        sample = sampler.latest(0)
+        print(f"{count} 个任务，{len(os.listdir('/proc'))} 个 /proc 条目")
+        print(f"每次采样 CPU 时间: 平均 {sum(costs) / len(costs) * 1000:.1f} ms，"
+              f"最多 {max(costs) * 1000:.1f} ms（采样间隔 1 秒时占单核 {max(costs) * 100:.1f}%）")
+        print(f"任务 0: 进程 {sample['processes']:.0f} 个，线程 {sample['threads']:.0f} 个，"
+              f"内存 {sample['rss'] / 1024:.0f} KB，CPU {sample['cpu']:.1f}%")
+    finally:
+        for process in processes:
+            os.killpg(process.pid, 9)
+            process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""大量运行计划的基准测试
+
+用模拟时钟让 PeriodicScheduler 按 1 秒的步长运行一天，计划为随机的 cron 表达式与运行间隔。
+对比每秒遍历所有计划、检查是否到期的做法（每个计划保存下次运行时刻），
+与时间轮每秒只处理到期定时器的做法：每秒推进的平均耗时与两者触发的次数。
+
+用法: python bench/bench_schedule.py [计划数]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src", "PowerShellMonitor_v1"))
+
+from periodic_scheduler import PeriodicScheduler, parse_schedule  # noqa: E402
+
+
+DURATION = 86400  # 秒
+START = 1_800_000_000.0
+
+
+def random_config(rng):
+    if rng.random() < 0.5:
+        return {'interval': rng.choice([60, 300, 900, 3600, 86400])}
+    return {'schedule': rng.choice(["*/5 * * * *", "0 * * * *", "30 2 * * *",
+                                    "*/15 8-18 * * mon-fri", "0 0 1 * *"])}
+
+
+def run_scan(configs):
+    """每秒检查所有计划，返回 (触发次数, 每秒平均耗时)"""
+    schedules = [parse_schedule(config) for config in configs]
+    due = [schedule.first(START) for schedule in schedules]
+    fired = 0
+    elapsed = 0.0
+    for second in range(1, DURATION + 1):
+        now = START + second
+        begin = time.perf_counter()
+        for index, when in enumerate(due):
+            if when is not None and when <= now:
+                fired += 1
+                due[index] = schedules[index].next_after(now)
+        elapsed += time.perf_counter() - begin
+    return fired, elapsed / DURATION
+
+
+def run_wheel(configs):
+    """时间轮，返回 (触发次数, 每秒平均耗时)"""
+    clock = [START]
+    scheduler = PeriodicScheduler(clock=lambda: clock[0])
+    for index, config in enumerate(configs):
+        scheduler.set_schedule(index, config)
+    fired = 0
+    elapsed = 0.0
+    for second in range(1, DURATION + 1):
+        clock[0] = START + second
+        begin = time.perf_counter()
+        fired += len(scheduler.poll(lambda task_id: False))
+        elapsed += time.perf_counter() - begin
+    return fired, elapsed / DURATION
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(1)
+    configs = [random_config(rng) for _ in range(count)]
+    print(f"{count} 个计划，模拟运行 {DURATION} 秒")
+    for name, run in (("逐个检查", run_scan), ("时间轮", run_wheel)):
+        fired, per_second = run(configs)
+        print(f"{name:8s} 触发 {fired} 次，每秒推进平均 {per_second * 1e6:.1f} 微秒")
+
+
+if __name__ == "__main__":
+    main()
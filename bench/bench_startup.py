@@ -0,0 +1,87 @@
+"""启动大量任务的基准测试（POSIX）
+
+每个任务模拟解释器启动：导入若干模块并做一段计算后输出 "ready"，之后保持运行。
+对比同时启动全部任务（旧的启动方式）与 StartupScheduler 限制并发启动时，
+从开始启动到每个任务输出 ready 的时间：平均值与全部就绪的时间。
+
+用法: python bench/bench_startup.py [任务数] [最大并发数]
+"""
+import os
+import selectors
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src", "PowerShellMonitor_v1"))
+
+from startup_scheduler import StartupScheduler  # noqa: E402
+
+
+TASK_CODE = ("import json, email.parser, http.client, asyncio, decimal\n"
+             "sum(i * i for i in range(1500000))\n"
+             "print('ready', flush=True)\n"
+             "import time; time.sleep(1000)\n")
+
+
+def spawn():
+    return subprocess.Popen([sys.executable, "-c", TASK_CODE], stdout=subprocess.PIPE,
+                            start_new_session=True)
+
+
+def run(count, scheduler=None):
+    """启动全部任务，返回每个任务从开始到就绪的秒数"""
+    selector = selectors.DefaultSelector()
+    processes = {}
+    ready = {}
+    start = time.monotonic()
+
+    def launch(task_id):
+        process = spawn()
+        processes[task_id] = process
+        selector.register(process.stdout, selectors.EVENT_READ, task_id)
+
+    if scheduler is None:
+        for task_id in range(count):
+            launch(task_id)
+    while len(ready) < count:
+        if scheduler is not None:
+            for task_id in scheduler.poll():
+                launch(task_id)
+                scheduler.on_started(task_id)
+        for key, _ in selector.select(timeout=0.01):
+            line = os.read(key.fd, 4096).decode()
+            task_id = key.data
+            selector.unregister(key.fileobj)
+            ready[task_id] = time.monotonic() - start
+            if scheduler is not None:
+                scheduler.on_output(task_id, [line])
+    for process in processes.values():
+        os.killpg(process.pid, 9)
+        process.wait()
+        process.stdout.close()
+    selector.close()
+    return list(ready.values())
+
+
+def report(name, times):
+    print(f"{name:<12}{sum(times) / len(times):>12.2f}{max(times):>12.2f}")
+
+
+def main():
+    if os.name != "posix":
+        print("此基准测试只能在 POSIX 系统上运行")
+        return 1
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    concurrent = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    tasks = {task_id: {'ready_pattern': 'ready'} for task_id in range(count)}
+    print(f"启动 {count} 个任务，{os.cpu_count()} 个 CPU 核心（秒）")
+    print(f"{'方式':<10}{'平均就绪':>8}{'全部就绪':>8}")
+    report("同时启动", run(count))
+    scheduler = StartupScheduler(tasks, max_concurrent=concurrent)
+    report(f"调度({scheduler.max_concurrent})", run(count, scheduler))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""停止任务的延迟基准测试（POSIX）
+
+启动 N 个任务（每个任务是一个带子进程的 shell），分别用两种方式停止全部任务：
+"辅助进程" 为每次停止启动一个 kill 进程终止进程组（与 Windows 上每次停止启动 taskkill 相同的开销），
+"killpg" 为 PosixProcessBackend 直接调用 os.killpg。
+停止时间从开始发送信号到所有进程组都已退出为止，同时检查没有残留的子进程。
+
+用法: python bench/bench_stop.py [任务数]
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src", "PowerShellMonitor_v1"))
+
+from process_backend import PosixProcessBackend  # noqa: E402
+
+
+TASK_COMMAND = ["sh", "-c", "sleep 1000 & sleep 1000; wait"]
+
+
+def start_tasks(backend, count):
+    processes = [backend.spawn(TASK_COMMAND) for _ in range(count)]
+    time.sleep(0.5)  # 等待 shell 启动子进程
+    return processes
+
+
+def helper_kill(process):
+    subprocess.run(["kill", "-s", "KILL", "--", f"-{process.pid}"], capture_output=True)
+
+
+def live_groups(pgids):
+    """返回仍有未退出进程的进程组（僵尸进程不计，容器中的 init 可能不回收它们）"""
+    if not os.path.isdir("/proc"):
+        alive = set()
+        for pgid in pgids:
+            try:
+                os.killpg(pgid, 0)
+            except ProcessLookupError:
+                continue
+            alive.add(pgid)
+        return alive
+    alive = set()
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if fields[0] != "Z" and int(fields[2]) in pgids:
+            alive.add(int(fields[2]))
+    return alive
+
+
+def bench(name, count, kill):
+    backend = PosixProcessBackend()
+    processes = start_tasks(backend, count)
+    start = time.perf_counter()
+    for process in processes:
+        kill(process)
+    signalled = time.perf_counter() - start
+    for process in processes:
+        process.wait()
+        process.stdout.close()
+    # 等待进程组中的子进程全部退出
+    while live_groups({process.pid for process in processes}):
+        time.sleep(0.001)
+    total = time.perf_counter() - start
+    print(f"{name:<10}{signalled * 1000:>12.1f}{total * 1000:>12.1f}{total / count * 1000:>12.2f}")
+
+
+def main():
+    if os.name != "posix":
+        print("此基准测试只能在 POSIX 系统上运行")
+        return 1
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print(f"停止 {count} 个任务（毫秒）")
+    print(f"{'方式':<8}{'发送信号':>8}{'全部退出':>8}{'每个任务':>8}")
+    bench("辅助进程", count, helper_kill)
+    bench("killpg", count, PosixProcessBackend().kill)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
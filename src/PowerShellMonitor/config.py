@@ -16,6 +16,15 @@ while ($true) {
 
 DEFAULT_TIME = False
 
+DEFAULT_LOG_SETTINGS = {
+    'LOG_FLUSH_INTERVAL': 1.0,  # 日志缓冲刷新间隔（秒）
+    'LOG_MAX_SIZE_MB': 0.0,  # 单个日志文件的最大大小（MB），0 表示不按大小轮转
+    'LOG_ROTATE_DAILY': False,  # 是否每天轮转日志
+    'LOG_KEEP': 7,  # 保留的历史日志分段数量，0 表示全部保留
+    'LOG_VIEW_MAX_LINES': 5000,  # 日志窗口实时输出保留的最大行数
+    'LOG_VIEW_WINDOW_KB': 1024,  # 打开日志时只加载末尾的字节数（KB），0 表示全部加载
+}
+
 # 获取程序所在目录
 if getattr(sys, 'frozen', False):
     # 如果是打包后的可执行文件
@@ -36,7 +45,8 @@ def load_config():
     if not os.path.exists(CONFIG_FILE):
         config['DEFAULT'] = {
             'PS_COMMAND': DEFAULT_PS_COMMAND,
-            'TIME': str(DEFAULT_TIME)
+            'TIME': str(DEFAULT_TIME),
+            **{key: str(value) for key, value in DEFAULT_LOG_SETTINGS.items()}
         }
         with open(CONFIG_FILE, 'w', encoding='utf-8') as configfile:
             config.write(configfile)
@@ -53,3 +63,26 @@ def load_config():
     except Exception as e:
         print(f"读取配置文件时出错: {e}, 使用默认配置")
         return DEFAULT_PS_COMMAND, DEFAULT_TIME
+
+
+def load_log_settings():
+    """加载日志相关设置（刷新间隔、轮转与日志窗口），返回字典"""
+    settings = dict(DEFAULT_LOG_SETTINGS)
+    config = configparser.ConfigParser()
+    try:
+        config.read(CONFIG_FILE, encoding='utf-8')
+        settings['LOG_FLUSH_INTERVAL'] = config.getfloat(
+            'DEFAULT', 'LOG_FLUSH_INTERVAL', fallback=settings['LOG_FLUSH_INTERVAL'])
+        settings['LOG_MAX_SIZE_MB'] = config.getfloat(
+            'DEFAULT', 'LOG_MAX_SIZE_MB', fallback=settings['LOG_MAX_SIZE_MB'])
+        settings['LOG_ROTATE_DAILY'] = config.getboolean(
+            'DEFAULT', 'LOG_ROTATE_DAILY', fallback=settings['LOG_ROTATE_DAILY'])
+        settings['LOG_KEEP'] = config.getint('DEFAULT', 'LOG_KEEP', fallback=settings['LOG_KEEP'])
+        settings['LOG_VIEW_MAX_LINES'] = config.getint(
+            'DEFAULT', 'LOG_VIEW_MAX_LINES', fallback=settings['LOG_VIEW_MAX_LINES'])
+        settings['LOG_VIEW_WINDOW_KB'] = config.getint(
+            'DEFAULT', 'LOG_VIEW_WINDOW_KB', fallback=settings['LOG_VIEW_WINDOW_KB'])
+    except Exception as e:
+        print(f"读取日志设置时出错: {e}, 使用默认值")
+        return dict(DEFAULT_LOG_SETTINGS)
+    return settings
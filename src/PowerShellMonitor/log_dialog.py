@@ -1,35 +1,68 @@
 import os
+import threading
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout,
-                               QPushButton, QTextEdit, QMessageBox)
-from PySide6.QtGui import QIcon, QFont, QTextCursor
-from PySide6.QtCore import Qt
+                               QPushButton, QMessageBox, QTabWidget, QCheckBox,
+                               QLineEdit, QLabel, QListWidget, QListWidgetItem)
+from PySide6.QtGui import QIcon
+from PySide6.QtCore import Qt, Signal
 
 from utils import get_app_dir
+from log_view import LogView, LogTailView, DEFAULT_TAIL_LINES, DEFAULT_WINDOW_BYTES
+from log_search import LogSearcher, DEFAULT_RESULT_LIMIT
+from log_records import render_line
 
 
 class LogDialog(QDialog):
     """输入日志"""
 
-    def __init__(self, parent=None):
+    search_finished = Signal(int, object, object)  # (查找编号, 结果, 异常)，由搜索线程发出
+
+    def __init__(self, max_lines=DEFAULT_TAIL_LINES, window_bytes=DEFAULT_WINDOW_BYTES,
+                 search_indexer=None, parent=None):
         super().__init__(parent)
         self.setWindowTitle("PowerShell 输出日志")
         self.setGeometry(100, 100, 800, 600)
+        self.log_file = os.path.join(get_app_dir(), "powershell_output.log")
+        self.search_indexer = search_indexer
+        self.searcher = LogSearcher(self.log_file)
+        self._search_id = 0  # 最近一次查找的编号，较早的查找结果被丢弃
+        self._search_lock = threading.Lock()  # LogSearcher 缓存索引记录，同一时间只运行一个查找
 
         self.setWindowIcon(QIcon(self.create_icon()))
 
         layout = QVBoxLayout()
 
-        # 日志显示区域
-        self.text_edit = QTextEdit()
-        self.text_edit.setReadOnly(True)
-        self.text_edit.setFont(QFont("Courier New", 10))
-        layout.addWidget(self.text_edit)
+        # 搜索区域
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索日志（不区分大小写）")
+        self.search_button = QPushButton("搜索")
+        self.search_status = QLabel()
+        search_layout.addWidget(self.search_edit)
+        search_layout.addWidget(self.search_button)
+        search_layout.addWidget(self.search_status)
+        layout.addLayout(search_layout)
+
+        # 实时输出（有行数上限）与完整日志文件（只渲染可见的行，索引在后台构建）
+        self.tabs = QTabWidget()
+        self.tail_view = LogTailView(max_lines)
+        self.log_view = LogView(self.log_file, window_bytes)
+        self.tabs.addTab(self.tail_view, "实时输出")
+        self.tabs.addTab(self.log_view, "完整日志")
+        self.search_results = QListWidget()
+        self.tabs.addTab(self.search_results, "搜索结果")
+        layout.addWidget(self.tabs)
 
         # 按钮区域
         button_layout = QHBoxLayout()
         self.clear_button = QPushButton("清空日志")
+        self.pause_checkbox = QCheckBox("暂停滚动")
+        self.earlier_button = QPushButton("加载更早")
+        self.earlier_button.setEnabled(False)
         self.close_button = QPushButton("关闭")
         button_layout.addWidget(self.clear_button)
+        button_layout.addWidget(self.pause_checkbox)
+        button_layout.addWidget(self.earlier_button)
         button_layout.addStretch()
         button_layout.addWidget(self.close_button)
         layout.addLayout(button_layout)
@@ -37,7 +70,14 @@ class LogDialog(QDialog):
         self.setLayout(layout)
 
         # 连接信号
+        self.search_edit.returnPressed.connect(self.search_log)
+        self.search_button.clicked.connect(self.search_log)
+        self.search_results.itemActivated.connect(self.show_search_result)
+        self.search_finished.connect(self._show_search_results)
         self.clear_button.clicked.connect(self.clear_log)
+        self.pause_checkbox.toggled.connect(lambda paused: self.tail_view.set_follow(not paused))
+        self.earlier_button.clicked.connect(self.load_earlier)
+        self.log_view.earlier_changed.connect(self.earlier_button.setEnabled)
         self.close_button.clicked.connect(self.accept)
 
     def create_icon(self):
@@ -54,20 +94,84 @@ class LogDialog(QDialog):
         painter.end()
         return pixmap
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.log_view.start()
+        # 搜索索引缺失或过期时在后台补建
+        if self.search_indexer is not None:
+            self.search_indexer.submit(self.log_file)
+
+    def hideEvent(self, event):
+        # 隐藏时释放文件映射，不妨碍日志轮转与清空；放弃正在进行的查找
+        self.log_view.stop()
+        self._search_id += 1
+        super().hideEvent(event)
+
+    def load_earlier(self):
+        """在完整日志页中加载更早的一页内容"""
+        self.tabs.setCurrentWidget(self.log_view)
+        self.log_view.load_earlier()
+
+    def search_log(self):
+        """在后台线程中查找包含关键字的行，完成后结果显示在搜索结果页"""
+        query = self.search_edit.text()
+        if not query.strip():
+            return
+        self._search_id += 1
+        search_id = self._search_id
+        self.search_results.clear()
+        self.search_status.setText("正在搜索…")
+        thread = threading.Thread(target=self._run_search, args=(search_id, query), daemon=True)
+        thread.start()
+
+    def _run_search(self, search_id, query):
+        """搜索线程：依次运行查找，已被新的查找取代时尽早结束"""
+        results, error = [], None
+        with self._search_lock:
+            try:
+                results = self.searcher.search(query, cancelled=lambda: search_id != self._search_id)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                error = e
+        self.search_finished.emit(search_id, results, error)
+
+    def _show_search_results(self, search_id, results, error):
+        """查找完成（主线程），显示最近一次查找的结果"""
+        if search_id != self._search_id:
+            return
+        if error is not None:
+            self.search_status.clear()
+            QMessageBox.critical(self, self.windowTitle(), f"搜索日志失败: {error}")
+            return
+        for offset, text in results:
+            item = QListWidgetItem(render_line(text))
+            item.setData(Qt.UserRole, offset)
+            self.search_results.addItem(item)
+        if len(results) >= DEFAULT_RESULT_LIMIT:
+            self.search_status.setText(f"只显示最新的 {len(results)} 行")
+        else:
+            self.search_status.setText(f"找到 {len(results)} 行")
+        self.tabs.setCurrentWidget(self.search_results)
+
+    def show_search_result(self, item):
+        """在完整日志页中定位到搜索结果所在的行"""
+        self.tabs.setCurrentWidget(self.log_view)
+        self.log_view.scroll_to_offset(item.data(Qt.UserRole))
+
     def clear_log(self):
         """清除日志"""
-        self.text_edit.clear()
-        log_file = os.path.join(get_app_dir(), "powershell_output.log")
+        self.log_view.stop()
+        self.tail_view.clear_lines()
+        self.search_results.clear()
         try:
-            with open(log_file, "w", encoding="utf-8") as f:
+            with open(self.log_file, "w", encoding="utf-8") as f:
                 f.write("")
         except Exception as e:
             QMessageBox.critical(self, "PowerShell 输出日志", f"清空日志失败: {e}")
+        if self.isVisible():
+            self.log_view.start()
 
     def append_text(self, text):
-        """添加文本"""
-        self.text_edit.append(text)
-        # 自动滚动到底部
-        cursor = self.text_edit.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        self.text_edit.setTextCursor(cursor)
+        """添加文本（定时合并追加，一次重绘显示多行）"""
+        self.tail_view.append_lines([text])
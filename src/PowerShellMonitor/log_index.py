@@ -0,0 +1,255 @@
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+
+LINES_PER_BLOCK = 128  # 每隔多少行记录一次偏移（稀疏索引）
+SCAN_CHUNK_SIZE = 4 * 1024 * 1024  # 每次扫描的字节数
+
+
+class LineIndex:
+    """基于内存映射的日志行索引
+
+    通过 mmap 访问日志文件，每 LINES_PER_BLOCK 行记录一次起始偏移，
+    任意一行都可以从最近的记录点开始定位，索引内存占用与文件大小基本无关。
+    update 可以反复调用，只扫描新增的部分；文件被截断或替换时自动重建。
+
+    tail_bytes 不为 0 时只从文件末尾约 tail_bytes 字节处（对齐到行首）开始索引，
+    更早的内容通过 load_earlier 按页加载，打开很大的日志时可以立即看到最新的内容。
+    """
+
+    def __init__(self, path, encoding="utf-8", tail_bytes=0):
+        self.path = path
+        self.encoding = encoding
+        self.tail_bytes = tail_bytes
+        self.generation = 0  # 每次重建索引时加一
+        self._lock = threading.RLock()
+        self._file = None
+        self._mmap = None
+        self._file_id = None
+        self._reset()
+
+    def _reset(self, base=None):
+        # base 为 None 表示尚未确定起始位置（首次映射时按 tail_bytes 决定）
+        self._base = base
+        start = base or 0
+        self._checkpoints = array("q", [start])  # 第 k*LINES_PER_BLOCK 行的起始偏移
+        self._complete_lines = 0  # 已扫描到的完整行数
+        self._last_line_start = start  # 最后一行（可能不完整）的起始偏移
+        self._indexed = start  # 已扫描到的位置
+
+    @property
+    def line_count(self):
+        """已索引的行数（包括末尾不完整的一行）"""
+        with self._lock:
+            return self._complete_lines + (1 if self._indexed > self._last_line_start else 0)
+
+    @property
+    def indexed_bytes(self):
+        """已扫描到的位置（字节偏移）"""
+        return self._indexed
+
+    @property
+    def start_offset(self):
+        """索引起始位置（字节偏移）"""
+        return self._base or 0
+
+    @property
+    def has_earlier(self):
+        """索引起始位置之前是否还有未加载的内容"""
+        return bool(self._base)
+
+    @property
+    def size(self):
+        """当前映射的文件大小"""
+        with self._lock:
+            return len(self._mmap) if self._mmap is not None else 0
+
+    def update(self, max_bytes=SCAN_CHUNK_SIZE):
+        """扫描新增内容，最多扫描 max_bytes 字节；返回是否还有未扫描的内容"""
+        with self._lock:
+            self._remap()
+            size = self.size
+            if self._base is None:
+                if not size:
+                    return False
+                self._reset(self._line_start_near(size - self.tail_bytes) if self.tail_bytes else 0)
+            if self._indexed >= size:
+                return False
+            end = min(size, self._indexed + max_bytes)
+            self._scan(self._indexed, end)
+            return end < size
+
+    def load_earlier(self, page_bytes):
+        """向前多加载约 page_bytes 字节的内容（重建索引），返回新增的完整行数"""
+        with self._lock:
+            if not self._base or self._mmap is None:
+                return 0
+            old_base, old_indexed = self._base, self._indexed
+            base = self._line_start_near(old_base - page_bytes)
+            if base >= old_base:
+                base = 0
+            self._reset(base)
+            self.generation += 1
+            # 同步扫描到原来已索引的位置，重建后原来的每一行立即都有行号，之后的内容由后台继续扫描
+            self._scan(base, old_base)
+            added = self._complete_lines
+            self._scan(old_base, old_indexed)
+            return added
+
+    def row_at(self, offset):
+        """返回包含字节偏移 offset 的行号，不在已索引范围内时返回 -1"""
+        with self._lock:
+            if self._mmap is None or not self.start_offset <= offset <= self._indexed:
+                return -1
+            block = bisect_right(self._checkpoints, offset) - 1
+            start = self._checkpoints[block]
+            return block * LINES_PER_BLOCK + self._mmap[start:offset].count(b"\n")
+
+    def line_start(self, row):
+        """返回第 row 行的起始字节偏移，不在已索引范围内时返回 -1"""
+        with self._lock:
+            if self._mmap is None or not 0 <= row < self.line_count:
+                return -1
+            block = row // LINES_PER_BLOCK
+            pos = self._checkpoints[block]
+            for _ in range(row - block * LINES_PER_BLOCK):
+                pos = self._mmap.find(b"\n", pos) + 1
+            return pos
+
+    def close(self):
+        """释放文件映射（清空或轮转日志前需要调用，Windows 上映射中的文件无法截断）"""
+        with self._lock:
+            self._unmap()
+
+    def lines(self, start, count):
+        """返回从 start 行开始的最多 count 行文本"""
+        result = []
+        with self._lock:
+            total = self.line_count
+            end_line = min(total, start + count)
+            line = start
+            while line < end_line:
+                block = line // LINES_PER_BLOCK
+                block_lines = self.block(block)
+                offset = line - block * LINES_PER_BLOCK
+                take = min(end_line - line, len(block_lines) - offset)
+                if take <= 0:
+                    break
+                result.extend(block_lines[offset:offset + take])
+                line += take
+        return result
+
+    def block(self, block):
+        """返回第 block 个记录点开始的一组行（最多 LINES_PER_BLOCK 行）"""
+        with self._lock:
+            if self._mmap is None or block >= len(self._checkpoints):
+                return []
+            start = self._checkpoints[block]
+            if block + 1 < len(self._checkpoints):
+                end = self._checkpoints[block + 1] - 1  # 去掉下一记录点前的换行符
+            else:
+                end = self._indexed
+                if end > start and self._indexed == self._last_line_start:
+                    end -= 1  # 末尾是完整的行，去掉最后的换行符
+            data = self._mmap[start:max(start, end)]
+        if not data and start >= end:
+            return []
+        return [line.rstrip(b"\r").decode(self.encoding, errors="replace")
+                for line in data.split(b"\n")]
+
+    def _line_start_near(self, pos):
+        """返回 pos 处或之后第一个行首的偏移（pos 不大于 0 时为 0）"""
+        if pos <= 0:
+            return 0
+        if self._mmap[pos - 1:pos] == b"\n":
+            return pos
+        newline = self._mmap.find(b"\n", pos)
+        # 末尾一整段都没有换行符时从 pos 处开始
+        return pos if newline < 0 else newline + 1
+
+    def _scan(self, start, end):
+        data = self._mmap[start:end]
+        parts = data.split(b"\n")
+        # 每个换行符之后（即下一行起始）相对于 start 的偏移
+        ends = list(accumulate(map((1).__add__, map(len, parts[:-1]))))
+        if ends:
+            # 记录行号为 LINES_PER_BLOCK 整数倍的行的起始偏移
+            first = (-self._complete_lines - 1) % LINES_PER_BLOCK
+            self._checkpoints.extend(start + pos for pos in ends[first::LINES_PER_BLOCK])
+            self._complete_lines += len(ends)
+            self._last_line_start = start + ends[-1]
+        self._indexed = end
+
+    def _remap(self):
+        """文件增长时重新映射，被截断或替换时重建索引"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._indexed:
+                self._unmap()
+                self._reset()
+                self._file_id = None
+                self.generation += 1
+            return
+
+        file_id = (stat.st_dev, stat.st_ino) if stat.st_ino else None
+        replaced = self._file_id is not None and file_id != self._file_id
+        if replaced or stat.st_size < self._indexed:
+            self._unmap()
+            self._reset()
+            self.generation += 1
+        self._file_id = file_id
+
+        if stat.st_size == 0 or (self._mmap is not None and len(self._mmap) == stat.st_size):
+            return
+        self._unmap()
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 文件在打开后被清空
+            self._unmap()
+
+    def _unmap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LineIndexer:
+    """后台索引线程：持续扫描日志文件的新增内容，直到被停止"""
+
+    def __init__(self, index, idle_interval=0.5):
+        self.index = index
+        self.idle_interval = idle_interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                more = self.index.update()
+            except OSError:
+                more = False
+            if not more:
+                self._stop_event.wait(self.idle_interval)
@@ -0,0 +1,84 @@
+import gzip
+import json
+import time
+import uuid
+
+
+LOG_FORMATS = ("text", "jsonl")  # 日志格式：纯文本 / 每行一条 JSON 记录
+STREAM_STDOUT = "stdout"  # 标准输出与标准错误合并读取
+
+_RECORD_PREFIX = '{"ts":'  # 结构化记录行的开头，用于快速区分纯文本行
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def new_run_id():
+    """生成任务一次运行的编号"""
+    return uuid.uuid4().hex[:12]
+
+
+class RecordFormatter:
+    """把任务输出的一行格式化为一条 JSONL 记录
+
+    每条记录包含写入时刻（Unix 时间，微秒精度）、任务编号、运行编号、输出流和行内容，
+    例如 {"ts":1700000000.123456,"task":"task1","run":"9f1c2a7e5b3d","stream":"stdout","text":"..."}。
+    """
+
+    def __init__(self, task_id, run_id=None, stream=STREAM_STDOUT):
+        self.task_id = task_id
+        self.run_id = run_id or new_run_id()
+        self.stream = stream
+        # 每条记录中不变的部分预先编码
+        self._middle = (',"task":' + _dumps(task_id) + ',"run":' + _dumps(self.run_id)
+                        + ',"stream":' + _dumps(stream) + ',"text":')
+
+    def format(self, text, now=None):
+        """返回一行记录（以换行符结尾）"""
+        now = time.time() if now is None else now
+        text = _dumps(text.rstrip("\r\n"))
+        return f"{_RECORD_PREFIX}{now:.6f}{self._middle}{text}}}\n"
+
+
+def parse_record(line):
+    """解析一行记录，不是结构化记录时返回 None"""
+    if not line.startswith(_RECORD_PREFIX):
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def read_records(path, start=0, end=None):
+    """按顺序读取日志文件中的记录，生成 (行起始偏移, 记录)
+
+    支持 gzip 压缩的历史分段（偏移为解压后的位置）；纯文本行与损坏的行会被跳过。
+    start/end 限定读取的字节范围，start 应位于行首。
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        if start:
+            f.seek(start)
+        offset = start
+        for raw in f:
+            if end is not None and offset >= end:
+                break
+            record = parse_record(raw.decode("utf-8", errors="replace"))
+            if record is not None:
+                yield offset, record
+            offset += len(raw)
+
+
+def render_record(record, milliseconds=True):
+    """把记录渲染为与纯文本日志相同风格的一行：[YYYY-mm-dd HH:MM:SS.mmm] 内容"""
+    ts = record.get("ts", 0)
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+    if milliseconds:
+        stamp += f".{int(ts * 1000) % 1000:03d}"
+    return f"[{stamp}] {record.get('text', '')}"
+
+
+def render_line(line):
+    """显示日志中的一行：结构化记录渲染为文本，其他行原样返回"""
+    record = parse_record(line)
+    return line if record is None else render_record(record)
@@ -0,0 +1,304 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+
+SEARCH_BLOCK_SIZE = 256 * 1024  # 每个索引块覆盖的日志字节数（对齐到行尾）
+FILTER_BITS = 64 * 1024  # 每个块的三元组位图大小（位）
+INDEX_SUFFIX = ".idx"  # 索引文件后缀，与日志文件放在一起
+DEFAULT_RESULT_LIMIT = 1000  # 单次查找最多返回的行数
+BUILD_BATCH_BLOCKS = 16  # 每次连续建立索引的块数，之后轮到其他日志
+SCAN_CHUNK_SIZE = 4 * 1024 * 1024  # 直接扫描日志时每次读取的字节数
+WORD_CACHE_SIZE = 100000  # 词到位图位置的缓存条目上限
+
+_MAGIC = b"PSMSIDX1"
+_HEADER = struct.Struct("<IIq")  # 块大小, 位图位数, 索引编号（每次重建时更新）
+_HEADER_SIZE = len(_MAGIC) + _HEADER.size
+_RECORD = struct.Struct("<qqI")  # 块起始偏移, 块结束偏移, 块开头内容的 CRC32
+_FILTER_BYTES = FILTER_BITS // 8
+_RECORD_SIZE = _RECORD.size + _FILTER_BYTES
+_CRC_BYTES = 64  # 校验块开头多少字节（判断日志是否已被替换）
+_MASK = FILTER_BITS - 1
+
+
+def index_file_for(log_file):
+    """返回日志文件对应的搜索索引文件路径"""
+    return log_file + INDEX_SUFFIX
+
+
+def _gram_positions(word):
+    """词中每个三元组在位图中的位置"""
+    return [(int.from_bytes(word[i:i + 3], "little") * 2654435761 >> 7) & _MASK
+            for i in range(len(word) - 2)]
+
+
+def block_filter(data, word_cache=None):
+    """计算一个块的三元组位图
+
+    按空白切分出词（转换为小写），把每个词中的三元组散列到位图中；
+    日志中重复出现的词很多，词对应的位置会被缓存。
+    """
+    cache = {} if word_cache is None else word_cache
+    if len(cache) > WORD_CACHE_SIZE:
+        cache.clear()
+    positions = set()
+    for word in set(data.lower().split()):
+        grams = cache.get(word)
+        if grams is None:
+            grams = cache[word] = _gram_positions(word)
+        positions.update(grams)
+    bits = bytearray(_FILTER_BYTES)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return bytes(bits)
+
+
+def query_bits(needle):
+    """关键字（已转换为小写的字节串）需要在位图中存在的位，返回 [(字节下标, 掩码)]"""
+    positions = set()
+    for word in needle.split():
+        positions.update(_gram_positions(word))
+    return sorted((position >> 3, 1 << (position & 7)) for position in positions)
+
+
+class SearchIndexBuilder:
+    """为一个日志文件增量建立搜索索引
+
+    日志按约 SEARCH_BLOCK_SIZE 字节（对齐到行尾）分块，每块记录一个三元组位图，
+    追加写入与日志放在一起的索引文件，重启后继续使用。
+    索引文件缺失、损坏或日志已被截断/替换时从头重建。不足一块的尾部不建索引，查找时直接扫描。
+    """
+
+    def __init__(self, log_file, word_cache=None):
+        self.log_file = log_file
+        self.index_file = index_file_for(log_file)
+        self.word_cache = {} if word_cache is None else word_cache
+        self._end = None  # 已建立索引的日志位置，None 表示尚未加载索引文件
+        self._last = None  # 最后一个块的 (起始偏移, CRC32)
+
+    def update(self, max_blocks=BUILD_BATCH_BLOCKS):
+        """为新增的完整块建立索引，最多处理 max_blocks 块；返回是否还有未处理的完整块"""
+        try:
+            log = open(self.log_file, "rb")
+        except FileNotFoundError:
+            return False
+        with log:
+            size = os.fstat(log.fileno()).st_size
+            if self._end is None:
+                self._load(log, size)
+            elif (not os.path.exists(self.index_file)
+                  or not self._is_valid(log, size, self._end, self._last)):
+                self._reset()
+
+            with open(self.index_file, "ab", buffering=0) as index:
+                for _ in range(max_blocks):
+                    log.seek(self._end)
+                    data = log.read(SEARCH_BLOCK_SIZE)
+                    if len(data) < SEARCH_BLOCK_SIZE:
+                        return False
+                    cut = data.rfind(b"\n") + 1 or len(data)
+                    self._append(index, data[:cut])
+        return True
+
+    def _append(self, index, data):
+        start = self._end
+        crc = zlib.crc32(data[:_CRC_BYTES])
+        index.write(_RECORD.pack(start, start + len(data), crc) + block_filter(data, self.word_cache))
+        self._end = start + len(data)
+        self._last = (start, crc)
+
+    def _load(self, log, size):
+        """读取已有的索引文件，无效时重建"""
+        try:
+            with open(self.index_file, "r+b") as index:
+                header = index.read(_HEADER_SIZE)
+                if (len(header) < _HEADER_SIZE or header[:len(_MAGIC)] != _MAGIC
+                        or _HEADER.unpack(header[len(_MAGIC):])[:2] != (SEARCH_BLOCK_SIZE, FILTER_BITS)):
+                    raise ValueError("索引格式不匹配")
+                count = (os.fstat(index.fileno()).st_size - _HEADER_SIZE) // _RECORD_SIZE
+                end, last = 0, None
+                if count:
+                    index.seek(_HEADER_SIZE + (count - 1) * _RECORD_SIZE)
+                    start, end, crc = _RECORD.unpack(index.read(_RECORD.size))
+                    last = (start, crc)
+                if not self._is_valid(log, size, end, last):
+                    raise ValueError("日志已变化")
+                # 去掉异常退出时写了一半的记录
+                index.truncate(_HEADER_SIZE + count * _RECORD_SIZE)
+        except (OSError, ValueError, struct.error):
+            self._reset()
+            return
+        self._end, self._last = end, last
+
+    def _is_valid(self, log, size, end, last):
+        """已建立的索引是否仍与日志文件一致"""
+        if end > size:
+            return False
+        if last is None:
+            return True
+        log.seek(last[0])
+        return zlib.crc32(log.read(_CRC_BYTES)) == last[1]
+
+    def _reset(self):
+        with open(self.index_file, "wb") as index:
+            index.write(_MAGIC + _HEADER.pack(SEARCH_BLOCK_SIZE, FILTER_BITS, time.time_ns()))
+        self._end = 0
+        self._last = None
+
+
+class LogSearchIndexer:
+    """后台索引线程
+
+    写入器每次组提交后提交日志文件，同一日志的多次提交会被合并；
+    每个日志每次最多处理 BUILD_BATCH_BLOCKS 块，多个日志轮流处理，重建大日志时不会饿死其他日志。
+    """
+
+    def __init__(self, on_error=None):
+        self.on_error = on_error
+        self._builders = {}
+        self._word_cache = {}  # 所有日志共用，内存占用不随任务数增加
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def submit(self, log_file):
+        """请求为日志文件的新增内容建立索引"""
+        with self._condition:
+            if self._stopped:
+                return
+            if log_file not in self._pending:
+                self._pending.append(log_file)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def stop(self, timeout=5):
+        """停止后台线程（未完成的部分下次启动时继续）"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                log_file = self._pending.popleft()
+            builder = self._builders.get(log_file)
+            if builder is None:
+                builder = self._builders[log_file] = SearchIndexBuilder(log_file, self._word_cache)
+            try:
+                more = builder.update()
+            except Exception as e:
+                more = False
+                if self.on_error:
+                    self.on_error(e)
+            if more:
+                with self._condition:
+                    if log_file not in self._pending:
+                        self._pending.append(log_file)
+
+
+class LogSearcher:
+    """在日志文件中查找包含关键字的行（不区分大小写）
+
+    先用索引中的块位图排除不可能包含关键字的块，只读取候选块与未建索引的尾部；
+    索引记录在多次查找之间缓存，每次只读取新增的记录。
+    """
+
+    def __init__(self, log_file):
+        self.log_file = log_file
+        self.index_file = index_file_for(log_file)
+        self._index_id = None
+        self._blocks = []  # [(起始偏移, 结束偏移)]
+        self._filters = []  # 与 _blocks 对应的位图
+
+    def search(self, query, limit=DEFAULT_RESULT_LIMIT, cancelled=None):
+        """返回包含 query 的行 [(行起始偏移, 行文本)]，按位置排序；超过 limit 行时只保留最新的
+
+        在后台线程中调用时，cancelled() 返回 True 表示查找已不再需要，此时尽早返回（结果不完整）。
+        """
+        needle = query.strip().encode("utf-8").lower()
+        if not needle:
+            return []
+        self._load_records()
+        bits = query_bits(needle)
+        results = []
+        with open(self.log_file, "rb") as log:
+            size = os.fstat(log.fileno()).st_size
+            blocks, filters = self._blocks, self._filters
+            if blocks and blocks[-1][1] > size:
+                # 索引尚未随日志截断而重建，直接扫描整个文件
+                blocks, filters = [], []
+            # 从新到旧：未建索引的尾部，然后是位图匹配的块
+            regions = [(blocks[-1][1] if blocks else 0, size)]
+            regions.extend(block for block, bitmap in zip(reversed(blocks), reversed(filters))
+                           if all(bitmap[i] & mask for i, mask in bits))
+            for start, end in regions:
+                matches = self._scan(log, start, end, needle, limit - len(results), cancelled)
+                results.extend(reversed(matches))
+                if len(results) >= limit:
+                    break
+        results.reverse()
+        return results
+
+    def _load_records(self):
+        """读取索引文件中新增的记录（索引被重建时重新读取全部）"""
+        try:
+            with open(self.index_file, "rb") as index:
+                header = index.read(_HEADER_SIZE)
+                if len(header) < _HEADER_SIZE or header[:len(_MAGIC)] != _MAGIC:
+                    raise ValueError("索引格式不匹配")
+                block_size, filter_bits, index_id = _HEADER.unpack(header[len(_MAGIC):])
+                if (block_size, filter_bits) != (SEARCH_BLOCK_SIZE, FILTER_BITS):
+                    raise ValueError("索引格式不匹配")
+                if index_id != self._index_id:
+                    self._index_id = index_id
+                    self._blocks, self._filters = [], []
+                index.seek(_HEADER_SIZE + len(self._blocks) * _RECORD_SIZE)
+                data = index.read()
+        except (OSError, ValueError, struct.error):
+            self._index_id = None
+            self._blocks, self._filters = [], []
+            return
+        for offset in range(0, len(data) - _RECORD_SIZE + 1, _RECORD_SIZE):
+            start, end, _ = _RECORD.unpack_from(data, offset)
+            self._blocks.append((start, end))
+            self._filters.append(data[offset + _RECORD.size:offset + _RECORD_SIZE])
+
+    def _scan(self, log, start, end, needle, limit, cancelled=None):
+        """在日志的 [start, end) 范围内查找，返回最后 limit 个匹配行"""
+        matches = deque(maxlen=max(1, limit))
+        position = start
+        while position < end:
+            if cancelled is not None and cancelled():
+                break
+            log.seek(position)
+            data = log.read(min(SCAN_CHUNK_SIZE, end - position))
+            if not data:
+                break
+            if position + len(data) < end:
+                # 只处理完整的行，剩余部分留到下一次读取
+                data = data[:data.rfind(b"\n") + 1 or len(data)]
+            lower = data.lower()
+            found = lower.find(needle)
+            while found >= 0:
+                line_start = lower.rfind(b"\n", 0, found) + 1
+                line_end = lower.find(b"\n", found)
+                if line_end < 0:
+                    line_end = len(lower)
+                text = data[line_start:line_end].rstrip(b"\r").decode("utf-8", errors="replace")
+                matches.append((position + line_start, text))
+                found = lower.find(needle, line_end)
+            position += len(data)
+        return list(matches)
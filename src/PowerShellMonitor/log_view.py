@@ -0,0 +1,252 @@
+from collections import OrderedDict, deque
+
+from PySide6.QtWidgets import QListView, QAbstractItemView, QApplication, QPlainTextEdit
+from PySide6.QtGui import QFont, QKeySequence
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QPoint, QTimer, Signal
+
+from log_index import LineIndex, LineIndexer, LINES_PER_BLOCK
+from log_records import render_line
+
+
+DEFAULT_TAIL_LINES = 5000  # 实时输出窗口保留的最大行数
+DEFAULT_WINDOW_BYTES = 1024 * 1024  # 打开日志时加载的末尾字节数（也是“加载更早”的每页大小）
+
+
+class LogLineModel(QAbstractListModel):
+    """日志行模型：行数来自后台构建的行索引，只在视图需要时读取可见的行
+
+    结构化记录（JSONL）行在读取时渲染为带时间戳的文本。
+    """
+
+    CACHE_BLOCKS = 64  # 缓存的行块数量
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.line_index = index
+        self._rows = 0
+        self._indexed = 0
+        self._generation = index.generation
+        self._cache = OrderedDict()  # block -> [lines]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = index.row()
+        block = row // LINES_PER_BLOCK
+        lines = self._block(block)
+        offset = row - block * LINES_PER_BLOCK
+        return lines[offset] if offset < len(lines) else ""
+
+    def line_text(self, row):
+        """返回指定行的文本"""
+        return self.data(self.index_for_row(row))
+
+    def index_for_row(self, row):
+        return self.createIndex(row, 0)
+
+    def refresh(self):
+        """同步索引的最新进度（在界面线程中定时调用），返回是否有新内容"""
+        if self.line_index.generation != self._generation:
+            self.beginResetModel()
+            self._generation = self.line_index.generation
+            self._cache.clear()
+            self._rows = self.line_index.line_count
+            self._indexed = self.line_index.indexed_bytes
+            self.endResetModel()
+            return True
+
+        indexed = self.line_index.indexed_bytes
+        if indexed == self._indexed:
+            return False
+        self._indexed = indexed
+
+        # 原来的最后一行可能不完整，它所在的块需要重新读取
+        last_row = max(self._rows - 1, 0)
+        self._cache.pop(last_row // LINES_PER_BLOCK, None)
+        count = self.line_index.line_count
+        if count > self._rows:
+            self.beginInsertRows(QModelIndex(), self._rows, count - 1)
+            self._rows = count
+            self.endInsertRows()
+        if self._rows:
+            changed = self.index_for_row(last_row)
+            self.dataChanged.emit(changed, changed)
+        return True
+
+    def _block(self, block):
+        lines = self._cache.get(block)
+        if lines is not None:
+            self._cache.move_to_end(block)
+            return lines
+        lines = [render_line(line) for line in self.line_index.block(block)]
+        self._cache[block] = lines
+        if len(self._cache) > self.CACHE_BLOCKS:
+            self._cache.popitem(last=False)
+        return lines
+
+
+class LogView(QListView):
+    """虚拟化的日志查看控件
+
+    日志文件通过内存映射访问，后台线程增量构建行索引，
+    视图只渲染可见范围内的行，打开任意大小的日志都不会卡住界面。
+    打开时只加载末尾 window_bytes 字节，更早的内容通过 load_earlier 按页加载（0 表示加载全部）；
+    再次显示时只扫描上次之后新增的内容。
+    """
+
+    REFRESH_INTERVAL = 200  # 毫秒
+
+    earlier_changed = Signal(bool)  # 是否还有更早的内容可以加载
+
+    def __init__(self, log_file, window_bytes=DEFAULT_WINDOW_BYTES, parent=None):
+        super().__init__(parent)
+        self.setUniformItemSizes(True)
+        self.setFont(QFont("Courier New", 10))
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        self.window_bytes = window_bytes
+        self.line_index = LineIndex(log_file, tail_bytes=window_bytes)
+        self.indexer = LineIndexer(self.line_index)
+        self._has_earlier = False
+        self.line_model = LogLineModel(self.line_index, self)
+        self.setModel(self.line_model)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def start(self):
+        """开始（或恢复）索引并定时刷新"""
+        self.indexer.start()
+        self.refresh_timer.start(self.REFRESH_INTERVAL)
+
+    def stop(self):
+        """停止索引并释放文件映射"""
+        self.refresh_timer.stop()
+        self.indexer.stop()
+        self.line_index.close()
+
+    def refresh(self):
+        """同步新内容，原来停在底部时自动滚动到底部"""
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        if self.line_model.refresh() and at_bottom:
+            self.scrollToBottom()
+        self._update_earlier()
+
+    def load_earlier(self, page_bytes=None):
+        """向前加载一页更早的内容，保持原来最上面的行位置不变"""
+        page_bytes = page_bytes or self.window_bytes
+        if not page_bytes:
+            return
+        # 按字节偏移记住最上面的行，重建索引后行号会整体后移
+        top = self.indexAt(QPoint(0, 0)).row()
+        offset = self.line_index.line_start(top) if top >= 0 else -1
+        added = self.line_index.load_earlier(page_bytes)
+        self.line_model.refresh()
+        row = self.line_index.row_at(offset) if offset >= 0 else -1
+        self.scrollTo(self.line_model.index_for_row(row if row >= 0 else added), QAbstractItemView.PositionAtTop)
+        self._update_earlier()
+
+    def _update_earlier(self):
+        has_earlier = self.line_index.has_earlier
+        if has_earlier != self._has_earlier:
+            self._has_earlier = has_earlier
+            self.earlier_changed.emit(has_earlier)
+
+    def scroll_to_line(self, row):
+        """滚动到指定行并选中"""
+        index = self.line_model.index_for_row(row)
+        self.scrollTo(index, QAbstractItemView.PositionAtCenter)
+        self.setCurrentIndex(index)
+
+    def scroll_to_offset(self, offset):
+        """滚动到包含字节偏移 offset 的行（需要时先加载更早的内容或扫描到该位置）"""
+        index = self.line_index
+        index.update(0)
+        if offset < index.start_offset:
+            self.load_earlier(index.start_offset - offset + self.window_bytes)
+        while offset > index.indexed_bytes and index.update():
+            pass
+        self.line_model.refresh()
+        row = index.row_at(offset)
+        if row >= 0:
+            self.scroll_to_line(row)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            text = "\n".join(self.line_model.line_text(row) for row in rows)
+            QApplication.clipboard().setText(text)
+            return
+        super().keyPressEvent(event)
+
+
+class LogTailView(QPlainTextEdit):
+    """实时输出控件
+
+    新输出先放入有界的待显示队列，由定时器每次一并追加，一次重绘显示多行；
+    控件最多保留 max_lines 行，更早的行自动移除，内存占用有上限。
+    暂停跟随时继续接收输出，只是不再自动滚动到底部。
+    """
+
+    APPEND_INTERVAL = 100  # 毫秒
+
+    def __init__(self, max_lines=DEFAULT_TAIL_LINES, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setFont(QFont("Courier New", 10))
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.setUndoRedoEnabled(False)
+        self.follow = True
+        self._pending = deque()
+        self.set_max_lines(max_lines)
+
+        self.append_timer = QTimer(self)
+        self.append_timer.timeout.connect(self.flush_pending)
+        self.append_timer.start(self.APPEND_INTERVAL)
+
+    def set_max_lines(self, max_lines):
+        """设置保留的最大行数"""
+        self.max_lines = max(1, int(max_lines))
+        self.setMaximumBlockCount(self.max_lines)
+        # 待显示的行同样有上限，超出的旧行反正会被控件移除
+        self._pending = deque(self._pending, maxlen=self.max_lines)
+
+    def set_follow(self, follow):
+        """设置是否自动滚动到最新输出"""
+        self.follow = follow
+        if follow:
+            self.flush_pending()
+            self.scroll_to_end()
+
+    def append_lines(self, lines):
+        """加入一批输出（在下一次定时追加时显示）"""
+        self._pending.extend(line.rstrip("\r\n") for line in lines)
+
+    def flush_pending(self):
+        """把待显示的行一次性追加到控件"""
+        if not self._pending:
+            return
+        text = "\n".join(self._pending)
+        self._pending.clear()
+
+        scrollbar = self.verticalScrollBar()
+        position = scrollbar.value()
+        self.appendPlainText(text)
+        if self.follow:
+            self.scroll_to_end()
+        else:
+            scrollbar.setValue(position)
+
+    def scroll_to_end(self):
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def clear_lines(self):
+        """清空已显示与待显示的行"""
+        self._pending.clear()
+        self.clear()
@@ -0,0 +1,88 @@
+import os
+import signal
+import subprocess
+import sys
+
+
+PROCESS_BACKENDS = ("auto", "windows", "posix")
+
+
+class ProcessBackend:
+    """平台进程后端：负责启动任务进程和终止任务的整个进程树
+
+    进程管理器只通过后端启动与终止进程，不直接依赖某个平台的进程接口。
+    """
+
+    name = ""
+    powershell = "powershell"  # 执行 PowerShell 命令的解释器
+
+    def command_args(self, command):
+        """把任务命令转换为参数列表：.exe 按空白切分后直接运行，其他命令交给 PowerShell 执行"""
+        if command.lower().endswith('.exe'):
+            return command.split()
+        return [self.powershell, "-Command", command]
+
+    def spawn(self, args):
+        """启动进程，标准输出与标准错误合并到一个管道"""
+        return subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                universal_newlines=False, **self._popen_options())
+
+    def kill(self, process):
+        """强制终止进程及其所有子进程"""
+        raise NotImplementedError
+
+    def _popen_options(self):
+        return {}
+
+
+class WindowsProcessBackend(ProcessBackend):
+    """Windows 后端：不显示控制台窗口，用 taskkill /F /T 终止进程树"""
+
+    name = "windows"
+
+    def kill(self, process):
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                       capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW)
+
+    def _popen_options(self):
+        return {"creationflags": subprocess.CREATE_NO_WINDOW}
+
+
+class PosixProcessBackend(ProcessBackend):
+    """POSIX 后端：每个任务在独立的会话（进程组）中运行，用 os.killpg 直接向整个进程组发送信号
+
+    终止任务不需要启动辅助进程；任务派生的子进程留在同一进程组中，会一起被终止。
+    """
+
+    name = "posix"
+    powershell = "pwsh"
+
+    def kill(self, process):
+        self._signal_group(process, signal.SIGKILL)
+
+    def _signal_group(self, process, signum):
+        # 进程组 ID 即任务进程的 PID：任务进程被回收后该 ID 可能已被复用，不能再向它发送信号
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signum)
+        except ProcessLookupError:
+            # 进程组已经全部退出
+            pass
+        except PermissionError:
+            # 无权向整个进程组发送信号，只向任务进程本身发送（不回收）
+            os.kill(process.pid, signum)
+
+    def _popen_options(self):
+        return {"start_new_session": True}
+
+
+def create_process_backend(name="auto"):
+    """按名称创建进程后端，auto 按当前平台选择"""
+    if name == "auto":
+        name = "windows" if sys.platform == "win32" else "posix"
+    if name == "windows":
+        return WindowsProcessBackend()
+    if name == "posix":
+        return PosixProcessBackend()
+    raise ValueError(f"未知的进程后端: {name}")
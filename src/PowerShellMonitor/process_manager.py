@@ -1,54 +1,52 @@
-import subprocess
 import threading
-from datetime import datetime
+import time
 from PySide6.QtCore import QObject, Signal
 
+from log_writer import LogWriter, LogFlusher, TimestampFormatter, DEFAULT_FLUSH_INTERVAL
+from log_rotation import LogCompressor
+from log_search import LogSearchIndexer
+from log_time_index import TimeIndexWriter
+from output_decoder import OutputDecoder
+from process_backend import create_process_backend
+
 
 class ProcessManager(QObject):
     """进程管理器"""
 
     update_signal = Signal(str)
 
-    def __init__(self, ps_command, time_stamp, log_file):
+    def __init__(self, ps_command, time_stamp, log_file, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 rotation=None):
         super().__init__()
         self.ps_command = ps_command
         self.time_stamp = time_stamp
         self.log_file = log_file
+        self.log_compressor = LogCompressor(on_error=self._on_compress_error)
+        self.search_indexer = LogSearchIndexer(on_error=self._on_index_error)
+        self.log_writer = LogWriter(log_file, flush_interval=flush_interval,
+                                    rotation=rotation, compressor=self.log_compressor,
+                                    search_indexer=self.search_indexer,
+                                    time_index=TimeIndexWriter(log_file))
+        self.timestamps = TimestampFormatter()
+        self.log_flusher = LogFlusher(on_error=self._on_flush_error)
+        self.log_flusher.register(self.log_writer)
+        self.process_backend = create_process_backend()
         self.process = None
         self.is_running = False
         self.output_thread = None
+        self._shut_down = False
 
     def start(self):
         """启动 PowerShell 子进程"""
         try:
-            # 检查是否是 PowerShell 命令还是可执行文件
-            if self.ps_command.lower().endswith('.exe'):
-                # 如果是可执行文件，直接运行
-                command_parts = self.ps_command.split()
-                executable = command_parts[0]
-                args = command_parts[1:] if len(command_parts) > 1 else []
-
-                self.process = subprocess.Popen(
-                    [executable] + args,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-            else:
-                # 如果是 PowerShell 命令，使用 PowerShell 执行
-                self.process = subprocess.Popen(
-                    ["powershell", "-Command", self.ps_command],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
+            # .exe 直接运行，其他命令交给 PowerShell 执行
+            self.process = self.process_backend.spawn(self.process_backend.command_args(self.ps_command))
 
             self.is_running = True
 
-            # 启动线程来读取输出
-            self.output_thread = threading.Thread(target=self._read_output)
+            # 启动线程来读取输出（每次启动重新检测编码）
+            self.output_thread = threading.Thread(target=self._read_output,
+                                                  args=(OutputDecoder(),))
             self.output_thread.daemon = True
             self.output_thread.start()
             return True
@@ -57,7 +55,7 @@ class ProcessManager(QObject):
             self.update_signal.emit(f"启动进程失败: {str(e)}")
             return False
 
-    def _read_output(self):
+    def _read_output(self, decoder):
         """读取进程输出并发送到主线程"""
         while self.process and self.process.stdout:
             try:
@@ -66,20 +64,10 @@ class ProcessManager(QObject):
                 if not raw_line:
                     break
 
-                # 尝试多种编码方式解码
-                decoded_line = None
-                encodings = ['utf-8', 'gbk', 'latin-1', 'cp1252']
-
-                for encoding in encodings:
-                    try:
-                        decoded_line = raw_line.decode(encoding)
-                        break
-                    except UnicodeDecodeError:
-                        continue
-
-                # 如果所有编码都失败，使用替代字符
-                if decoded_line is None:
-                    decoded_line = raw_line.decode('utf-8', errors='replace')
+                # 编码只检测一次，之后使用增量解码器
+                decoded_line = decoder.decode(raw_line)
+                if not decoded_line:
+                    continue
 
                 # 发送到主线程更新日志
                 self.update_signal.emit(decoded_line)
@@ -89,13 +77,17 @@ class ProcessManager(QObject):
                 self.update_signal.emit(error_msg)
                 break
 
+        # 输出结束，发送解码器中残留的字节
+        tail = decoder.flush()
+        if tail:
+            self.update_signal.emit(tail)
+
     def stop(self):
         """停止进程"""
         if self.process:
             try:
-                # 在 Windows 上使用 taskkill 终止进程树
-                subprocess.run(["taskkill", "/F", "/T", "/PID", str(self.process.pid)],
-                               capture_output=True)
+                # 终止整个进程树
+                self.process_backend.kill(self.process)
             except Exception as e:
                 self.update_signal.emit(f"终止进程时出错: {e}")
 
@@ -103,14 +95,46 @@ class ProcessManager(QObject):
 
         self.is_running = False
 
+        # 保证停止时日志全部落盘
+        self.flush_log()
+
     def write_log(self, text):
-        """写入日志文件"""
+        """写入日志文件（经由缓冲写入器）"""
         try:
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                if self.time_stamp:
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    f.write(f"[{timestamp}] {text}")
-                else:
-                    f.write(text)
+            now = time.time()
+            if self.time_stamp:
+                self.log_writer.write(self.timestamps.prefix(now) + text, now)
+            else:
+                self.log_writer.write(text, now)
+        except Exception as e:
+            self.update_signal.emit(f"写入日志文件时出错: {e}")
+
+    def flush_log(self):
+        """刷新缓冲区并关闭日志文件"""
+        try:
+            self.log_writer.close()
         except Exception as e:
             self.update_signal.emit(f"写入日志文件时出错: {e}")
+
+    def shutdown(self):
+        """退出前停止进程并刷新日志（只执行一次）"""
+        if self._shut_down:
+            return
+        self._shut_down = True
+        self.stop()
+        self.log_flusher.stop()
+        self.flush_log()
+        self.log_compressor.stop()
+        self.search_indexer.stop()
+
+    def _on_compress_error(self, error):
+        """后台压缩日志出错"""
+        self.update_signal.emit(f"压缩历史日志时出错: {error}")
+
+    def _on_index_error(self, error):
+        """后台建立搜索索引出错"""
+        self.update_signal.emit(f"建立日志搜索索引时出错: {error}")
+
+    def _on_flush_error(self, writer, error):
+        """后台刷新出错"""
+        self.update_signal.emit(f"写入日志文件时出错: {error}")
@@ -1,11 +1,15 @@
 import os
 import sys
-import winreg
+try:
+    import winreg
+except ImportError:  # 非 Windows 平台
+    winreg = None
 from PySide6.QtWidgets import QSystemTrayIcon, QMenu, QApplication
-from PySide6.QtGui import QIcon, QAction, QTextCursor
+from PySide6.QtGui import QIcon, QAction
 from PySide6.QtCore import Qt
 
-from config import load_config
+from config import load_config, load_log_settings
+from log_rotation import RotationPolicy
 from process_manager import ProcessManager
 from log_dialog import LogDialog
 from utils import get_app_dir, is_process_running
@@ -28,7 +32,12 @@ class SystemTrayApp(QSystemTrayIcon):
         self.setToolTip("PowerShell 监控器")
 
         # 创建进程管理器
-        self.process_manager = ProcessManager(self.ps_command, self.time_stamp, self.log_file)
+        log_settings = load_log_settings()
+        self.log_view_max_lines = log_settings['LOG_VIEW_MAX_LINES']
+        self.log_view_window = log_settings['LOG_VIEW_WINDOW_KB'] * 1024
+        self.process_manager = ProcessManager(self.ps_command, self.time_stamp, self.log_file,
+                                              log_settings['LOG_FLUSH_INTERVAL'],
+                                              self.create_rotation_policy(log_settings))
         self.process_manager.update_signal.connect(self.update_log)
 
         # 创建菜单
@@ -47,7 +56,8 @@ class SystemTrayApp(QSystemTrayIcon):
         self.menu.addAction(self.status_action)
         self.menu.addAction(self.toggle_action)
         self.menu.addSeparator()
-        self.menu.addAction(self.autostart_action)
+        if winreg is not None:  # 开机自启动依赖 Windows 注册表
+            self.menu.addAction(self.autostart_action)
         self.menu.addAction(self.reload_config_action)
         self.menu.addSeparator()
         self.menu.addAction(self.exit_action)
@@ -85,11 +95,24 @@ class SystemTrayApp(QSystemTrayIcon):
         painter.end()
         return pixmap
 
+    def create_rotation_policy(self, log_settings):
+        """根据日志设置创建轮转策略"""
+        return RotationPolicy(max_bytes=int(log_settings['LOG_MAX_SIZE_MB'] * 1024 * 1024),
+                              daily=log_settings['LOG_ROTATE_DAILY'],
+                              keep=log_settings['LOG_KEEP'])
+
     def reload_config(self):
         """重新加载配置文件"""
         self.ps_command, self.time_stamp = load_config()
         self.process_manager.ps_command = self.ps_command
         self.process_manager.time_stamp = self.time_stamp
+        log_settings = load_log_settings()
+        self.process_manager.log_writer.flush_interval = log_settings['LOG_FLUSH_INTERVAL']
+        self.process_manager.log_writer.rotation = self.create_rotation_policy(log_settings)
+        self.log_view_max_lines = log_settings['LOG_VIEW_MAX_LINES']
+        self.log_view_window = log_settings['LOG_VIEW_WINDOW_KB'] * 1024
+        if self.log_dialog:
+            self.log_dialog.tail_view.set_max_lines(self.log_view_max_lines)
 
         self.showMessage("配置已重新加载", f"PS_COMMAND: {self.ps_command}\nTIME: {self.time_stamp}",
                          QSystemTrayIcon.Information, 3000)
@@ -101,6 +124,8 @@ class SystemTrayApp(QSystemTrayIcon):
 
     def is_autostart_enabled(self):
         """检查是否已设置开机自启动"""
+        if winreg is None:
+            return False
         try:
             key = winreg.OpenKey(
                 winreg.HKEY_CURRENT_USER,
@@ -178,21 +203,15 @@ class SystemTrayApp(QSystemTrayIcon):
 
     def show_status(self):
         """显示状态对话框"""
-        if self.log_dialog is None or not self.log_dialog.isVisible():
-            self.log_dialog = LogDialog()
+        if self.log_dialog is None:
+            self.log_dialog = LogDialog(self.log_view_max_lines, self.log_view_window,
+                                        self.process_manager.search_indexer)
 
-            # 读取日志文件内容并显示
-            try:
-                if os.path.exists(self.log_file):
-                    with open(self.log_file, "r", encoding="utf-8") as f:
-                        content = f.read()
-                    self.log_dialog.text_edit.setPlainText(content)
-                    # 移动光标到末尾
-                    cursor = self.log_dialog.text_edit.textCursor()
-                    cursor.movePosition(QTextCursor.MoveOperation.End)
-                    self.log_dialog.text_edit.setTextCursor(cursor)
-            except Exception as e:
-                self.log_dialog.text_edit.setPlainText(f"读取日志文件时出错: {str(e)}")
+        # 先写出缓冲中的日志，对话框显示后在后台索引日志文件
+        try:
+            self.process_manager.log_writer.flush()
+        except Exception as e:
+            self.showMessage("PowerShell 监控器", f"写入日志文件时出错: {e}", QSystemTrayIcon.Critical, 3000)
 
         self.log_dialog.show()
         self.log_dialog.raise_()
@@ -202,6 +221,7 @@ class SystemTrayApp(QSystemTrayIcon):
         """退出应用程序"""
         if self.is_running:
             self.stop_process()
+        # 刷新日志由 main 中连接的 aboutToQuit 完成
         QApplication.quit()
 
     def on_tray_activated(self, reason):
@@ -37,6 +37,50 @@ DEFAULT_TASKS = {
     }
 }
 
+# 全局设置默认值（config.ini 的 [SETTINGS] 节）
+DEFAULT_SETTINGS = {
+    "log_flush_interval": 1.0,  # 日志缓冲刷新间隔（秒）
+    "log_buffer_size": 65536,  # 日志缓冲区大小（字节），超过后立即写入
+    "log_max_size_mb": 0.0,  # 单个日志文件的最大大小（MB），超过后轮转，0 表示不按大小轮转
+    "log_rotate_daily": False,  # 是否每天轮转日志
+    "log_keep": 7,  # 保留的历史日志分段数量，0 表示全部保留
+    "log_compress": True,  # 是否在后台用 gzip 压缩历史日志分段
+    "output_batch_interval": 0.05,  # 输出批量发送到界面的间隔（秒）
+    "output_batch_lines": 500,  # 单个批次的最大行数，达到后立即发送
+    "io_engine": "auto",  # 输出读取方式: thread（每任务一个线程）、selector（共享线程）、auto
+    "io_engine_threads": 1,  # selector 模式下的读取线程数
+    "process_backend": "auto",  # 进程后端: windows（taskkill 终止进程树）、posix（进程组 + killpg）、auto（按平台选择）
+    "stop_timeout": 5.0,  # 停止所有任务时等待任务正常退出的宽限期（秒），超过后强制终止
+    "stop_kill_timeout": 2.0,  # 强制终止后最多再等待的时间（秒）
+    "restart_policy": "never",  # 任务退出后是否自动重启: never、on-failure（退出码非 0 时）、always
+    "restart_delay": 1.0,  # 首次自动重启前的等待时间（秒），之后每次翻倍
+    "restart_max_delay": 60.0,  # 自动重启前的最长等待时间（秒）
+    "restart_jitter": 0.1,  # 等待时间的随机浮动比例
+    "restart_max_count": 5,  # restart_window 秒内最多自动重启的次数，超过后视为崩溃循环并停止重启，0 表示不限制
+    "restart_window": 300.0,  # 统计重启次数的时间窗口（秒）
+    "resource_sample_interval": 1.0,  # 采样任务 CPU、内存与读写量的间隔（秒），0 表示不采样（仅 Linux）
+    "resource_history_size": 300,  # 每个任务保留的资源采样数
+    "startup_max_concurrent": 0,  # 启动多个任务时最多同时处于启动中（尚未就绪）的任务数，0 表示 CPU 核心数
+    "startup_settle_time": 2.0,  # 没有 ready_pattern 的任务在启动后多久（秒）视为就绪（有输出时提前就绪）
+    "interpreter_pool_size": 0,  # 每种解释器（PowerShell、Python）预先启动并保持空闲的进程数，启动任务时直接使用以省去解释器启动时间，0 表示不预热
+    "interpreter_pool_max_idle": 600.0,  # 空闲的预热进程最多保留多久（秒），超过后替换为新进程
+    "cgroup_root": "",  # 存放任务 cgroup 的 cgroup v2 目录，留空时使用本程序所在的 cgroup
+    "cgroup_move_self": False,  # cgroup_root 中有进程（通常是本程序自身）时，是否允许把本程序移到其下的 monitor 子 cgroup 以启用 cgroup 限制
+    "read_chunk_size": 65536,  # 每次读取输出的最大字节数
+    "max_line_length": 16384,  # 单行最大字节数，超出部分切分为多行
+    "partial_line_timeout": 0.5,  # 不完整的行等待多久（秒）后提前输出
+    "output_ring_size": 10000,  # 每个任务待写入输出的缓冲行数上限，超出时丢弃最旧的行
+    "log_view_max_lines": 5000,  # 日志窗口实时输出保留的最大行数
+    "log_time_index_kb": 64,  # 每隔多少 KB 在时间索引（task_<id>.log.tidx）中记录一个时间点，0 表示不记录
+    "log_format": "text",  # 日志格式: text（纯文本）或 jsonl（每行一条带元数据的 JSON 记录）
+    "log_search_index": True,  # 是否为任务日志建立搜索索引（task_<id>.log.idx）
+    "log_view_window_kb": 1024,  # 打开日志时只加载末尾的字节数（KB），也是“加载更早”的每页大小，0 表示全部加载
+    "log_storage": "files",  # 日志存储方式: files（每个任务一个日志文件）或 shared（所有任务共用分段日志）
+    "shared_log_dir": "",  # 共享日志目录，留空时使用程序目录下的 shared_log
+    "shared_log_segment_mb": 64.0,  # 共享日志单个分段的大小（MB）
+    "shared_log_keep_segments": 16,  # 共享日志保留的分段数量，0 表示全部保留
+}
+
 # 获取程序所在目录
 if getattr(sys, 'frozen', False):
     APP_DIR = os.path.dirname(sys.executable)
@@ -56,6 +100,7 @@ def load_config():
         config['DEFAULT'] = {
             'TASKS': json.dumps(DEFAULT_TASKS, ensure_ascii=False)
         }
+        config['SETTINGS'] = {key: str(value) for key, value in DEFAULT_SETTINGS.items()}
         with open(CONFIG_FILE, 'w', encoding='utf-8') as configfile:
             config.write(configfile)
         print(f"创建默认配置文件: {CONFIG_FILE}")
@@ -73,10 +118,43 @@ def load_config():
         return DEFAULT_TASKS
 
 
+def load_settings():
+    """加载全局设置，缺失或无效的项使用默认值"""
+    settings = dict(DEFAULT_SETTINGS)
+    config = configparser.ConfigParser()
+    try:
+        config.read(CONFIG_FILE, encoding='utf-8')
+    except Exception as e:
+        print(f"读取设置时出错: {e}, 使用默认设置")
+        return settings
+
+    if not config.has_section('SETTINGS'):
+        return settings
+
+    for key, default in DEFAULT_SETTINGS.items():
+        if not config.has_option('SETTINGS', key):
+            continue
+        try:
+            if isinstance(default, bool):
+                settings[key] = config.getboolean('SETTINGS', key)
+            elif isinstance(default, int):
+                settings[key] = config.getint('SETTINGS', key)
+            elif isinstance(default, float):
+                settings[key] = config.getfloat('SETTINGS', key)
+            else:
+                settings[key] = config.get('SETTINGS', key)
+        except ValueError as e:
+            print(f"设置项 {key} 无效: {e}, 使用默认值 {default}")
+    return settings
+
+
 def save_config(tasks):
     """保存配置到文件"""
     try:
         config = configparser.ConfigParser()
+        # 保留已有的其他节（如 [SETTINGS]）
+        if os.path.exists(CONFIG_FILE):
+            config.read(CONFIG_FILE, encoding='utf-8')
         config['DEFAULT'] = {
             'TASKS': json.dumps(tasks, ensure_ascii=False, indent=2)
         }
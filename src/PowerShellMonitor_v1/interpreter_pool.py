@@ -0,0 +1,139 @@
+import os
+import subprocess
+import time
+from collections import deque
+
+
+DEFAULT_POOL_SIZE = 0  # 每种解释器保持的空闲进程数，0 表示不预热
+DEFAULT_MAX_IDLE = 600.0  # 秒，空闲进程超过这个时间后替换为新进程
+MAX_SCRIPT_BYTES = 16384  # 更长的脚本直接启动：超过管道缓冲区时写入会阻塞到宿主进程开始读取
+
+# 解释器启动后从标准输入读取完整脚本（UTF-8）再执行，脚本在读取完毕（标准输入关闭）前不会开始运行
+POWERSHELL_HOST = ("$reader = [IO.StreamReader]::new([Console]::OpenStandardInput(), "
+                   "[Text.UTF8Encoding]::new($false)); "
+                   "& ([scriptblock]::Create($reader.ReadToEnd()))")
+PYTHON_HOST = ("import sys; "
+               "exec(compile(sys.stdin.buffer.read().decode('utf-8'), '<task>', 'exec'), "
+               "{'__name__': '__main__'})")
+
+
+def host_command(interpreter):
+    """解释器的宿主进程参数，不支持预热的解释器返回 None"""
+    name = os.path.splitext(os.path.basename(interpreter))[0].lower()
+    if name in ("pwsh", "powershell"):
+        return [interpreter, "-Command", POWERSHELL_HOST]
+    if name.startswith("python"):
+        return [interpreter, "-c", PYTHON_HOST]
+    return None
+
+
+class InterpreterPool:
+    """预先启动的空闲解释器进程池
+
+    每种解释器保持 size 个已启动、正在等待读取脚本的宿主进程。启动任务时取出一个，
+    把脚本写入其标准输入后关闭，进程执行完脚本即退出，此后与直接启动的任务进程没有区别：
+    输出经由同一管道读取，由回收线程等待退出，停止时终止其整个进程组。
+    每个宿主进程只运行一次脚本，运行之间互不影响。
+    maintain 把空闲进程补充到 size 个，并替换空闲超过 max_idle 秒或已经意外退出的进程。
+    """
+
+    def __init__(self, backend, size=DEFAULT_POOL_SIZE, max_idle=DEFAULT_MAX_IDLE,
+                 on_error=None, clock=time.monotonic):
+        self.backend = backend
+        self.size = max(0, int(size))
+        self.max_idle = max_idle
+        self.on_error = on_error
+        self.clock = clock
+        self._idle = {}  # 解释器 -> deque[(process, 启动时刻)]
+        self._unavailable = set()  # 无法启动的解释器，不再预热
+        self.hits = 0  # 使用预热进程启动的次数
+        self.misses = 0  # 没有可用的预热进程、直接启动的次数
+
+    def idle_count(self, interpreter):
+        return len(self._idle.get(interpreter, ()))
+
+    def acquire(self, interpreter, script):
+        """取出一个预热的进程运行 script，返回 Popen；没有可用进程时返回 None
+
+        取出的进程不在这里补充（启动新进程会推迟任务的输出），由之后调用的 maintain 补充。
+        """
+        if self.size <= 0 or interpreter in self._unavailable or host_command(interpreter) is None:
+            return None
+        data = script.encode('utf-8')
+        if len(data) > MAX_SCRIPT_BYTES:
+            return None
+        idle = self._idle.setdefault(interpreter, deque())
+        process = None
+        while idle:
+            candidate, _ = idle.popleft()
+            if candidate.poll() is None:
+                process = candidate
+                break
+            self._discard(candidate)
+        if process is not None:
+            try:
+                process.stdin.write(data)
+                process.stdin.close()
+            except OSError as e:
+                self._report(e)
+                self._discard(process)
+                process = None
+        if process is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return process
+
+    def prewarm(self, interpreter):
+        """预先启动 interpreter 的空闲进程"""
+        if self.size > 0 and interpreter not in self._unavailable and host_command(interpreter) is not None:
+            self._fill(interpreter)
+
+    def maintain(self):
+        """替换空闲过久或已退出的进程，并把每种解释器补充到 size 个"""
+        now = self.clock()
+        for interpreter, idle in self._idle.items():
+            if interpreter in self._unavailable:
+                continue
+            for _ in range(len(idle)):
+                process, started = idle.popleft()
+                if process.poll() is None and now - started < self.max_idle:
+                    idle.append((process, started))
+                else:
+                    self._discard(process)
+            self._fill(interpreter)
+
+    def close(self):
+        """终止所有空闲进程"""
+        for idle in self._idle.values():
+            while idle:
+                process, _ = idle.popleft()
+                self._discard(process)
+
+    def _fill(self, interpreter):
+        idle = self._idle.setdefault(interpreter, deque())
+        while len(idle) < self.size:
+            try:
+                process = self.backend.spawn(host_command(interpreter), stdin=subprocess.PIPE)
+            except OSError as e:
+                self._unavailable.add(interpreter)
+                self._report(e)
+                return
+            idle.append((process, self.clock()))
+
+    def _discard(self, process):
+        try:
+            if process.poll() is None:
+                self.backend.kill(process)
+            process.stdin.close()
+            process.stdout.close()
+            process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self._report(e)
+
+    def _report(self, error):
+        if self.on_error:
+            try:
+                self.on_error(error)
+            except Exception:
+                pass
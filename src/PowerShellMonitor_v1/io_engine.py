@@ -0,0 +1,157 @@
+import os
+import selectors
+import threading
+
+
+READ_CHUNK_SIZE = 64 * 1024  # 字节
+
+
+def selector_supported():
+    """当前平台是否支持对管道使用 selectors（Windows 上 select 只支持套接字）"""
+    return os.name == 'posix'
+
+
+class SelectorIOEngine:
+    """基于 selectors 的输出读取引擎
+
+    一个线程通过 epoll/kqueue 等监视所有子进程的输出管道，
+    以非阻塞方式按固定大小分块读取，线程数不随任务数量增加。
+    """
+
+    def __init__(self, on_error=None, chunk_size=READ_CHUNK_SIZE):
+        self.on_error = on_error
+        self.chunk_size = chunk_size
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._requests = []  # 待处理的注册/注销请求
+        self._count = 0
+        self._stopped = False
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def stream_count(self):
+        """当前监视的管道数量"""
+        return self._count
+
+    def register(self, stream, on_data, on_close):
+        """开始监视一个输出管道
+
+        on_data(chunk) 在每读到一块数据时调用，
+        on_close() 在管道关闭（进程退出）后调用。
+        """
+        with self._lock:
+            self._count += 1
+            self._requests.append(('register', stream, on_data, on_close))
+        self._wakeup()
+
+    def unregister(self, stream):
+        """停止监视一个输出管道"""
+        with self._lock:
+            self._requests.append(('unregister', stream, None, None))
+        self._wakeup()
+
+    def stop(self):
+        """停止读取线程"""
+        if not self._thread.is_alive():
+            return
+        self._stopped = True
+        self._wakeup()
+        self._thread.join(timeout=2)
+
+    def _wakeup(self):
+        # 线程退出后管道已关闭，描述符号可能已被复用，不能再写
+        with self._lock:
+            if self._wakeup_w is None:
+                return
+            try:
+                os.write(self._wakeup_w, b"\0")
+            except (BlockingIOError, OSError):
+                pass
+
+    def _run(self):
+        try:
+            while not self._stopped:
+                for key, _ in self._selector.select():
+                    if key.fileobj == self._wakeup_r:
+                        self._drain_wakeup()
+                        self._process_requests()
+                    else:
+                        self._read(key)
+        finally:
+            for key in list(self._selector.get_map().values()):
+                if key.data is not None:
+                    self._close(key)
+            self._selector.close()
+            with self._lock:
+                os.close(self._wakeup_r)
+                os.close(self._wakeup_w)
+                self._wakeup_w = None
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wakeup_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _process_requests(self):
+        with self._lock:
+            requests, self._requests = self._requests, []
+        for action, stream, on_data, on_close in requests:
+            if action == 'register':
+                try:
+                    os.set_blocking(stream.fileno(), False)
+                    self._selector.register(stream, selectors.EVENT_READ,
+                                            (on_data, on_close))
+                except (OSError, ValueError) as e:
+                    self._report(e)
+                    with self._lock:
+                        self._count -= 1
+                    self._call(on_close)
+            else:
+                try:
+                    key = self._selector.get_key(stream)
+                except (KeyError, ValueError):
+                    continue
+                self._close(key)
+
+    def _read(self, key):
+        on_data, _ = key.data
+        try:
+            data = os.read(key.fd, self.chunk_size)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._report(e)
+            data = b""
+
+        if not data:
+            self._close(key)
+            return
+        self._call(on_data, data)
+
+    def _close(self, key):
+        """管道关闭，通知调用方"""
+        _, on_close = key.data
+        self._selector.unregister(key.fileobj)
+        with self._lock:
+            self._count -= 1
+        self._call(on_close)
+
+    def _call(self, func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            self._report(e)
+
+    def _report(self, error):
+        if self.on_error:
+            try:
+                self.on_error(error)
+            except Exception:
+                pass
@@ -0,0 +1,103 @@
+import time
+
+
+DEFAULT_MAX_LINE_LENGTH = 16 * 1024  # 字节
+DEFAULT_PARTIAL_TIMEOUT = 0.5  # 秒
+
+# 行片段的类型
+LINE = 0  # 完整的一行（以 \n 结尾）
+CONTINUED = 1  # 过长或超时被截断的行，后续内容属于同一行
+PROGRESS = 2  # 以 \r 刷新的进度行的最新状态
+
+
+class LineAssembler:
+    """按块读取的输出行组装器
+
+    - 单行最多缓存 max_line_length 字节，超出部分切分为 CONTINUED 片段；
+    - 以 \\r 原地刷新的进度输出只保留最新状态；
+    - 不完整的行超过 partial_timeout 秒仍未结束时，由 flush_partial 提前输出。
+
+    feed/flush_partial 返回 (bytes, kind) 列表，kind 为 LINE、CONTINUED 或 PROGRESS。
+    """
+
+    def __init__(self, max_line_length=DEFAULT_MAX_LINE_LENGTH,
+                 partial_timeout=DEFAULT_PARTIAL_TIMEOUT):
+        self.max_line_length = max(1, max_line_length)
+        self.partial_timeout = partial_timeout
+        self._buf = b""
+        self._progress = False  # 缓存中的内容是否是被 \r 覆盖过的进度行
+        self._since = None  # 缓存中出现未完成内容的时间
+
+    def feed(self, data, now=None):
+        """输入一块数据，返回已组装好的行片段"""
+        pieces = []
+        if self._buf:
+            data = self._buf + data
+        start = 0
+        while True:
+            end = data.find(b"\n", start)
+            if end == -1:
+                break
+            line = data[start:end]
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            # 行内的 \r 表示覆盖，只保留最后一段
+            cr = line.rfind(b"\r")
+            if cr != -1:
+                line = line[cr + 1:]
+            self._split_long(line, pieces)
+            pieces.append((self._tail(line) + b"\n", LINE))
+            start = end + 1
+            self._progress = False
+
+        rest = data[start:]
+        # 末尾的 \r 可能是被截断的 \r\n，暂不处理
+        cr = rest.rfind(b"\r", 0, len(rest) - 1)
+        if cr != -1:
+            rest = rest[cr + 1:]
+            self._progress = True
+        if len(rest) > self.max_line_length:
+            self._split_long(rest, pieces)
+            rest = self._tail(rest)
+
+        if not rest:
+            self._since = None
+        elif self._since is None or start:
+            self._since = time.monotonic() if now is None else now
+        self._buf = rest
+        return pieces
+
+    def flush_partial(self, now=None, force=False):
+        """输出等待超时（或 force 为 True 时）的不完整行"""
+        if not self._buf:
+            return []
+        now = time.monotonic() if now is None else now
+        if not force and now - self._since < self.partial_timeout:
+            return []
+        data = self._buf
+        if data.endswith(b"\r"):
+            data = data[:-1]
+        kind = PROGRESS if self._progress else CONTINUED
+        self._buf = b""
+        self._since = None
+        if not data:
+            return []
+        return [(data, kind)]
+
+    def finish(self):
+        """输出结束时调用，把剩余内容作为最后一行返回"""
+        pieces = self.flush_partial(force=True)
+        return [(data + b"\n", LINE) for data, _ in pieces]
+
+    def _split_long(self, line, pieces):
+        """把超长行中除最后一段以外的部分切分为 CONTINUED 片段"""
+        size = self.max_line_length
+        for offset in range(0, len(line) - size, size):
+            pieces.append((line[offset:offset + size], CONTINUED))
+
+    def _tail(self, line):
+        """超长行切分后剩余的最后一段"""
+        size = self.max_line_length
+        if len(line) <= size:
+            return line
+        return line[(len(line) - 1) // size * size:]
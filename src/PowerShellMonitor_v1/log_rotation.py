@@ -0,0 +1,130 @@
+import glob
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+
+
+class RotationPolicy:
+    """日志轮转策略
+
+    max_bytes 为单个日志文件的最大字节数（0 表示不按大小轮转），
+    daily 为 True 时每天轮转一次，keep 为保留的历史分段数量（0 表示全部保留）。
+    """
+
+    def __init__(self, max_bytes=0, daily=False, keep=0, compress=True):
+        self.max_bytes = max_bytes
+        self.daily = daily
+        self.keep = keep
+        self.compress = compress
+
+    @property
+    def enabled(self):
+        return bool(self.max_bytes or self.daily)
+
+    def should_rotate(self, size, incoming, opened_day, today):
+        """写入 incoming 字节前是否需要轮转（当前文件大小为 size）"""
+        if size <= 0:
+            return False
+        if self.daily and opened_day != today:
+            return True
+        return bool(self.max_bytes) and size + incoming > self.max_bytes
+
+
+# 历史分段的文件名后缀: .20240101-120000[-1][.gz]
+_SEGMENT_SUFFIX = re.compile(r"\.(\d{8}-\d{6})(?:-(\d+))?(\.gz)?$")
+
+
+def rotated_segments(log_file):
+    """返回日志文件的所有历史分段（包括已压缩的），按时间从旧到新排序"""
+    segments = []
+    for path in glob.glob(glob.escape(log_file) + ".*"):
+        match = _SEGMENT_SUFFIX.match(path[len(log_file):])
+        if match:
+            segments.append(((match.group(1), int(match.group(2) or 0)), path))
+    return [path for _, path in sorted(segments)]
+
+
+def rotate_file(log_file, now=None):
+    """把当前日志文件重命名为带时间戳的历史分段，返回新路径"""
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+    target = f"{log_file}.{stamp}"
+    # 同一秒内多次轮转，序号取已有的最大序号加一以保持先后顺序
+    counters = []
+    for path in glob.glob(glob.escape(target) + "*"):
+        match = _SEGMENT_SUFFIX.match(path[len(log_file):])
+        if match and match.group(1) == stamp:
+            counters.append(int(match.group(2) or 0))
+    if counters:
+        target = f"{log_file}.{stamp}-{max(counters) + 1}"
+    os.replace(log_file, target)
+    return target
+
+
+class LogCompressor:
+    """后台压缩线程
+
+    轮转出的历史分段在后台用 gzip 压缩并清理超出保留数量的旧分段，
+    写入日志的线程不会因为压缩而阻塞。
+    """
+
+    def __init__(self, on_error=None):
+        self.on_error = on_error
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, segment, log_file, policy):
+        """提交一个刚轮转出的分段"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put((segment, log_file, policy))
+
+    def stop(self, timeout=10):
+        """处理完已提交的分段后停止"""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout=timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            segment, log_file, policy = item
+            try:
+                if policy.compress and os.path.exists(segment):
+                    compress_file(segment)
+                if policy.keep:
+                    prune_segments(log_file, policy.keep)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+
+
+def compress_file(path):
+    """用 gzip 压缩文件，完成后删除原文件"""
+    temp = path + ".gz.tmp"
+    with open(path, "rb") as src, gzip.open(temp, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(temp, path + ".gz")
+    os.remove(path)
+
+
+def prune_segments(log_file, keep):
+    """删除超出保留数量的最旧分段（连同分段的时间索引）"""
+    for path in rotated_segments(log_file)[:-keep]:
+        base = path[:-3] if path.endswith(".gz") else path
+        for target in (path, base + ".tidx"):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
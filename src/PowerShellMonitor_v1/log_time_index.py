@@ -0,0 +1,209 @@
+import argparse
+import bisect
+import gzip
+import os
+import struct
+import sys
+import time
+
+from log_records import parse_record
+from log_rotation import rotated_segments
+
+
+DEFAULT_INTERVAL_BYTES = 64 * 1024  # 每隔多少字节记录一个时间点
+TIME_PREFIX_RESOLUTION = 1.0  # 行首时间戳最粗的精度（秒），按秒截断的行可能早于索引时刻这么多
+TIME_INDEX_SUFFIX = ".tidx"
+
+_ENTRY = struct.Struct("<dq")  # 时刻（Unix 时间）, 日志偏移
+_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%H:%M:%S", "%H:%M")
+
+
+def time_index_file_for(log_file):
+    """返回日志文件（或已压缩的历史分段）对应的时间索引文件路径"""
+    if log_file.endswith(".gz"):
+        log_file = log_file[:-3]
+    return log_file + TIME_INDEX_SUFFIX
+
+
+def load_time_index(log_file):
+    """读取时间索引，返回 (时刻列表, 偏移列表)；索引不存在时返回两个空列表"""
+    try:
+        with open(time_index_file_for(log_file), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], []
+    data = data[:len(data) - len(data) % _ENTRY.size]
+    times, offsets = [], []
+    for ts, offset in _ENTRY.iter_unpack(data):
+        times.append(ts)
+        offsets.append(offset)
+    return times, offsets
+
+
+class TimeIndexWriter:
+    """日志的稀疏时间索引
+
+    写入器每次组提交前调用 record，每隔约 interval_bytes 字节追加一个 (时刻, 偏移) 记录，
+    时刻为这次提交中最早一行的时刻（与行首时间戳取自同一时刻）：
+    该偏移之前的行都不晚于它，之后的行都不早于它（行首时间戳按秒截断时最多早 TIME_PREFIX_RESOLUTION）。
+    日志被清空后从头记录；轮转时索引随日志分段一起改名。
+    """
+
+    def __init__(self, log_file, interval_bytes=DEFAULT_INTERVAL_BYTES):
+        self.log_file = log_file
+        self.index_file = time_index_file_for(log_file)
+        self.interval_bytes = interval_bytes
+        self._last_offset = None  # 最后一个记录的偏移，None 表示尚未读取索引文件
+
+    def record(self, offset, ts):
+        """即将在日志偏移 offset 处写入最早时刻为 ts 的内容"""
+        if self._last_offset is None:
+            _, offsets = load_time_index(self.log_file)
+            self._last_offset = offsets[-1] if offsets else -1
+        if offset < self._last_offset:
+            # 日志被清空或替换，旧的索引已失效
+            open(self.index_file, "wb").close()
+            self._last_offset = -1
+        if self._last_offset >= 0 and offset - self._last_offset < self.interval_bytes:
+            return
+        with open(self.index_file, "ab") as f:
+            f.write(_ENTRY.pack(ts, offset))
+        self._last_offset = offset
+
+    def rotated(self, segment):
+        """日志已轮转为 segment，索引随之改名，之后为新的日志重新记录"""
+        try:
+            os.replace(self.index_file, time_index_file_for(segment))
+        except FileNotFoundError:
+            pass
+        self._last_offset = -1
+
+
+def _open_log(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+class _LineTimeParser:
+    """解析日志行的时刻：结构化记录的 ts，或文本行的 [YYYY-mm-dd HH:MM:SS(.mmm)] 前缀"""
+
+    def __init__(self):
+        self._seconds = {}  # "YYYY-mm-dd HH:MM:SS" -> Unix 时间
+
+    def __call__(self, line):
+        if line.startswith('{"ts":'):
+            record = parse_record(line)
+            return record.get("ts") if record else None
+        if len(line) < 21 or line[0] != "[" or line[11] != " ":
+            return None
+        stamp = line[1:20]
+        seconds = self._seconds.get(stamp)
+        if seconds is None:
+            try:
+                seconds = time.mktime(time.strptime(stamp, "%Y-%m-%d %H:%M:%S"))
+            except ValueError:
+                return None
+            if len(self._seconds) > 100000:
+                self._seconds.clear()
+            self._seconds[stamp] = seconds
+        if line[20] == "." and line[21:24].isdigit():
+            return seconds + int(line[21:24]) / 1000
+        return seconds
+
+
+def query_time_range(log_file, start, end):
+    """按时间范围读取日志（包括轮转出的历史分段与压缩分段），逐行生成文本
+
+    先用各分段的时间索引跳过整个不相关的分段，再在分段内二分查找起止偏移，只读取这一段；
+    带时间戳的行按时间精确过滤，没有时间戳的行（例如未开启时间戳的任务）按所在位置的时间范围返回。
+    """
+    paths = rotated_segments(log_file)
+    if os.path.exists(log_file):
+        paths.append(log_file)
+    indexes = [load_time_index(path) for path in paths]
+    parse_time = _LineTimeParser()
+
+    for i, path in enumerate(paths):
+        times, offsets = indexes[i]
+        # 下一个分段中最早的时刻，本分段的行都不晚于它
+        following = next((later[0][0] for later in indexes[i + 1:] if later[0]), None)
+        if following is not None and following < start:
+            continue
+        if times and times[0] > end:
+            break
+
+        begin_offset = offsets[bisect.bisect_left(times, start) - 1] if times and times[0] < start else 0
+        # 行首时间戳可能被截断，多读到时刻不超过 end + 精度的位置，由 filter_time_range 精确过滤
+        stop = bisect.bisect_right(times, end + TIME_PREFIX_RESOLUTION)
+        end_offset = offsets[stop] if stop < len(offsets) else None
+
+        with _open_log(path) as f:
+            f.seek(begin_offset)
+            yield from filter_time_range(_read_until(f, begin_offset, end_offset),
+                                         start, end, parse_time)
+
+
+def _read_until(f, offset, end_offset):
+    """逐行读取，直到偏移 end_offset（None 表示读到末尾）"""
+    for raw in f:
+        if end_offset is not None and offset >= end_offset:
+            return
+        offset += len(raw)
+        yield raw
+
+
+def filter_time_range(raw_lines, start, end, parse_time=None):
+    """从按时间顺序排列的原始行（字节串）中筛选出时间范围内的行，生成文本
+
+    带时间戳的行按时间精确过滤，没有时间戳的续行沿用上一行的时刻，
+    开头没有时间可参考的行保留（它们的范围已由时间索引确定）。
+    """
+    parse_time = parse_time or _LineTimeParser()
+    last_time = None
+    for raw in raw_lines:
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        line_time = parse_time(line)
+        if line_time is None:
+            line_time = last_time
+        else:
+            last_time = line_time
+        if line_time is None or start <= line_time <= end:
+            yield line
+        elif line_time > end:
+            return
+
+
+def parse_time(text, now=None):
+    """解析命令行中的时刻，只有时间部分时使用当天日期"""
+    for fmt in _TIME_FORMATS:
+        try:
+            parsed = time.strptime(text, fmt)
+        except ValueError:
+            continue
+        if fmt.startswith("%H"):
+            today = time.localtime(now)
+            parsed = time.struct_time((today.tm_year, today.tm_mon, today.tm_mday,
+                                       parsed.tm_hour, parsed.tm_min, parsed.tm_sec, 0, 0, -1))
+        return time.mktime(parsed)
+    raise ValueError(f"无法识别的时间: {text}")
+
+
+def main(argv=None):
+    """命令行入口: python log_time_index.py task_1.log "02:10" "02:15" """
+    from log_records import render_line
+
+    parser = argparse.ArgumentParser(description="按时间范围查询任务日志（包括历史分段）")
+    parser.add_argument("log_file", help="任务日志文件，例如 task_task1.log")
+    parser.add_argument("start", help="开始时间，例如 \"2024-01-01 02:10\" 或 \"02:10\"")
+    parser.add_argument("end", help="结束时间，格式同上")
+    args = parser.parse_args(argv)
+    try:
+        start, end = parse_time(args.start), parse_time(args.end)
+    except ValueError as e:
+        parser.error(str(e))
+    for line in query_time_range(args.log_file, start, end):
+        sys.stdout.write(render_line(line) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
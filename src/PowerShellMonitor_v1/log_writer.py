@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+
+from log_rotation import rotate_file
+
+
+DEFAULT_FLUSH_INTERVAL = 1.0  # 秒
+DEFAULT_BUFFER_SIZE = 64 * 1024  # 字节
+
+# 毫秒部分的预生成后缀，避免逐行格式化数字
+_MILLISECOND_SUFFIXES = tuple(f".{ms:03d}] " for ms in range(1000))
+
+
+class TimestampFormatter:
+    """日志时间戳前缀格式化器
+
+    墙上时间模式下按秒缓存格式化结果，同一秒内的行只需拼接字符串；
+    monotonic 模式输出相对于创建时刻的偏移（不受系统时间调整影响）。
+    """
+
+    def __init__(self, milliseconds=False, monotonic=False):
+        self.milliseconds = milliseconds
+        self.monotonic = monotonic
+        self._start = time.monotonic()
+        self._cache = (None, "", "")  # (秒, "[YYYY-mm-dd HH:MM:SS", "[YYYY-mm-dd HH:MM:SS] ")
+
+    def prefix(self, now=None):
+        """返回时间戳前缀，now 为这一行的时刻（Unix 时间），默认为当前时刻"""
+        if self.monotonic:
+            elapsed = time.monotonic() - self._start
+            if now is not None:
+                # 减去这一行读取之后经过的时间
+                elapsed -= max(0.0, time.time() - now)
+            if self.milliseconds:
+                return f"[+{elapsed:.3f}s] "
+            return f"[+{int(elapsed)}s] "
+
+        now = time.time() if now is None else now
+        second = int(now)
+        cache = self._cache
+        if cache[0] != second:
+            stamp = "[" + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+            cache = (second, stamp, stamp + "] ")
+            self._cache = cache
+        if self.milliseconds:
+            return cache[1] + _MILLISECOND_SUFFIXES[int((now - second) * 1000)]
+        return cache[2]
+
+    def format(self, text, now=None):
+        """返回加上时间戳前缀的一行"""
+        return self.prefix(now) + text
+
+
+class LogWriter:
+    """带缓冲的日志写入器
+
+    保持日志文件打开，将多行内容合并到缓冲区中，
+    在缓冲区超过大小阈值或距离上次刷新超过时间间隔时一次性写入（组提交）。
+    指定轮转策略时，在两次组提交之间轮转日志文件，轮转出的分段交给后台压缩线程处理。
+    指定搜索索引线程时，每次组提交后通知它为新增内容建立索引；
+    指定时间索引时，组提交前记录这批内容的起始偏移与最早时刻。
+    """
+
+    def __init__(self, log_file, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 buffer_size=DEFAULT_BUFFER_SIZE, rotation=None, compressor=None,
+                 search_indexer=None, time_index=None):
+        self.log_file = log_file
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.rotation = rotation
+        self.compressor = compressor
+        self.search_indexer = search_indexer
+        self.time_index = time_index
+        self._file = None
+        self._file_day = None  # 当前日志文件开始写入的日期
+        self._buffer = []
+        self._buffered_bytes = 0  # 缓冲区内容按 utf-8 编码后的字节数
+        self._buffer_time = None  # 缓冲区中最早一行的时刻（与行首时间戳一致，供时间索引使用）
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def write(self, text, now=None):
+        """写入一段文本（先进入缓冲区），now 为这段文本中最早一行的时刻（Unix 时间），默认为当前时刻"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self._buffer or now < self._buffer_time:
+                self._buffer_time = now
+            self._buffer.append(text)
+            # str.isascii 不需要扫描内容，纯 ASCII 文本的字符数即字节数
+            self._buffered_bytes += len(text) if text.isascii() else len(text.encode("utf-8"))
+            if self._buffered_bytes >= self.buffer_size:
+                self._flush_locked()
+
+    def flush_if_due(self, now=None):
+        """如果距离上次刷新已超过时间间隔，则刷新缓冲区"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._buffer and now - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self):
+        """立即刷新缓冲区"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """刷新缓冲区并关闭文件"""
+        with self._lock:
+            try:
+                self._flush_locked()
+            finally:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        incoming = self._buffered_bytes
+        self._buffer = []
+        self._buffered_bytes = 0
+        if self.rotation is not None and self.rotation.enabled:
+            self._rotate_if_needed_locked(incoming)
+        if self._file is None:
+            self._file = open(self.log_file, "a", encoding="utf-8")
+        if self.time_index is not None:
+            self.time_index.record(os.fstat(self._file.fileno()).st_size, self._buffer_time)
+        self._file.write(data)
+        self._file.flush()
+        if self.search_indexer is not None:
+            self.search_indexer.submit(self.log_file)
+
+    def _rotate_if_needed_locked(self, incoming):
+        """写入前检查是否需要轮转（在锁内调用，保证轮转前后不丢行、不重复）"""
+        today = time.strftime("%Y%m%d")
+        try:
+            if self._file is not None:
+                stat = os.fstat(self._file.fileno())
+            else:
+                stat = os.stat(self.log_file)
+        except FileNotFoundError:
+            self._file_day = today
+            return
+        if self._file_day is None:
+            self._file_day = time.strftime("%Y%m%d", time.localtime(stat.st_mtime))
+        if not self.rotation.should_rotate(stat.st_size, incoming, self._file_day, today):
+            return
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            segment = rotate_file(self.log_file)
+        except OSError:
+            # 文件被其他程序占用等情况，下次写入时再尝试
+            return
+        self._file_day = today
+        if self.time_index is not None:
+            self.time_index.rotated(segment)
+        if self.compressor is not None:
+            self.compressor.submit(segment, self.log_file, self.rotation)
+
+
+class LogFlusher:
+    """后台刷新线程，定期对所有已注册的写入器执行按时刷新
+
+    任何实现了 flush_if_due(now) 和 flush() 的缓冲对象都可以注册。
+    """
+
+    def __init__(self, interval=0.2, on_error=None):
+        self.interval = interval
+        self.on_error = on_error
+        self._writers = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def register(self, writer):
+        """注册写入器"""
+        with self._lock:
+            self._writers.add(writer)
+        self._ensure_started()
+
+    def unregister(self, writer):
+        """取消注册写入器"""
+        with self._lock:
+            self._writers.discard(writer)
+
+    def flush_all(self):
+        """立即刷新所有写入器"""
+        with self._lock:
+            writers = list(self._writers)
+        for writer in writers:
+            self._safe_call(writer, writer.flush)
+
+    def stop(self):
+        """停止后台线程并刷新所有写入器"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.flush_all()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                writers = list(self._writers)
+            for writer in writers:
+                self._safe_call(writer, writer.flush_if_due, now)
+
+    def _safe_call(self, writer, func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(writer, e)
@@ -16,6 +16,9 @@ def main():
     # 创建多任务系统托盘应用
     tray_app = MultiSystemTrayApp()
 
+    # 无论以何种方式退出，都保证日志全部落盘
+    app.aboutToQuit.connect(tray_app.process_manager.shutdown)
+
     # 运行应用程序
     sys.exit(app.exec())
 
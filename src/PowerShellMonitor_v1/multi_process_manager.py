@@ -1,20 +1,170 @@
-import subprocess
+import os
 import threading
-from datetime import datetime
-from PySide6.QtCore import QObject, Signal
+import time
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from config import DEFAULT_SETTINGS
+from log_writer import LogWriter, LogFlusher, TimestampFormatter
+from log_rotation import RotationPolicy, LogCompressor
+from log_search import LogSearchIndexer
+from log_records import RecordFormatter, new_run_id
+from log_time_index import TimeIndexWriter, query_time_range
+from output_batcher import OutputBatcher
+from output_decoder import OutputDecoder, normalize_encoding
+from interpreter_pool import InterpreterPool
+from io_engine import SelectorIOEngine, selector_supported
+from line_assembler import LineAssembler
+from output_pipeline import OutputPipeline
+from output_gate import OutputGate
+from periodic_scheduler import PeriodicScheduler, RESTART
+from process_backend import create_process_backend
+from process_limits import TaskLimits
+from process_reaper import ProcessReaper
+from resource_sampler import ResourceSampler, sampler_supported
+from process_shutdown import ShutdownCoordinator, POLL_INTERVAL
+from shared_log_store import SharedLogStore, SharedLogWriter, SharedTaskLog
+from startup_scheduler import StartupScheduler, READY
+from task_runner import prepare_launch
+from task_supervisor import RestartPolicy, TaskSupervisor
+from utils import get_app_dir
 
 
 class MultiProcessManager(QObject):
     """多任务进程管理器"""
 
-    update_signal = Signal(str, str)  # (task_id, message)
+    update_signal = Signal(str, list)  # (task_id, [lines])
     status_changed = Signal(str, bool)  # (task_id, is_running)
+    task_alert = Signal(str, str)  # (task_id, message)，需要提醒用户的事件（如崩溃循环）
+    process_exited = Signal(str, object, object)  # (task_id, process, ExitInfo)，由回收线程发出，在主线程处理
+    task_output = Signal(str, list)  # (task_id, [lines])，只含任务进程的输出，由刷新线程发出，用于判断启动就绪
 
-    def __init__(self):
+    def __init__(self, settings=None):
         super().__init__()
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
         self.tasks = {}  # 存储所有任务信息
         self.processes = {}  # 存储进程对象
         self.output_threads = {}  # 存储输出线程
+        self.log_writers = {}  # 存储日志写入器
+        self.output_gates = {}  # 存储输出闸门（限速、缓冲与丢弃计数）
+        # 输出按批次发送到界面，由后台刷新线程按时发送
+        self.output_batcher = OutputBatcher(self.update_signal.emit,
+                                            interval=self.settings['output_batch_interval'],
+                                            max_lines=self.settings['output_batch_lines'])
+        self.log_flusher = LogFlusher(interval=self.settings['output_batch_interval'],
+                                      on_error=self._on_flush_error)
+        self.log_flusher.register(self.output_batcher)
+        self.log_compressor = LogCompressor(on_error=self._on_compress_error)
+        self.search_indexer = LogSearchIndexer(on_error=self._on_index_error)
+        self.log_store = self._create_log_store()  # 共享日志存储（按任务分文件时为 None）
+        self.io_engines = self._create_io_engines()  # selector 模式下共享的读取引擎
+        self.process_backend = self._create_process_backend()  # 启动与终止进程的平台后端
+        self.interpreter_pool = self._create_interpreter_pool()  # 预热的解释器进程（未启用时为 None）
+        self.supervisor = TaskSupervisor()  # 任务意外退出后的自动重启
+        self.process_exited.connect(self._on_process_exited)
+        # 所有任务进程由一个回收线程等待退出
+        self.reaper = ProcessReaper(self._on_reaped, on_error=self._on_reaper_error,
+                                    before_reap=self._before_reap)
+        self.resource_sampler = self._create_resource_sampler()  # 任务资源采样（不可用时为 None）
+        self.startup = None  # 正在进行的启动调度（StartupScheduler）
+        self.startup_timer = QTimer(self)
+        self.startup_timer.setInterval(100)
+        self.startup_timer.timeout.connect(self._run_startup)
+        self.task_output.connect(self._on_startup_output)
+        self.periodic = PeriodicScheduler()  # 按计划定时运行的任务，由一个时间轮驱动
+        self.periodic_timer = QTimer(self)
+        self.periodic_timer.setInterval(int(self.periodic.tick * 1000))
+        self.periodic_timer.timeout.connect(self._run_periodic)
+        self.stopping = {}  # 正在停止（等待正常退出）的任务进程
+        self._shut_down = False  # shutdown() 已执行
+        self._release_on_exit = set()  # 退出后（回收前）需要清理进程组的任务进程，由回收线程取出
+        self.stop_coordinator = None  # 正在进行的停止所有任务（ShutdownCoordinator）
+        self._stop_results = {}
+        self._stop_callbacks = []
+        self.stop_timer = QTimer(self)
+        self.stop_timer.setInterval(50)
+        self.stop_timer.timeout.connect(self._poll_stopping)
+
+    def _create_process_backend(self):
+        """按设置创建进程后端，设置无效时按当前平台选择"""
+        cgroup_root = self.settings['cgroup_root']
+        move_self = self.settings['cgroup_move_self']
+        try:
+            return create_process_backend(self.settings['process_backend'], cgroup_root, move_self)
+        except ValueError as e:
+            print(f"{e}，改为按当前平台选择")
+            return create_process_backend(cgroup_root=cgroup_root, cgroup_move_self=move_self)
+
+    def _create_interpreter_pool(self):
+        """按设置创建预热解释器池（添加任务时预热其使用的解释器），未启用时返回 None"""
+        size = int(self.settings['interpreter_pool_size'])
+        if size <= 0:
+            return None
+        pool = InterpreterPool(self.process_backend, size=size,
+                               max_idle=self.settings['interpreter_pool_max_idle'],
+                               on_error=self._on_pool_error)
+        self.pool_timer = QTimer(self)
+        self.pool_timer.setInterval(1000)
+        self.pool_timer.timeout.connect(pool.maintain)
+        self.pool_timer.start()
+        return pool
+
+    def _on_pool_error(self, error):
+        """预热解释器出错"""
+        self._emit_message("system", f"预热解释器时出错: {error}")
+
+    def _create_io_engines(self):
+        """按设置创建 selector 读取引擎，使用每任务一个线程时返回空列表"""
+        engine = self.settings['io_engine']
+        if engine == 'thread':
+            return []
+        if not selector_supported():
+            if engine == 'selector':
+                print("当前平台不支持 selector 读取方式，改为每任务一个线程")
+            return []
+        count = max(1, int(self.settings['io_engine_threads']))
+        return [SelectorIOEngine(on_error=self._on_io_error,
+                                 chunk_size=self.settings['read_chunk_size'])
+                for _ in range(count)]
+
+    def _create_log_store(self):
+        """按设置创建所有任务共用的日志存储，每个任务使用独立日志文件时返回 None"""
+        if self.settings['log_storage'] != 'shared':
+            return None
+        directory = self.settings['shared_log_dir'] or os.path.join(get_app_dir(), "shared_log")
+        store = SharedLogStore(directory,
+                               segment_bytes=int(self.settings['shared_log_segment_mb'] * 1024 * 1024),
+                               keep_segments=int(self.settings['shared_log_keep_segments']),
+                               flush_interval=self.settings['log_flush_interval'],
+                               on_error=self._on_log_store_error)
+        self.log_flusher.register(store)
+        return store
+
+    def _on_log_store_error(self, error):
+        """共享日志的任务列表损坏"""
+        self._emit_message("system", f"读取共享日志任务列表时出错: {error}，已有的任务日志无法显示")
+
+    def _create_resource_sampler(self):
+        """按设置创建资源采样器，未启用或当前平台不支持时返回 None"""
+        interval = self.settings['resource_sample_interval']
+        if interval <= 0 or not sampler_supported():
+            return None
+        return ResourceSampler(interval=interval,
+                               history_size=int(self.settings['resource_history_size']),
+                               on_error=self._on_sampler_error)
+
+    def _on_sampler_error(self, error):
+        """采样资源出错"""
+        self._emit_message("system", f"采样任务资源时出错: {error}")
+
+    def _on_reaper_error(self, error):
+        """回收进程出错"""
+        self._emit_message("system", f"等待进程退出时出错: {error}")
+
+    def _on_io_error(self, error):
+        """读取引擎出错"""
+        self._emit_message("system", f"读取输出时出错: {error}")
 
     def add_task(self, task_id, task_config, log_file):
         """添加任务"""
@@ -23,125 +173,641 @@ class MultiProcessManager(QObject):
             'log_file': log_file,
             'is_running': False
         }
+        self._prepare_launch(task_id)
+
+        # 日志文件变化时关闭旧的写入器，否则应用新的轮转设置
+        writer = self.log_writers.get(task_id)
+        if writer and writer.log_file != log_file:
+            self._close_log_writer(task_id, release=True)
+        elif writer:
+            writer.rotation = self._rotation_policy(task_config)
+            writer.search_indexer = self.get_search_indexer()
+        self._update_schedule(task_id)
+
+    def _prepare_launch(self, task_id):
+        """按任务配置准备启动方式（解释器、参数与 PATH 查找只在添加任务时进行一次），需要时预热解释器"""
+        task = self.tasks[task_id]
+        try:
+            task['launch'] = prepare_launch(task['config'], self.process_backend.powershell)
+        except (ValueError, TypeError) as e:
+            task['launch'] = None
+            task['launch_error'] = f"启动方式无效: {e}"
+            self._emit_message(task_id, task['launch_error'])
+            return
+        launch = task['launch']
+        if (self.interpreter_pool is not None and launch.script is not None
+                and task['config'].get('warm_start', True)):
+            self.interpreter_pool.prewarm(launch.interpreter)
+
+    def _update_schedule(self, task_id):
+        """按任务配置设置运行计划，只有启用的任务按计划运行"""
+        config = self.tasks[task_id]['config']
+        try:
+            if config.get('enabled', False):
+                self.periodic.set_schedule(task_id, config)
+            else:
+                self.periodic.remove(task_id)
+        except (ValueError, TypeError) as e:
+            self.periodic.remove(task_id)
+            self._emit_message(task_id, f"运行计划无效: {e}，不按计划运行")
+        self._report_periodic_events()
+        if self.periodic.jobs:
+            self.periodic_timer.start()
+        else:
+            self.periodic_timer.stop()
+
+    def is_scheduled(self, task_id):
+        """任务是否按计划定时运行（而不是常驻运行）"""
+        return task_id in self.periodic.jobs
+
+    def _rotation_policy(self, task_config):
+        """按任务配置（缺省时使用全局设置）生成日志轮转策略"""
+        def option(key):
+            return task_config.get(key, self.settings[key])
+
+        return RotationPolicy(max_bytes=int(float(option('log_max_size_mb')) * 1024 * 1024),
+                              daily=bool(option('log_rotate_daily')),
+                              keep=int(option('log_keep')),
+                              compress=bool(option('log_compress')))
+
+    def _on_compress_error(self, error):
+        """后台压缩日志出错"""
+        self._emit_message("system", f"压缩历史日志时出错: {error}")
+
+    def get_search_indexer(self):
+        """按设置返回搜索索引线程（未启用或使用共享日志时为 None）"""
+        if self.log_store is not None or not self.settings['log_search_index']:
+            return None
+        return self.search_indexer
+
+    def get_task_log_storage(self, task_id):
+        """任务日志保存在共享日志中时返回该任务的日志（SharedTaskLog），否则返回 None"""
+        if self.log_store is None:
+            return None
+        return SharedTaskLog(self.log_store, task_id)
+
+    def _time_index(self, log_file):
+        """按设置创建日志的时间索引（未启用时为 None）"""
+        interval = int(self.settings['log_time_index_kb'] * 1024)
+        return TimeIndexWriter(log_file, interval) if interval > 0 else None
 
-    def start_task(self, task_id):
-        """启动指定任务"""
+    def _on_index_error(self, error):
+        """后台建立搜索索引出错"""
+        self._emit_message("system", f"建立日志搜索索引时出错: {error}")
+
+    def _get_log_writer(self, task_id, log_file):
+        """获取（必要时创建）任务的日志写入器"""
+        writer = self.log_writers.get(task_id)
+        if writer is None:
+            writer = self._create_log_writer(task_id, log_file)
+            self.log_writers[task_id] = writer
+            self.log_flusher.register(writer)
+        return writer
+
+    def _create_log_writer(self, task_id, log_file):
+        """按日志存储方式创建写入器：共享日志，或带轮转与索引的独立日志文件"""
+        if self.log_store is not None:
+            return SharedLogWriter(self.log_store, task_id, log_file,
+                                   flush_interval=self.settings['log_flush_interval'],
+                                   buffer_size=self.settings['log_buffer_size'])
+        return LogWriter(log_file,
+                         flush_interval=self.settings['log_flush_interval'],
+                         buffer_size=self.settings['log_buffer_size'],
+                         rotation=self._rotation_policy(self.tasks[task_id]['config']),
+                         compressor=self.log_compressor,
+                         search_indexer=self.get_search_indexer(),
+                         time_index=self._time_index(log_file))
+
+    def _close_log_writer(self, task_id, release=False):
+        """刷新并关闭任务的日志文件
+
+        默认保留写入器，进程退出前残留的输出仍会被缓冲并由后台线程写入；
+        release 为 True 时同时释放写入器。
+        """
+        if release:
+            writer = self.log_writers.pop(task_id, None)
+        else:
+            writer = self.log_writers.get(task_id)
+        if writer is None:
+            return
+        if release:
+            self.log_flusher.unregister(writer)
+        try:
+            writer.close()
+        except Exception as e:
+            self._emit_message("system", f"写入日志文件时出错: {e}")
+
+    def _get_output_gate(self, task_id, writer, formatter):
+        """获取（必要时创建）任务的输出闸门，并按当前配置更新限速与输出目标"""
+        config = self.tasks[task_id]['config']
+        gate = self.output_gates.get(task_id)
+        if gate is None:
+            gate = OutputGate(None, ring_size=self.settings['output_ring_size'])
+            self.output_gates[task_id] = gate
+            self.log_flusher.register(gate)
+        gate.set_limits(config.get('max_lines_per_sec', 0), config.get('max_bytes_per_sec', 0))
+
+        def sink(entries):
+            # 按读取时刻写入日志文件，并加入待发送批次
+            for text, timestamp in entries:
+                self._write_log(writer, text, formatter, timestamp)
+            texts = [text for text, _ in entries]
+            self.output_batcher.extend(task_id, texts)
+            startup = self.startup
+            if startup is not None and task_id in startup.entries:
+                self.task_output.emit(task_id, texts)
+
+        gate.sink = sink
+        return gate
+
+    def _flush_output_gate(self, task_id, release=False):
+        """取出任务闸门中缓冲的全部输出"""
+        gate = self.output_gates.pop(task_id, None) if release else self.output_gates.get(task_id)
+        if gate is None:
+            return
+        if release:
+            self.log_flusher.unregister(gate)
+        try:
+            gate.flush()
+        except Exception as e:
+            self._emit_message("system", f"写入日志文件时出错: {e}")
+
+    def get_task_stats(self, task_id):
+        """获取任务的输出统计"""
+        stats = self.supervisor.get_stats(task_id)
+        stats['last_exit'] = self.tasks.get(task_id, {}).get('last_exit')
+        stats['resources'] = self.get_task_resources(task_id)
+        stats['limits'] = self.process_backend.limit_status(task_id)
+        entry = self.startup.entries.get(task_id) if self.startup else None
+        stats['startup'] = entry.state if entry else None
+        stats['schedule'] = self.periodic.get_stats(task_id)
+        gate = self.output_gates.get(task_id)
+        if gate is None:
+            stats.update({'dropped_lines': 0, 'rate_dropped': 0, 'overflow_dropped': 0})
+            return stats
+        stats.update({
+            'dropped_lines': gate.dropped,
+            'rate_dropped': gate.rate_dropped,
+            'overflow_dropped': gate.overflow_dropped
+        })
+        return stats
+
+    def get_task_resources(self, task_id):
+        """任务（包括其所有子进程）最近一次的资源采样
+
+        返回 {'time', 'cpu', 'rss', 'threads', 'processes', 'read_bytes', 'write_bytes',
+        'read_rate', 'write_rate'}，cpu 为百分比（可超过 100），rss 与读写量单位为字节；
+        没有采样或采样不可用时返回 None。
+        """
+        if self.resource_sampler is None:
+            return None
+        return self.resource_sampler.latest(task_id)
+
+    def get_task_resource_history(self, task_id, count=None):
+        """任务最近 count 次（默认全部）资源采样，返回 {指标: [从旧到新的值]}，不可用时返回 None"""
+        if self.resource_sampler is None:
+            return None
+        return self.resource_sampler.history(task_id, count)
+
+    def flush_task_log(self, task_id):
+        """立即将任务缓冲中的日志写入文件（查看日志前调用）"""
+        self._flush_output_gate(task_id)
+        writer = self.log_writers.get(task_id)
+        try:
+            if writer is not None:
+                writer.flush()
+            if self.log_store is not None:
+                self.log_store.flush()
+        except Exception as e:
+            self._emit_message("system", f"写入日志文件时出错: {e}")
+
+    def query_task_log(self, task_id, start, end):
+        """按时间范围（Unix 时间）读取任务日志，包括轮转出的历史分段，逐行生成文本"""
+        if task_id not in self.tasks:
+            return iter(())
+        self.flush_task_log(task_id)
+        if self.log_store is not None:
+            return SharedTaskLog(self.log_store, task_id).query(start, end)
+        return query_time_range(self.tasks[task_id]['log_file'], start, end)
+
+    def _emit_message(self, task_id, message):
+        """发送一条消息（与任务输出一起按批次发送，保持先后顺序）"""
+        self.output_batcher.add(task_id, message)
+
+    def _on_flush_error(self, writer, error):
+        """后台刷新出错"""
+        self._emit_message("system", f"写入日志文件时出错: {error}")
+
+    def start_tasks(self, task_ids):
+        """按启动调度启动多个任务：限制同时启动的数量，按优先级与依赖关系依次启动
+
+        取消之前尚未完成的调度中还没有启动的任务。
+        """
+        if self.startup is not None:
+            self.startup.cancel()
+            self._report_startup_events()
+        tasks = {task_id: self.tasks[task_id]['config'] for task_id in task_ids
+                 if task_id in self.tasks and task_id not in self.processes}
+        self.startup = StartupScheduler(tasks, running=self.processes.keys(),
+                                        max_concurrent=self.settings['startup_max_concurrent'],
+                                        settle_time=self.settings['startup_settle_time'])
+        self._run_startup()
+        if self.startup is not None:
+            self.startup_timer.start()
+
+    def _run_startup(self):
+        """启动调度到期的任务（主线程，由定时器驱动）"""
+        scheduler = self.startup
+        if scheduler is None:
+            self.startup_timer.stop()
+            return
+        for task_id in scheduler.poll():
+            scheduler.on_started(task_id, self.start_task(task_id))
+        self._report_startup_events()
+        if scheduler.finished:
+            self.startup_timer.stop()
+            self.startup = None
+
+    def _report_startup_events(self):
+        """把启动调度的状态变化写入任务输出"""
+        for task_id, state, reason in self.startup.take_events():
+            if state == READY:
+                self._emit_message(task_id, f"启动调度: {reason}")
+            else:
+                self._emit_message(task_id, f"启动调度: 未启动或未能就绪，{reason}")
+
+    def _on_startup_output(self, task_id, lines):
+        """任务进程的输出（主线程），用于判断启动中的任务是否就绪"""
+        if self.startup is not None:
+            self.startup.on_output(task_id, lines)
+
+    def _run_periodic(self):
+        """启动按计划到期的任务（主线程，由定时器驱动）"""
+        for task_id, action in self.periodic.poll(lambda task_id: task_id in self.processes):
+            self._report_periodic_events()
+            if action == RESTART:
+                self.stop_task(task_id, cancel_schedule=False)
+            self._emit_message(task_id, "按计划运行")
+            self.start_task(task_id)
+        self._report_periodic_events()
+
+    def _report_periodic_events(self):
+        """把运行计划的事件写入任务输出"""
+        for task_id, message in self.periodic.take_events():
+            self._emit_message(task_id, f"运行计划: {message}")
+
+    def start_task(self, task_id, restart=False):
+        """启动指定任务，restart 为 True 表示由监督器自动重启"""
         if task_id not in self.tasks:
             return False
+        if not restart:
+            self.supervisor.reset(task_id)
 
         task = self.tasks[task_id]
-        ps_command = task['config']['ps_command']
-        time_stamp = task['config']['time_stamp']
+        if task['launch'] is None:
+            self._emit_message(task_id, f"启动任务 {task_id} 失败: {task['launch_error']}")
+            return False
+        if task_id in self.stopping:
+            self._emit_message(task_id, f"任务 {task_id} 正在停止，停止完成后才能再次启动")
+            return False
+        encoding = task['config'].get('encoding')
         log_file = task['log_file']
 
+        if encoding and not normalize_encoding(encoding):
+            self._emit_message(task_id, f"无效的输出编码 {encoding}，改为自动检测")
+
+        limits = self._task_limits(task_id)
+        unsupported = self.process_backend.unsupported_limits(limits)
+        if unsupported:
+            self._emit_message(task_id, f"以下资源限制在当前环境中无法生效: {', '.join(unsupported)}")
+
         try:
-            # 检查是否是 PowerShell 命令还是可执行文件
-            if ps_command.lower().endswith('.exe'):
-                command_parts = ps_command.split()
-                executable = command_parts[0]
-                args = command_parts[1:] if len(command_parts) > 1 else []
-
-                process = subprocess.Popen(
-                    [executable] + args,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-            else:
-                process = subprocess.Popen(
-                    ["powershell", "-Command", ps_command],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
+            process = self._spawn_task(task_id, task['launch'], limits)
+            task['limit_status'] = self.process_backend.limit_status(task_id)
 
             self.processes[task_id] = process
             task['is_running'] = True
+            self.reaper.register(process, task_id)
+            if self.resource_sampler is not None:
+                self.resource_sampler.register(task_id, process.pid)
             self.status_changed.emit(task_id, True)
 
-            # 启动线程来读取输出
-            output_thread = threading.Thread(
-                target=self._read_output,
-                args=(task_id, process, log_file, time_stamp)
-            )
-            output_thread.daemon = True
-            output_thread.start()
-            self.output_threads[task_id] = output_thread
+            writer = self._get_log_writer(task_id, log_file)
+            task['run_id'] = new_run_id()
+            formatter = self._create_line_formatter(task_id, task['config'], task['run_id'])
+            gate = self._get_output_gate(task_id, writer, formatter)
+            pipeline = self._create_pipeline(gate, encoding)
+
+            if self.io_engines:
+                # 交给负载最小的共享读取引擎
+                engine = min(self.io_engines, key=lambda e: e.stream_count)
+                engine.register(process.stdout, pipeline.feed,
+                                lambda: self._finish_output(pipeline))
+            else:
+                # 启动线程来读取输出
+                output_thread = threading.Thread(
+                    target=self._read_output,
+                    args=(task_id, process, pipeline)
+                )
+                output_thread.daemon = True
+                output_thread.start()
+                self.output_threads[task_id] = output_thread
 
             return True
 
         except Exception as e:
             error_msg = f"启动任务 {task_id} 失败: {str(e)}"
-            self.update_signal.emit(task_id, error_msg)
+            self._emit_message(task_id, error_msg)
             return False
 
-    def _read_output(self, task_id, process, log_file, time_stamp):
-        """读取进程输出"""
+    def _spawn_task(self, task_id, launch, limits):
+        """按准备好的启动方式（LaunchSpec）启动任务进程，命令交给解释器执行且有预热的解释器进程时优先使用
+
+        设置了资源限制的任务需要在进程启动时应用限制，总是启动新进程；任务配置 warm_start 为 false 时也不使用预热进程。
+        """
+        config = self.tasks[task_id]['config']
+        if (self.interpreter_pool is not None and launch.script is not None and not limits
+                and config.get('warm_start', True)):
+            process = self.interpreter_pool.acquire(launch.interpreter, launch.script)
+            # 任务启动后再补充预热进程
+            QTimer.singleShot(0, self, self.interpreter_pool.maintain)
+            if process is not None:
+                return process
+        return self.process_backend.spawn(launch.args, limits=limits, name=task_id)
+
+    def _task_limits(self, task_id):
+        """任务配置的资源限制，配置无效时不限制"""
+        try:
+            return TaskLimits.from_config(self.tasks[task_id]['config'])
+        except (ValueError, TypeError) as e:
+            self._emit_message(task_id, f"资源限制无效: {e}，不限制资源")
+            return TaskLimits()
+
+    def _create_pipeline(self, gate, encoding):
+        """创建任务本次运行的输出处理流程，处理后的行交给输出闸门"""
+        assembler = LineAssembler(max_line_length=self.settings['max_line_length'],
+                                  partial_timeout=self.settings['partial_line_timeout'])
+        pipeline = OutputPipeline(assembler, OutputDecoder(encoding), gate.put)
+        # 由后台刷新线程输出等待超时的不完整行
+        self.log_flusher.register(pipeline)
+        return pipeline
+
+    def _read_output(self, task_id, process, pipeline):
+        """按块读取进程输出"""
+        chunk_size = self.settings['read_chunk_size']
+        failed = False
         while process and process.stdout:
             try:
-                raw_line = process.stdout.readline()
-                if not raw_line:
+                data = process.stdout.read1(chunk_size)
+                if not data:
                     break
+            except Exception as e:
+                error_msg = f"读取任务 {task_id} 输出时出错: {str(e)}"
+                self._emit_message(task_id, error_msg)
+                break
 
-                # 尝试多种编码方式解码
-                decoded_line = None
-                encodings = ['utf-8', 'gbk', 'latin-1', 'cp1252']
+            try:
+                pipeline.feed(data)
+            except Exception as e:
+                # 出错的这块输出被丢弃，继续读取，否则管道写满后任务进程会被阻塞（只提示一次）
+                if not failed:
+                    failed = True
+                    self._emit_message(task_id, f"处理任务 {task_id} 输出时出错: {e}")
 
-                for encoding in encodings:
-                    try:
-                        decoded_line = raw_line.decode(encoding)
-                        break
-                    except UnicodeDecodeError:
-                        continue
+        self._finish_output(pipeline)
 
-                if decoded_line is None:
-                    decoded_line = raw_line.decode('utf-8', errors='replace')
+    def _finish_output(self, pipeline):
+        """输出结束，写出剩余的内容"""
+        self.log_flusher.unregister(pipeline)
+        pipeline.close()
 
-                # 写入日志文件
-                self._write_log(log_file, decoded_line, time_stamp)
+    def _before_reap(self, process, task_id):
+        """进程已退出、尚未回收（回收线程）：由停止所有任务停止的进程清理进程组中残留的子进程"""
+        if process in self._release_on_exit:
+            self._release_on_exit.discard(process)
+            self.process_backend.release(process)
 
-                # 发送更新信号
-                self.update_signal.emit(task_id, decoded_line)
+    def _on_reaped(self, process, task_id, info):
+        """进程已被回收（回收线程），交给主线程处理"""
+        self.process_exited.emit(task_id, process, info)
 
-            except Exception as e:
-                error_msg = f"读取任务 {task_id} 输出时出错: {str(e)}"
-                self.update_signal.emit(task_id, error_msg)
-                break
+    def _on_process_exited(self, task_id, process, info):
+        """任务进程退出（主线程）：记录退出信息，不是由用户停止时更新状态并按重启策略处理"""
+        current = self.processes.get(task_id)
+        if task_id not in self.tasks or (current is not None and current is not process):
+            # 任务已移除或已重新启动
+            return
+        self.tasks[task_id]['last_exit'] = info
+        if self.startup is not None:
+            self.startup.on_exit(task_id)
+        if self.resource_sampler is not None:
+            self.resource_sampler.unregister(task_id)
+        if current is None:
+            # 由用户停止，状态已经更新
+            return
+        del self.processes[task_id]
+        self._emit_message(task_id, f"进程已退出: {info.describe()}")
+        self._report_oom(task_id)
+        self._finish_stop(task_id)
+
+        if self.periodic.on_exit(task_id):
+            self._emit_message(task_id, "运行排队中的计划运行")
+            self.start_task(task_id)
+            return
+
+        self._schedule_restart(task_id, process.returncode)
+
+    def _schedule_restart(self, task_id, returncode):
+        """任务意外退出（returncode 为 None 表示自动重启时未能启动），按重启策略安排重启或报告崩溃循环"""
+        policy = self._restart_policy(task_id)
+        decision = self.supervisor.on_exit(task_id, policy, returncode)
+        if decision is not None:
+            delay, token = decision
+            self._emit_message(task_id, f"将在 {delay:.1f} 秒后自动重启")
+            QTimer.singleShot(int(delay * 1000), self, lambda: self._restart_task(task_id, token))
+        elif self.supervisor.get_stats(task_id)['crash_loop']:
+            message = (f"{policy.window:.0f} 秒内已自动重启 {policy.max_count} 次，"
+                       f"判断为崩溃循环，停止自动重启")
+            self._emit_message(task_id, message)
+            self.task_alert.emit(task_id, message)
+
+    def _report_oom(self, task_id):
+        """任务运行期间发生过 OOM 终止时发出提醒"""
+        before = self.tasks[task_id].get('limit_status')
+        after = self.process_backend.limit_status(task_id)
+        if not before or not after:
+            return
+        kills = after['oom_kills'] - before['oom_kills']
+        if kills > 0:
+            message = f"任务中有 {kills} 个进程因超出内存上限被终止（OOM）"
+            self._emit_message(task_id, message)
+            self.task_alert.emit(task_id, message)
+
+    def _restart_policy(self, task_id):
+        """任务的重启策略，配置无效时不重启"""
+        try:
+            return RestartPolicy.from_config(self.tasks[task_id]['config'], self.settings)
+        except (ValueError, TypeError) as e:
+            self._emit_message(task_id, f"重启策略无效: {e}，不自动重启")
+            return RestartPolicy()
+
+    def _restart_task(self, task_id, token):
+        """到达重启时刻（主线程）"""
+        if task_id not in self.tasks or task_id in self.processes:
+            self.supervisor.cancel(task_id)
+            return
+        if self.supervisor.begin_restart(task_id, token):
+            count = self.supervisor.get_stats(task_id)['restarts']
+            self._emit_message(task_id, f"自动重启（第 {count} 次）")
+            if not self.start_task(task_id, restart=True):
+                # 启动失败与启动后立即退出一样处理，继续退避并计入崩溃循环判断
+                self._schedule_restart(task_id, None)
+
+    def _create_line_formatter(self, task_id, config, run_id):
+        """按任务配置创建日志行格式化器（结构化记录或时间戳前缀），不需要格式化时返回 None"""
+        if config.get('log_format', self.settings['log_format']) == 'jsonl':
+            return RecordFormatter(task_id, run_id)
+        if not config['time_stamp']:
+            return None
+        return TimestampFormatter(milliseconds=config.get('time_stamp_precision') == 'ms',
+                                  monotonic=config.get('time_stamp_mode') == 'monotonic')
 
-    def _write_log(self, log_file, text, time_stamp):
-        """写入日志文件"""
+    def _write_log(self, writer, text, formatter, now=None):
+        """写入日志文件（经由缓冲写入器），formatter 为 None 时原样写入；now 为这一行的时刻（Unix 时间）"""
         try:
-            with open(log_file, "a", encoding="utf-8") as f:
-                if time_stamp:
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    f.write(f"[{timestamp}] {text}")
-                else:
-                    f.write(text)
+            writer.write(formatter.format(text, now) if formatter else text, now)
         except Exception as e:
-            self.update_signal.emit("system", f"写入日志文件时出错: {e}")
+            self._emit_message("system", f"写入日志文件时出错: {e}")
 
-    def stop_task(self, task_id):
-        """停止指定任务"""
+    def stop_task(self, task_id, cancel_schedule=True):
+        """停止指定任务（计划仍然有效，到时会再次运行），cancel_schedule 为 True 时同时取消排队的计划运行"""
+        self.supervisor.cancel(task_id)
+        if cancel_schedule:
+            self.periodic.cancel(task_id)
+        if self.startup is not None:
+            self.startup.cancel(task_id)
+        if task_id in self.stopping:
+            # 正在等待正常退出，改为立即强制终止，停止结果仍由停止所有任务的流程写出
+            try:
+                self.process_backend.kill(self.stopping[task_id])
+            except Exception as e:
+                self._emit_message(task_id, f"终止进程时出错: {e}")
+            return
         if task_id in self.processes:
             try:
-                process = self.processes[task_id]
-                subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
-                               capture_output=True)
+                self.process_backend.kill(self.processes[task_id])
             except Exception as e:
-                self.update_signal.emit(task_id, f"终止进程时出错: {e}")
+                self._emit_message(task_id, f"终止进程时出错: {e}")
 
             del self.processes[task_id]
 
+        self._finish_stop(task_id)
+
+    def _finish_stop(self, task_id):
+        """任务进程已停止：写出日志并更新状态"""
+        # 保证停止时日志全部落盘
+        self._flush_output_gate(task_id)
+        self._close_log_writer(task_id)
+        self.output_batcher.flush(task_id)
+
         if task_id in self.tasks:
             self.tasks[task_id]['is_running'] = False
             self.status_changed.emit(task_id, False)
 
-    def stop_all_tasks(self):
-        """停止所有任务"""
-        for task_id in list(self.processes.keys()):
-            self.stop_task(task_id)
+    def _stop_timeout(self, task_id):
+        """任务正常退出的宽限期（秒），任务配置缺省时使用全局设置"""
+        config = self.tasks.get(task_id, {}).get('config', {})
+        return float(config.get('stop_timeout', self.settings['stop_timeout']))
+
+    def stop_all_tasks(self, on_finished=None):
+        """并行停止所有任务：同时请求正常退出，超过宽限期的任务再强制终止
+
+        不阻塞界面：发出终止请求后立即返回，由定时器等待各任务退出，
+        每个任务停止后把停止结果写入该任务的输出并更新状态。
+        全部停止后调用 on_finished(results)，results 为 {task_id: StopResult}。
+        """
+        if self.startup is not None:
+            self.startup.cancel()
+            self._report_startup_events()
+            self.startup = None
+            self.startup_timer.stop()
+        for task_id in self.tasks:
+            self.supervisor.cancel(task_id)
+            self.periodic.cancel(task_id)
+        processes = {task_id: (process, self._stop_timeout(task_id))
+                     for task_id, process in self.processes.items()}
+        # 移出 processes，退出时不会被当作意外退出而自动重启
+        self.stopping.update(self.processes)
+        self._release_on_exit.update(self.processes.values())
+        self.processes.clear()
+        if self.stop_coordinator is None:
+            self.stop_coordinator = ShutdownCoordinator(self.process_backend,
+                                                        kill_timeout=self.settings['stop_kill_timeout'])
+        if on_finished is not None:
+            self._stop_callbacks.append(on_finished)
+        self._report_stop_results(self.stop_coordinator.add(processes))
+        self._poll_stopping()
+
+    def _poll_stopping(self):
+        """检查正在停止的任务（主线程，由定时器驱动），全部停止后调用等待中的回调"""
+        coordinator = self.stop_coordinator
+        if coordinator is None:
+            self.stop_timer.stop()
+            return
+        self._report_stop_results(coordinator.poll())
+        if not coordinator.finished:
+            if not self.stop_timer.isActive():
+                self.stop_timer.start()
+            return
+        self.stop_timer.stop()
+        self.stop_coordinator = None
+        self.log_flusher.flush_all()
+        results, self._stop_results = self._stop_results, {}
+        callbacks, self._stop_callbacks = self._stop_callbacks, []
+        for callback in callbacks:
+            callback(results)
+
+    def _report_stop_results(self, results):
+        for task_id, result in results.items():
+            self.stopping.pop(task_id, None)
+            self._stop_results[task_id] = result
+            self._emit_message(task_id, f"停止任务: {result.describe()}")
+            self._finish_stop(task_id)
+
+    def _wait_stopping(self):
+        """阻塞等待正在进行的停止所有任务完成（只在退出时使用）"""
+        while self.stop_coordinator is not None:
+            self._poll_stopping()
+            if self.stop_coordinator is not None:
+                time.sleep(POLL_INTERVAL)
+
+    def shutdown(self):
+        """退出前停止所有任务并刷新、关闭所有日志（只执行一次）"""
+        if self._shut_down:
+            return
+        self._shut_down = True
+        self.periodic_timer.stop()
+        if self.interpreter_pool is not None:
+            self.pool_timer.stop()
+            self.interpreter_pool.close()
+        self.stop_all_tasks()
+        self._wait_stopping()
+        self.reaper.stop()
+        if self.resource_sampler is not None:
+            self.resource_sampler.stop()
+        for engine in self.io_engines:
+            engine.stop()
+        for task_id in list(self.output_gates.keys()):
+            self._flush_output_gate(task_id, release=True)
+        for task_id in list(self.log_writers.keys()):
+            self._close_log_writer(task_id, release=True)
+        for task_id in self.tasks:
+            self.process_backend.remove_limits(task_id)
+        self.log_flusher.stop()
+        if self.log_store is not None:
+            self.log_store.close()
+        self.log_compressor.stop()
+        self.search_indexer.stop()
 
     def get_task_status(self, task_id):
         """获取任务状态"""
@@ -149,7 +815,16 @@ class MultiProcessManager(QObject):
 
     def remove_task(self, task_id):
         """移除任务"""
-        if task_id in self.processes:
+        if task_id in self.processes or task_id in self.stopping:
             self.stop_task(task_id)
+        self._flush_output_gate(task_id, release=True)
+        self._close_log_writer(task_id, release=True)
+        self.supervisor.remove(task_id)
+        self.periodic.remove(task_id)
+        if not self.periodic.jobs:
+            self.periodic_timer.stop()
+        self.process_backend.remove_limits(task_id)
+        if self.resource_sampler is not None:
+            self.resource_sampler.forget(task_id)
         if task_id in self.tasks:
             del self.tasks[task_id]
@@ -1,12 +1,15 @@
 import os
 import sys
-import winreg
+try:
+    import winreg
+except ImportError:  # 非 Windows 平台
+    winreg = None
 from PySide6.QtWidgets import (QSystemTrayIcon, QMenu, QApplication,
                                QWidget, QMessageBox)
 from PySide6.QtGui import QIcon, QAction
 from PySide6.QtCore import Qt
 
-from config import load_config, save_config
+from config import load_config, save_config, load_settings
 from multi_process_manager import MultiProcessManager
 from log_dialog import LogDialog
 from utils import get_app_dir
@@ -34,9 +37,10 @@ class MultiSystemTrayApp(QSystemTrayIcon):
         self.setToolTip("多任务 PowerShell 监控器")
 
         # 创建多任务进程管理器
-        self.process_manager = MultiProcessManager()
+        self.process_manager = MultiProcessManager(load_settings())
         self.process_manager.update_signal.connect(self.update_log)
         self.process_manager.status_changed.connect(self.on_task_status_changed)
+        self.process_manager.task_alert.connect(self.on_task_alert)
 
         # 初始化所有任务
         self.initialize_tasks()
@@ -121,8 +125,9 @@ class MultiSystemTrayApp(QSystemTrayIcon):
         self.menu.addAction(self.stop_all_action)
         self.menu.addAction(self.reload_config_action)
         self.menu.addSeparator()
-        self.menu.addAction(self.autostart_action)
-        self.menu.addSeparator()
+        if winreg is not None:  # 开机自启动依赖 Windows 注册表
+            self.menu.addAction(self.autostart_action)
+            self.menu.addSeparator()
         self.menu.addAction(self.about_action)
         self.menu.addAction(self.exit_action)
 
@@ -173,19 +178,16 @@ class MultiSystemTrayApp(QSystemTrayIcon):
         log_file = self.log_files[task_id]
 
         if task_id not in self.task_log_dialogs:
-            self.task_log_dialogs[task_id] = LogDialog(log_file)
+            settings = self.process_manager.settings
+            self.task_log_dialogs[task_id] = LogDialog(
+                log_file, settings['log_view_max_lines'], settings['log_view_window_kb'] * 1024,
+                self.process_manager.get_search_indexer(),
+                self.process_manager.get_task_log_storage(task_id))
             self.task_log_dialogs[task_id].setWindowTitle(
                 f"PSMonitor - 任务日志 - {self.tasks[task_id].get('name', f'任务 {task_id}')}")
 
-        # 读取并显示日志内容
-        try:
-            if os.path.exists(log_file):
-                with open(log_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                self.task_log_dialogs[task_id].text_edit.setPlainText(content)
-        except Exception as e:
-            self.task_log_dialogs[task_id].text_edit.setPlainText(
-                f"读取日志文件时出错: {str(e)}")
+        # 先写出缓冲中的日志，对话框显示后在后台索引日志文件
+        self.process_manager.flush_task_log(task_id)
 
         self.task_log_dialogs[task_id].show()
         self.task_log_dialogs[task_id].raise_()
@@ -223,29 +225,36 @@ class MultiSystemTrayApp(QSystemTrayIcon):
         self.manager_dialog.activateWindow()
 
     def start_enabled_tasks(self):
-        """启动所有启用的任务"""
-        for task_id, task_config in self.tasks.items():
-            if task_config.get('enabled', False):
-                self.process_manager.start_task(task_id)
+        """按启动调度启动所有启用的任务（按计划定时运行的任务到时再启动）"""
+        self.process_manager.start_tasks(
+            [task_id for task_id, task_config in self.tasks.items()
+             if task_config.get('enabled', False) and not self.process_manager.is_scheduled(task_id)])
 
     def start_all_tasks(self):
-        """启动所有任务"""
-        for task_id in self.tasks.keys():
-            self.process_manager.start_task(task_id)
+        """按启动调度启动所有任务"""
+        self.process_manager.start_tasks(list(self.tasks.keys()))
 
     def stop_all_tasks(self):
         """停止所有任务"""
         self.process_manager.stop_all_tasks()
 
     def reload_config(self):
-        """重新加载配置"""
+        """重新加载配置：先停止所有当前任务（不阻塞界面），全部停止后再应用新配置"""
+        self.process_manager.stop_all_tasks(on_finished=lambda results: self._apply_config())
+
+    def _apply_config(self):
+        """读取并应用配置"""
         new_tasks = load_config()
         self.tasks = new_tasks
 
-        # 停止所有当前任务
-        self.process_manager.stop_all_tasks()
+        self.process_manager.settings.update(load_settings())
+        for dialog in self.task_log_dialogs.values():
+            dialog.tail_view.set_max_lines(self.process_manager.settings['log_view_max_lines'])
 
-        # 重新初始化任务
+        # 移除配置中已删除的任务（同时取消其运行计划），再重新初始化任务
+        for task_id in list(self.process_manager.tasks):
+            if task_id not in self.tasks:
+                self.process_manager.remove_task(task_id)
         self.initialize_tasks()
 
         # 更新菜单
@@ -258,11 +267,11 @@ class MultiSystemTrayApp(QSystemTrayIcon):
                          f"已加载 {len(self.tasks)} 个任务",
                          QSystemTrayIcon.Information, 3000)
 
-    def update_log(self, task_id, text):
-        """更新日志"""
+    def update_log(self, task_id, lines):
+        """更新日志（每次收到一个任务的一批输出）"""
         # 如果对应任务的日志对话框正在显示，则更新它
         if task_id in self.task_log_dialogs and self.task_log_dialogs[task_id].isVisible():
-            self.task_log_dialogs[task_id].append_text(text)
+            self.task_log_dialogs[task_id].append_lines(lines)
 
     def on_task_status_changed(self, task_id, is_running):
         """任务状态变化处理"""
@@ -275,6 +284,11 @@ class MultiSystemTrayApp(QSystemTrayIcon):
         self.showMessage(f"任务状态变化", f"{task_name} 已{status}",
                          QSystemTrayIcon.Information, 2000)
 
+    def on_task_alert(self, task_id, message):
+        """需要提醒用户的任务事件（如崩溃循环）"""
+        task_name = self.tasks.get(task_id, {}).get('name', f'任务 {task_id}')
+        self.showMessage(f"{task_name} 需要处理", message, QSystemTrayIcon.Warning, 10000)
+
     def on_tasks_updated(self):
         """当任务更新时的处理"""
         # 重新加载配置
@@ -289,6 +303,8 @@ class MultiSystemTrayApp(QSystemTrayIcon):
     # 以下方法保持与原来相同（is_autostart_enabled, toggle_autostart, exit_app）
     def is_autostart_enabled(self):
         """检查是否已设置开机自启动"""
+        if winreg is None:
+            return False
         try:
             key = winreg.OpenKey(
                 winreg.HKEY_CURRENT_USER,
@@ -341,8 +357,7 @@ class MultiSystemTrayApp(QSystemTrayIcon):
         msg.exec()
 
     def exit_app(self):
-        """退出应用程序"""
-        self.process_manager.stop_all_tasks()
+        """退出应用程序（停止任务、落盘日志由 main 中连接的 aboutToQuit 完成）"""
         QApplication.quit()
 
     def on_tray_activated(self, reason):
@@ -0,0 +1,61 @@
+import threading
+import time
+
+
+DEFAULT_BATCH_INTERVAL = 0.05  # 秒
+DEFAULT_BATCH_LINES = 500
+
+
+class OutputBatcher:
+    """输出批量发送器
+
+    读取线程将每行输出放入对应任务的待发送列表，
+    每个任务最多每隔 interval 秒或累计 max_lines 行时整体发送一次，
+    避免逐行跨线程发送信号淹没 Qt 事件队列。
+    """
+
+    def __init__(self, emit, interval=DEFAULT_BATCH_INTERVAL, max_lines=DEFAULT_BATCH_LINES):
+        self.emit = emit  # emit(task_id, lines)
+        self.interval = interval
+        self.max_lines = max_lines
+        self._pending = {}  # task_id -> [lines]
+        self._last_emit = {}  # task_id -> 上次发送时间
+        # 在锁内发送，保证同一任务的批次按顺序到达
+        self._lock = threading.RLock()
+
+    def add(self, task_id, line):
+        """添加一行输出"""
+        with self._lock:
+            lines = self._pending.setdefault(task_id, [])
+            lines.append(line)
+            if len(lines) >= self.max_lines:
+                self._emit_locked(task_id, time.monotonic())
+
+    def extend(self, task_id, lines):
+        """添加多行输出"""
+        with self._lock:
+            pending = self._pending.setdefault(task_id, [])
+            pending.extend(lines)
+            if len(pending) >= self.max_lines:
+                self._emit_locked(task_id, time.monotonic())
+
+    def flush_if_due(self, now=None):
+        """发送所有已到时间的批次"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for task_id in list(self._pending):
+                if now - self._last_emit.get(task_id, 0.0) >= self.interval:
+                    self._emit_locked(task_id, now)
+
+    def flush(self, task_id=None):
+        """立即发送指定任务（默认全部任务）的待发送输出"""
+        now = time.monotonic()
+        with self._lock:
+            task_ids = list(self._pending) if task_id is None else [task_id]
+            for tid in task_ids:
+                if tid in self._pending:
+                    self._emit_locked(tid, now)
+
+    def _emit_locked(self, task_id, now):
+        self._last_emit[task_id] = now
+        self.emit(task_id, self._pending.pop(task_id))
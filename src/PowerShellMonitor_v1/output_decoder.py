@@ -0,0 +1,109 @@
+import codecs
+
+
+# 自动检测时依次尝试的编码；全部失败时使用兜底编码
+CANDIDATE_ENCODINGS = ('utf-8', 'gbk')
+# latin-1 为每个字节都定义了字符，解码不会失败也不会丢失内容（原始字节可由文本还原）
+FALLBACK_ENCODING = 'latin-1'
+# 依赖开头的 BOM 判断字节序的编码，没有 BOM 时按小端序（Windows 的默认字节序）解码
+BOM_FALLBACKS = {'utf-16': 'utf-16-le', 'utf-32': 'utf-32-le'}
+
+
+def normalize_encoding(encoding):
+    """校验编码名称，返回规范名称；为空、无效或不是文本编码（例如 base64）时返回 None"""
+    if not encoding:
+        return None
+    try:
+        name = codecs.lookup(encoding).name
+        "\n".encode(name)
+    except LookupError:
+        return None
+    return name
+
+
+class OutputDecoder:
+    """任务输出解码器
+
+    每个任务一个实例。未指定编码时，根据最先出现的非 ASCII 数据检测一次编码并锁定，
+    此后使用增量解码器解码，跨读取边界被截断的多字节字符会被正确拼接。
+    ascii_compatible 为 False（例如 UTF-16）时换行符不是单个 0x0A 字节，不能在解码前按字节切分行。
+    """
+
+    def __init__(self, encoding=None, candidates=CANDIDATE_ENCODINGS):
+        self.candidates = candidates
+        self.encoding = None
+        self._decoder = None
+        self._pending = b""
+        # 可直接整体解码完整行（编码兼容 ASCII 且解码器中没有残留字节）
+        self._whole_lines = False
+        self._ascii_compatible = False
+        self._ascii_shortcut = False  # 非 utf-8 编码下纯 ASCII 数据按 ascii 解码更快
+        # 显式指定的编码无效时退回自动检测
+        if normalize_encoding(encoding):
+            self._lock_encoding(encoding)
+
+    @property
+    def ascii_compatible(self):
+        """编码是否兼容 ASCII（自动检测时候选编码都兼容 ASCII）"""
+        return self._ascii_compatible or self.encoding is None
+
+    def decode(self, data, final=False):
+        """解码一段字节数据，返回可输出的文本"""
+        if self._whole_lines and data.endswith(b"\n"):
+            if self._ascii_shortcut and data.isascii():
+                return data.decode('ascii')
+            return data.decode(self.encoding, 'replace')
+
+        if self._decoder is not None:
+            try:
+                text = self._decoder.decode(data, final)
+            except UnicodeError:
+                # 数据开头没有 BOM：改用固定字节序的编码，连同解码器中缓存的字节重新解码
+                fallback = BOM_FALLBACKS.get(self.encoding)
+                if fallback is None:
+                    raise
+                data = self._decoder.getstate()[0] + data
+                self._lock_encoding(fallback)
+                return self.decode(data, final)
+            self._whole_lines = self._ascii_compatible and not self._decoder.getstate()[0]
+            return text
+
+        if self._pending:
+            data = self._pending + data
+            self._pending = b""
+
+        # 纯 ASCII 数据在所有候选编码下结果相同，无需锁定编码
+        if data.isascii():
+            return data.decode('ascii')
+
+        encoding = self._detect(data, final)
+        if encoding is None:
+            # 数据末尾可能是被截断的多字节字符，等待更多数据再判断
+            self._pending = data
+            return ""
+        self._lock_encoding(encoding)
+        return self.decode(data, final)
+
+    def flush(self):
+        """输出结束时调用，返回剩余的文本"""
+        return self.decode(b"", final=True)
+
+    def _detect(self, data, final):
+        for encoding in self.candidates:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            try:
+                decoder.decode(data, final)
+            except UnicodeDecodeError:
+                continue
+            # 末尾残留未完成的字节时，只有在数据足够多时才据此判断
+            if decoder.getstate()[0] and not final and len(data) < 64:
+                return None
+            return encoding
+        return FALLBACK_ENCODING
+
+    def _lock_encoding(self, encoding):
+        self.encoding = normalize_encoding(encoding)
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        self._ascii_compatible = "\n~".encode(self.encoding) == b"\n~"
+        self._ascii_shortcut = self._ascii_compatible and self.encoding != 'utf-8'
+        self._whole_lines = self._ascii_compatible
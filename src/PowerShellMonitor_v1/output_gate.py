@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+
+
+DEFAULT_RING_SIZE = 10000  # 行
+
+
+class TokenBucket:
+    """令牌桶限速器，rate 为每秒补充的令牌数，burst 为桶容量"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst else rate)
+        self._tokens = self.burst
+        self._last = None
+
+    def consume(self, amount, now):
+        """尝试取出 amount 个令牌，成功返回 True
+
+        amount 超过桶容量时，只要桶是满的即可通过（令牌变为负数，之后需要更久才能恢复）。
+        """
+        if self._last is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens < min(amount, self.burst):
+            return False
+        self._tokens -= amount
+        return True
+
+
+class OutputGate:
+    """任务输出闸门
+
+    位于读取线程与日志/界面之间：按任务配置的每秒行数、字节数限速，
+    通过限速的输出连同读取时刻（Unix 时间）放入有界环形缓冲区，由后台刷新线程取出并交给 sink，
+    日志中的时间戳因此是读到这一行的时刻，而不是刷新时刻。
+    被限速或因缓冲区溢出而丢弃的行会被计数，并在输出中插入丢弃提示行。
+    """
+
+    def __init__(self, sink, lines_per_sec=0, bytes_per_sec=0, ring_size=DEFAULT_RING_SIZE):
+        self.sink = sink  # sink(entries)，entries 为 [(text, 读取时刻)]
+        self.ring_size = max(1, ring_size)
+        self.rate_dropped = 0  # 因超出速率限制被丢弃的总行数
+        self.overflow_dropped = 0  # 因缓冲区溢出被丢弃的总行数
+        self._line_bucket = None
+        self._byte_bucket = None
+        self._ring = deque()
+        self._rate_run = 0  # 连续被限速丢弃、尚未提示的行数
+        self._overflow_run = 0  # 溢出丢弃、尚未提示的行数
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self.set_limits(lines_per_sec, bytes_per_sec)
+
+    @property
+    def dropped(self):
+        """被丢弃的总行数"""
+        return self.rate_dropped + self.overflow_dropped
+
+    def set_limits(self, lines_per_sec=0, bytes_per_sec=0):
+        """设置速率限制，0 表示不限制"""
+        with self._lock:
+            self._line_bucket = TokenBucket(lines_per_sec) if lines_per_sec else None
+            self._byte_bucket = TokenBucket(bytes_per_sec) if bytes_per_sec else None
+
+    def put(self, text, now=None):
+        """放入一行输出（由读取线程调用）"""
+        now = time.monotonic() if now is None else now
+        timestamp = time.time()
+        with self._lock:
+            if not self._allow(len(text), now):
+                self.rate_dropped += 1
+                self._rate_run += 1
+                return
+            if self._rate_run:
+                self._append((rate_drop_marker(self._rate_run), timestamp))
+                self._rate_run = 0
+            self._append((text, timestamp))
+
+    def flush_if_due(self, now=None):
+        """取出缓冲区中的全部输出交给 sink（由后台刷新线程调用）"""
+        with self._drain_lock:
+            with self._lock:
+                entries = []
+                if self._overflow_run:
+                    # 提示行位于保留下来的最早一行之前
+                    timestamp = self._ring[0][1] if self._ring else time.time()
+                    entries.append((overflow_marker(self._overflow_run), timestamp))
+                    self._overflow_run = 0
+                entries.extend(self._ring)
+                self._ring.clear()
+                # 输出已停止但仍有未提示的限速丢弃
+                if self._rate_run and not entries:
+                    entries.append((rate_drop_marker(self._rate_run), time.time()))
+                    self._rate_run = 0
+            if entries:
+                self.sink(entries)
+
+    def flush(self):
+        """立即取出全部输出"""
+        self.flush_if_due()
+
+    def _allow(self, size, now):
+        if self._line_bucket and not self._line_bucket.consume(1, now):
+            return False
+        if self._byte_bucket and not self._byte_bucket.consume(size, now):
+            return False
+        return True
+
+    def _append(self, entry):
+        if len(self._ring) >= self.ring_size:
+            self._ring.popleft()
+            self.overflow_dropped += 1
+            self._overflow_run += 1
+        self._ring.append(entry)
+
+
+def rate_drop_marker(count):
+    """超出速率限制的丢弃提示行"""
+    return f"[PSMonitor] 输出超出速率限制，已丢弃 {count} 行\n"
+
+
+def overflow_marker(count):
+    """缓冲区溢出的丢弃提示行"""
+    return f"[PSMonitor] 输出缓冲区已满，已丢弃 {count} 行\n"
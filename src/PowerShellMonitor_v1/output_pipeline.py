@@ -0,0 +1,65 @@
+import threading
+
+from line_assembler import CONTINUED, PROGRESS
+from output_decoder import OutputDecoder
+
+
+CONTINUATION_MARKER = " ↩"  # 标记被截断的行，下一行是它的后续内容
+
+
+class OutputPipeline:
+    """任务单次运行的输出处理流程
+
+    读取到的分块数据依次经过行组装、解码，再以文本行的形式交给 on_text。
+    编码不兼容 ASCII（例如 UTF-16）时无法按字节切分行，先用 decoder 解码并转为 UTF-8 再组装，
+    此时 max_line_length 按 UTF-8 字节计算。
+    读取线程调用 feed/close，后台刷新线程调用 flush_if_due 输出等待超时的不完整行。
+    """
+
+    def __init__(self, assembler, decoder, on_text):
+        self.assembler = assembler
+        self.on_text = on_text
+        if decoder.ascii_compatible:
+            self.source_decoder = None
+            self.decoder = decoder
+        else:
+            self.source_decoder = decoder
+            self.decoder = OutputDecoder('utf-8')
+        self._lock = threading.Lock()
+
+    def feed(self, data):
+        """处理读取到的一块数据"""
+        with self._lock:
+            if self.source_decoder is not None:
+                data = self.source_decoder.decode(data).encode('utf-8')
+            self._emit(self.assembler.feed(data))
+
+    def flush_if_due(self, now=None):
+        """输出等待超时的不完整行"""
+        with self._lock:
+            self._emit(self.assembler.flush_partial(now))
+
+    def flush(self):
+        """供后台刷新线程统一调用，不强制截断未完成的行"""
+        self.flush_if_due()
+
+    def close(self):
+        """输出结束，输出剩余的全部内容"""
+        with self._lock:
+            if self.source_decoder is not None:
+                self._emit(self.assembler.feed(self.source_decoder.flush().encode('utf-8')))
+            self._emit(self.assembler.finish())
+            tail = self.decoder.flush()
+            if tail:
+                self.on_text(tail + "\n")
+
+    def _emit(self, pieces):
+        for data, kind in pieces:
+            text = self.decoder.decode(data)
+            if not text:
+                continue
+            if kind == CONTINUED:
+                text += CONTINUATION_MARKER + "\n"
+            elif kind == PROGRESS:
+                text += "\n"
+            self.on_text(text)
@@ -0,0 +1,308 @@
+import time
+from datetime import datetime, timedelta
+
+from timer_wheel import TimerWheel
+
+
+OVERLAP_POLICIES = ("skip", "queue", "kill")
+MISFIRE_POLICIES = ("run", "skip")
+DEFAULT_MISFIRE_GRACE = 60.0  # 秒，超过计划时刻这么久才执行的运行视为错过
+MIN_INTERVAL = 1.0  # 秒，时间轮的刻度
+
+# 计划触发时的动作
+START = "start"  # 启动任务
+RESTART = "restart"  # 先停止仍在运行的上一次运行，再启动
+
+MONTH_NAMES = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+WEEKDAY_NAMES = {name: number for number, name in enumerate(
+    ("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+CRON_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+CRON_SEARCH_YEARS = 9  # 向后查找下次运行时刻的年数（覆盖 2 月 29 日）
+
+
+def _parse_cron_field(text, low, high, names=None):
+    """解析 cron 的一个字段，返回取值集合"""
+    def value(token):
+        token = token.lower()
+        if names and token in names:
+            return names[token]
+        return int(token)
+
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"cron 字段 {text} 的步长必须大于 0")
+        if part in ("*", "?"):
+            start, end = low, high
+        elif "-" in part:
+            first, last = part.split("-", 1)
+            start, end = value(first), value(last)
+        else:
+            start = value(part)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"cron 字段 {text} 超出范围 {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """cron 表达式：分 时 日 月 周（本地时间）
+
+    每个字段支持 *、列表（1,15）、范围（1-5）、步长（*/10、8-18/2）和月份、星期的英文缩写，
+    星期中 0 和 7 都表示周日；也支持 @hourly、@daily 等简写。
+    与常见的 cron 一致，日和周都有限制时满足其中之一即可。
+    """
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        fields = CRON_MACROS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 表达式 {self.expression!r} 需要 5 个字段（分 时 日 月 周）")
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12, MONTH_NAMES)
+        weekdays = _parse_cron_field(fields[4], 0, 7, WEEKDAY_NAMES)
+        self.weekdays = {day % 7 for day in weekdays}
+        self._any_day = fields[2].startswith(("*", "?"))
+        self._any_weekday = fields[4].startswith(("*", "?"))
+
+    def __str__(self):
+        return self.expression
+
+    def _day_matches(self, date):
+        weekday = date.isoweekday() % 7 in self.weekdays
+        if self._any_day:
+            return weekday
+        day = date.day in self.days
+        if self._any_weekday:
+            return day
+        return day or weekday
+
+    def first(self, now):
+        return self.next_after(now)
+
+    def next_after(self, when):
+        """when（Unix 时间）之后的下一次运行时刻，找不到时返回 None"""
+        moment = datetime.fromtimestamp(when).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + CRON_SEARCH_YEARS
+        while moment.year <= limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = datetime(moment.year + year, month + 1, 1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        return None
+
+
+class IntervalSchedule:
+    """固定间隔：第一次在加入计划时运行，之后每隔 seconds 秒运行一次（对齐第一次运行的时刻，不累积偏差）"""
+
+    def __init__(self, seconds):
+        self.seconds = float(seconds)
+        if self.seconds < MIN_INTERVAL:
+            raise ValueError(f"运行间隔不能小于 {MIN_INTERVAL:.0f} 秒")
+        self.anchor = None
+
+    def __str__(self):
+        return f"每 {self.seconds:g} 秒"
+
+    def first(self, now):
+        self.anchor = now
+        return now
+
+    def next_after(self, when):
+        if self.anchor is None:
+            self.anchor = when
+        count = int((when - self.anchor) // self.seconds) + 1
+        return self.anchor + count * self.seconds
+
+
+def parse_schedule(task_config):
+    """按任务配置的 schedule（cron 表达式）或 interval（秒）创建计划，都没有设置时返回 None"""
+    expression = task_config.get('schedule')
+    interval = task_config.get('interval')
+    if expression and interval:
+        raise ValueError("schedule 与 interval 只能设置其中一个")
+    if expression:
+        return CronSchedule(str(expression))
+    if interval:
+        return IntervalSchedule(interval)
+    return None
+
+
+class _Job:
+    def __init__(self, task_id, schedule, config):
+        self.task_id = task_id
+        self.schedule = schedule
+        self.overlap = config.get('overlap', 'skip')
+        if self.overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"未知的重叠策略 {self.overlap}，可选: {', '.join(OVERLAP_POLICIES)}")
+        self.misfire = config.get('misfire', 'run')
+        if self.misfire not in MISFIRE_POLICIES:
+            raise ValueError(f"未知的错过处理方式 {self.misfire}，可选: {', '.join(MISFIRE_POLICIES)}")
+        self.misfire_grace = max(0.0, float(config.get('misfire_grace', DEFAULT_MISFIRE_GRACE)))
+        self.timer = None
+        self.next_run = None
+        self.queued = False  # overlap 为 queue 时，有一次运行等待上一次结束
+        self.runs = 0
+        self.skipped = 0  # 因上一次运行尚未结束而跳过的次数
+        self.missed = 0  # 错过（未按时触发）的次数
+
+
+class PeriodicScheduler:
+    """定时运行任务：所有任务的计划由一个分层时间轮驱动
+
+    每个任务在时间轮中只有一个定时器（下一次运行的时刻），触发后再计算并加入下一次，
+    数千个计划的开销也只与每秒到期的数量有关。
+    触发时任务仍在运行，按 overlap 处理：skip 跳过本次，queue 在上一次结束后立即运行（最多排队一次），
+    kill 停止上一次后运行。程序休眠、系统挂起等原因导致晚于计划时刻 misfire_grace 秒以上才触发时，
+    按 misfire 处理：run 补运行一次（错过的多次只补一次），skip 不补运行。
+
+    调度器只负责决策，不启动进程：调用方定期调用 poll 取得应当运行的任务并启动，
+    任务进程退出时调用 on_exit 取得是否有排队的运行。
+    """
+
+    def __init__(self, clock=time.time, tick=MIN_INTERVAL):
+        self.clock = clock
+        self.tick = tick
+        self.wheel = TimerWheel(clock(), tick)
+        self.jobs = {}
+        self.events = []  # (task_id, 说明)，由调用方取出显示
+
+    def set_schedule(self, task_id, task_config):
+        """按任务配置设置（或取消）任务的计划，返回是否有计划；配置无效时抛出 ValueError"""
+        self.remove(task_id)
+        schedule = parse_schedule(task_config)
+        if schedule is None:
+            return False
+        job = _Job(task_id, schedule, task_config)
+        self.jobs[task_id] = job
+        self._schedule(job, schedule.first(self.clock()))
+        return True
+
+    def remove(self, task_id):
+        """取消任务的计划"""
+        job = self.jobs.pop(task_id, None)
+        if job is not None and job.timer is not None:
+            self.wheel.cancel(job.timer)
+
+    def next_run(self, task_id):
+        """任务下一次运行的时刻（Unix 时间），没有计划时返回 None"""
+        job = self.jobs.get(task_id)
+        return job.next_run if job else None
+
+    def poll(self, is_running):
+        """推进时间轮，返回现在应当执行的 [(task_id, START 或 RESTART)]
+
+        is_running(task_id) 返回任务是否仍在运行。
+        """
+        now = self.clock()
+        if now < self.wheel.time - self.tick:
+            # 系统时间被调早：按新的时间重新计算所有计划
+            self._rebuild(now)
+        actions = []
+        for timer in self.wheel.advance(now):
+            job = timer.item
+            job.timer = None
+            late = now - timer.when
+            if late > job.misfire_grace:
+                missed = self._count_missed(job, timer.when, now)
+                job.missed += missed
+                when = datetime.fromtimestamp(timer.when).strftime("%Y-%m-%d %H:%M:%S")
+                if job.misfire == "skip":
+                    self.events.append((job.task_id, f"错过了 {missed} 次计划运行（最早在 {when}），不补运行"))
+                    self._schedule(job, job.schedule.next_after(now))
+                    continue
+                self.events.append((job.task_id, f"错过了 {missed} 次计划运行（最早在 {when}），补运行一次"))
+            self._schedule(job, job.schedule.next_after(now))
+            action = self._on_due(job, is_running(job.task_id))
+            if action is not None:
+                job.runs += 1
+                actions.append((job.task_id, action))
+        return actions
+
+    def on_exit(self, task_id):
+        """任务进程退出，有排队的运行时返回 True（调用方应立即启动）"""
+        job = self.jobs.get(task_id)
+        if job is None or not job.queued:
+            return False
+        job.queued = False
+        job.runs += 1
+        return True
+
+    def cancel(self, task_id):
+        """取消排队等待的运行（任务被用户停止时），计划本身不受影响"""
+        job = self.jobs.get(task_id)
+        if job is not None:
+            job.queued = False
+
+    def get_stats(self, task_id):
+        """任务的计划运行统计，没有计划时返回 None"""
+        job = self.jobs.get(task_id)
+        if job is None:
+            return None
+        return {'schedule': str(job.schedule), 'next_run': job.next_run, 'runs': job.runs,
+                'skipped': job.skipped, 'missed': job.missed, 'queued': job.queued}
+
+    def take_events(self):
+        """取出自上次调用以来的事件"""
+        events, self.events = self.events, []
+        return events
+
+    def _on_due(self, job, running):
+        if not running:
+            return START
+        if job.overlap == "kill":
+            self.events.append((job.task_id, "上一次运行尚未结束，停止后重新运行"))
+            return RESTART
+        if job.overlap == "queue":
+            if not job.queued:
+                job.queued = True
+                self.events.append((job.task_id, "上一次运行尚未结束，本次运行在其结束后进行"))
+                return None
+        job.skipped += 1
+        self.events.append((job.task_id, "上一次运行尚未结束，跳过本次运行"))
+        return None
+
+    def _schedule(self, job, when):
+        job.next_run = when
+        if when is None:
+            self.events.append((job.task_id, f"计划 {job.schedule} 没有下一次运行时刻"))
+            return
+        job.timer = self.wheel.schedule(when, job)
+
+    def _count_missed(self, job, first, now):
+        """first 到 now 之间错过的计划运行次数（最多统计 1000 次）"""
+        count = 0
+        when = first
+        while when is not None and when <= now - job.misfire_grace and count < 1000:
+            count += 1
+            when = job.schedule.next_after(when)
+        return max(1, count)
+
+    def _rebuild(self, now):
+        self.wheel = TimerWheel(now, self.tick)
+        for job in self.jobs.values():
+            job.timer = None
+            self._schedule(job, job.schedule.next_after(now))
@@ -0,0 +1,171 @@
+import os
+import signal
+import subprocess
+import sys
+
+from process_limits import ResourceLimiter
+
+
+PROCESS_BACKENDS = ("auto", "windows", "posix")
+
+
+class ProcessBackend:
+    """平台进程后端：负责启动任务进程和终止任务的整个进程树
+
+    进程管理器只通过后端启动与终止进程，不直接依赖某个平台的进程接口。
+    """
+
+    name = ""
+    powershell = "powershell"  # 执行 PowerShell 命令的解释器
+    graceful_stop = True  # terminate 能否请求进程正常退出，不能时停止任务不等待宽限期
+
+    def spawn(self, args, limits=None, name=None, stdin=None):
+        """启动进程，标准输出与标准错误合并到一个管道
+
+        limits 为 TaskLimits，name 用于区分各任务的限制（如 cgroup 名称），
+        stdin 为 subprocess.PIPE 时可向进程写入标准输入（预热的解释器）。
+        """
+        return subprocess.Popen(args, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                universal_newlines=False, **self._popen_options())
+
+    def unsupported_limits(self, limits):
+        """当前后端无法生效的限制项"""
+        return limits.names()
+
+    def limit_status(self, name):
+        """任务的限制事件计数（OOM 终止、CPU 受限等），不支持时返回 None"""
+        return None
+
+    def remove_limits(self, name):
+        """删除任务的限制（如 cgroup）"""
+
+    def terminate(self, process):
+        """请求进程及其子进程正常退出（不等待）"""
+        raise NotImplementedError
+
+    def kill(self, process):
+        """强制终止进程及其所有子进程"""
+        raise NotImplementedError
+
+    def release(self, process):
+        """任务进程正常退出后、被回收之前，清理仍残留的子进程"""
+
+    def exit_status(self, process):
+        """进程已退出时返回退出码，仍在运行时返回 None（能够不回收进程时不回收）"""
+        return process.poll()
+
+    def _popen_options(self):
+        return {}
+
+
+class WindowsProcessBackend(ProcessBackend):
+    """Windows 后端：不显示控制台窗口，用 taskkill /F /T 终止进程树
+
+    任务运行在隐藏的控制台中，没有窗口可以接收不带 /F 的 taskkill 发出的关闭消息，
+    监控程序也不与它共享控制台，无法发送 Ctrl+Break，因此不支持请求正常退出。
+    """
+
+    name = "windows"
+    graceful_stop = False
+
+    def terminate(self, process):
+        self.kill(process)
+
+    def kill(self, process):
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                       capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW)
+
+    def _popen_options(self):
+        return {"creationflags": subprocess.CREATE_NO_WINDOW}
+
+
+class PosixProcessBackend(ProcessBackend):
+    """POSIX 后端：每个任务在独立的会话（进程组）中运行，用 os.killpg 直接向整个进程组发送信号
+
+    终止任务不需要启动辅助进程；任务派生的子进程留在同一进程组中，会一起被终止。
+    任务的资源限制在进程启动后立即通过 cgroup v2 或 prlimit 应用（见 ResourceLimiter）。
+    """
+
+    name = "posix"
+    powershell = "pwsh"
+
+    def __init__(self, cgroup_root="", cgroup_move_self=False):
+        self.limiter = ResourceLimiter(cgroup_root, cgroup_move_self)
+
+    def spawn(self, args, limits=None, name=None, stdin=None):
+        process = super().spawn(args, stdin=stdin)
+        if limits:
+            try:
+                self.limiter.apply(name, limits, process.pid)
+            except OSError:
+                # 无法应用限制时不让任务继续运行
+                self.kill(process)
+                process.wait()
+                process.stdout.close()
+                if process.stdin:
+                    process.stdin.close()
+                raise
+        return process
+
+    def unsupported_limits(self, limits):
+        return self.limiter.unsupported(limits)
+
+    def limit_status(self, name):
+        return self.limiter.status(name)
+
+    def remove_limits(self, name):
+        self.limiter.remove(name)
+
+    def terminate(self, process):
+        self._signal_group(process, signal.SIGTERM)
+
+    def kill(self, process):
+        self._signal_group(process, signal.SIGKILL)
+
+    def release(self, process):
+        self._signal_group(process, signal.SIGKILL)
+
+    def exit_status(self, process):
+        # 用 WNOWAIT 只查询不回收：任务进程由回收线程在清理进程组之后回收
+        if process.returncode is not None:
+            return process.returncode
+        try:
+            info = os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+        except ChildProcessError:
+            return process.poll()
+        if info is None:
+            return None
+        if info.si_code in (os.CLD_KILLED, os.CLD_DUMPED):
+            return -info.si_status
+        return info.si_status
+
+    def _signal_group(self, process, signum):
+        # 进程组 ID 即任务进程的 PID：任务进程被回收后该 ID 可能已被复用，不能再向它发送信号，
+        # 未回收（包括已退出的僵尸进程）时 ID 仍被占用，发送是安全的
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signum)
+        except ProcessLookupError:
+            # 进程组已经全部退出
+            pass
+        except PermissionError:
+            # 无权向整个进程组发送信号，只向任务进程本身发送（不回收）
+            os.kill(process.pid, signum)
+
+    def _popen_options(self):
+        return {"start_new_session": True}
+
+
+def create_process_backend(name="auto", cgroup_root="", cgroup_move_self=False):
+    """按名称创建进程后端，auto 按当前平台选择
+
+    cgroup_root 为 POSIX 后端放置任务 cgroup 的目录，cgroup_move_self 为是否允许把本程序移到其下的 monitor 子 cgroup。
+    """
+    if name == "auto":
+        name = "windows" if sys.platform == "win32" else "posix"
+    if name == "windows":
+        return WindowsProcessBackend()
+    if name == "posix":
+        return PosixProcessBackend(cgroup_root, cgroup_move_self)
+    raise ValueError(f"未知的进程后端: {name}")
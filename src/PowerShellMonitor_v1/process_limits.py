@@ -0,0 +1,244 @@
+import os
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 启动后为任务进程设置 rlimit 需要 prlimit（Linux）
+PRLIMIT_SUPPORTED = resource is not None and hasattr(resource, "prlimit")
+
+
+LIMIT_KEYS = ("memory_max_mb", "cpu_quota", "max_pids", "max_open_files")
+CPU_PERIOD = 100000  # 微秒，cpu.max 的统计周期
+
+# 各项限制在 cgroup v2 中对应的控制器
+CGROUP_CONTROLLERS = {"memory_max_mb": "memory", "cpu_quota": "cpu", "max_pids": "pids"}
+
+
+class TaskLimits:
+    """任务的资源限制，0 表示不限制
+
+    memory_max_mb 为内存上限（MB），cpu_quota 为 CPU 配额（占单核的百分比，200 表示两个核），
+    max_pids 为进程树中的最大进程（线程）数，max_open_files 为每个进程可打开的文件数。
+    """
+
+    def __init__(self, memory_max_mb=0, cpu_quota=0, max_pids=0, max_open_files=0):
+        self.memory_max_mb = max(0.0, float(memory_max_mb))
+        self.cpu_quota = max(0.0, float(cpu_quota))
+        self.max_pids = max(0, int(max_pids))
+        self.max_open_files = max(0, int(max_open_files))
+
+    @classmethod
+    def from_config(cls, task_config):
+        """从任务配置中读取资源限制"""
+        return cls(**{key: task_config.get(key, 0) for key in LIMIT_KEYS})
+
+    def names(self):
+        """设置了的限制项"""
+        return [key for key in LIMIT_KEYS if getattr(self, key)]
+
+    def __bool__(self):
+        return bool(self.names())
+
+
+def find_cgroup_root():
+    """当前进程在 cgroup v2 层级中所在的目录，没有挂载 cgroup v2 时返回 None"""
+    mount = None
+    try:
+        with open("/proc/self/mounts") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == "cgroup2":
+                    mount = fields[1]
+                    break
+        if mount is None:
+            return None
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return os.path.join(mount, line[3:].strip().lstrip("/"))
+    except OSError:
+        pass
+    return None
+
+
+class CgroupLimiter:
+    """通过 cgroup v2 限制任务资源
+
+    每个任务一个子 cgroup（root/task_<id>），任务进程启动后立即加入，
+    之后派生的子进程都在同一 cgroup 中，限制作用于整个进程树。
+    root 下已有进程（通常是本程序自身）时无法为子 cgroup 启用控制器：
+    move_self 为 True 时先把本程序移到叶子 cgroup root/monitor，否则不使用 cgroup。
+    """
+
+    def __init__(self, root, move_self=False):
+        self.root = root
+        self.move_self = move_self
+        self.controllers = set()  # 已为子 cgroup 启用的控制器
+        self._prepared = False
+
+    def prepare(self):
+        """启用控制器，失败时返回 False"""
+        if self._prepared:
+            return bool(self.controllers)
+        self._prepared = True
+        try:
+            available = set(self._read(self.root, "cgroup.controllers").split())
+            wanted = available & set(CGROUP_CONTROLLERS.values())
+            if not wanted:
+                return False
+            if self._read(self.root, "cgroup.procs").strip():
+                # 有进程的 cgroup 不能为子 cgroup 启用控制器
+                if not self.move_self:
+                    return False
+                leaf = os.path.join(self.root, "monitor")
+                os.makedirs(leaf, exist_ok=True)
+                self._write(leaf, "cgroup.procs", str(os.getpid()))
+            self._write(self.root, "cgroup.subtree_control",
+                        " ".join(f"+{name}" for name in sorted(wanted)))
+            self.controllers = set(self._read(self.root, "cgroup.subtree_control").split())
+        except OSError:
+            self.controllers = set()
+        return bool(self.controllers)
+
+    def supports(self, key):
+        return CGROUP_CONTROLLERS.get(key) in self.controllers
+
+    def group(self, name, limits):
+        """创建（或更新）任务的 cgroup 并写入限制，返回目录"""
+        path = os.path.join(self.root, f"task_{name}")
+        os.makedirs(path, exist_ok=True)
+        if self.supports("memory_max_mb"):
+            memory = str(int(limits.memory_max_mb * 1024 * 1024)) if limits.memory_max_mb else "max"
+            self._write(path, "memory.max", memory)
+            if os.path.exists(os.path.join(path, "memory.swap.max")):
+                # 不允许用交换空间绕过内存上限
+                self._write(path, "memory.swap.max", "0" if limits.memory_max_mb else "max")
+        if self.supports("cpu_quota"):
+            quota = str(int(limits.cpu_quota / 100 * CPU_PERIOD)) if limits.cpu_quota else "max"
+            self._write(path, "cpu.max", f"{quota} {CPU_PERIOD}")
+        if self.supports("max_pids"):
+            self._write(path, "pids.max", str(limits.max_pids) if limits.max_pids else "max")
+        return path
+
+    def attach(self, path, pid):
+        """把进程加入 cgroup（之后派生的子进程随之加入）"""
+        self._write(path, "cgroup.procs", str(pid))
+
+    def status(self, name):
+        """任务 cgroup 的事件计数，cgroup 不存在时返回 None"""
+        path = os.path.join(self.root, f"task_{name}")
+        if not os.path.isdir(path):
+            return None
+        memory = self._read_keyed(path, "memory.events")
+        cpu = self._read_keyed(path, "cpu.stat")
+        pids = self._read_keyed(path, "pids.events")
+        return {
+            'oom_kills': memory.get('oom_kill', 0),
+            'memory_max_hits': memory.get('max', 0),
+            'throttled': cpu.get('nr_throttled', 0),
+            'throttled_time': cpu.get('throttled_usec', 0) / 1e6,
+            'pids_max_hits': pids.get('max', 0),
+        }
+
+    def remove(self, name):
+        """删除任务的 cgroup（仍有进程时保留）"""
+        try:
+            os.rmdir(os.path.join(self.root, f"task_{name}"))
+        except OSError:
+            pass
+
+    def _read_keyed(self, path, filename):
+        try:
+            return {key: int(value) for key, value in
+                    (line.split() for line in self._read(path, filename).splitlines() if line)}
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _read(path, filename):
+        with open(os.path.join(path, filename)) as f:
+            return f.read()
+
+    @staticmethod
+    def _write(path, filename, value):
+        with open(os.path.join(path, filename), "w") as f:
+            f.write(value)
+
+
+class ResourceLimiter:
+    """为刚启动的任务进程应用资源限制：cgroup v2 可用时使用 cgroup，否则使用 prlimit
+
+    限制在进程启动后由本程序应用，不使用 preexec_fn（多线程程序中 fork 之后执行 Python 代码可能死锁），
+    因此任务进程在启动后的极短时间内（加入 cgroup 之前）不受限制。
+    rlimit 只作用于单个进程（及之后派生的子进程）：内存上限对应 RLIMIT_AS（虚拟内存，比实际占用更严格），
+    打开文件数对应 RLIMIT_NOFILE；CPU 配额与进程数只能通过 cgroup 限制。
+    """
+
+    def __init__(self, cgroup_root="", cgroup_move_self=False):
+        self.cgroup_root = cgroup_root  # 留空时使用本程序所在的 cgroup
+        self.cgroup_move_self = cgroup_move_self  # 是否允许把本程序移到 root/monitor（见 CgroupLimiter）
+        self._cgroups = None
+        self._cgroups_checked = False
+
+    @property
+    def cgroups(self):
+        """可用的 CgroupLimiter，第一次设置了限制的任务启动时才检测（并启用控制器）"""
+        if not self._cgroups_checked:
+            self._cgroups_checked = True
+            root = self.cgroup_root or find_cgroup_root()
+            if root and os.access(root, os.W_OK):
+                limiter = CgroupLimiter(root, self.cgroup_move_self)
+                if limiter.prepare():
+                    self._cgroups = limiter
+        return self._cgroups
+
+    def unsupported(self, limits):
+        """无法生效的限制项"""
+        cgroups = self.cgroups if limits else None
+        result = []
+        for key in limits.names():
+            if cgroups is not None and cgroups.supports(key):
+                continue
+            if PRLIMIT_SUPPORTED and key in ("memory_max_mb", "max_open_files"):
+                continue
+            result.append(key)
+        return result
+
+    def apply(self, name, limits, pid):
+        """把刚启动的进程加入任务的 cgroup 并设置 rlimit，失败时抛出 OSError"""
+        if not limits:
+            return
+        cgroups = self.cgroups
+        if cgroups is not None and any(cgroups.supports(key) for key in limits.names()):
+            cgroups.attach(cgroups.group(name, limits), pid)
+        for res, value in self._rlimits(limits, cgroups):
+            resource.prlimit(pid, res, value)
+
+    def status(self, name):
+        """任务的限制事件计数（OOM 终止、CPU 受限等），未使用 cgroup 时返回 None"""
+        if self._cgroups is None:
+            return None
+        return self._cgroups.status(name)
+
+    def remove(self, name):
+        if self._cgroups is not None:
+            self._cgroups.remove(name)
+
+    def _rlimits(self, limits, cgroups):
+        if not PRLIMIT_SUPPORTED:
+            return []
+        result = []
+        if limits.max_open_files:
+            result.append((resource.RLIMIT_NOFILE, limits.max_open_files))
+        if limits.memory_max_mb and (cgroups is None or not cgroups.supports("memory_max_mb")):
+            result.append((resource.RLIMIT_AS, int(limits.memory_max_mb * 1024 * 1024)))
+        values = []
+        for res, value in result:
+            _, hard = resource.getrlimit(res)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            # 软硬限制相同，任务无法自行调高
+            values.append((res, (value, value)))
+        return values
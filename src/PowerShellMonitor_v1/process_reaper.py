@@ -0,0 +1,216 @@
+import os
+import selectors
+import signal
+import threading
+import time
+
+
+POLL_INTERVAL = 0.2  # 秒，不支持 pidfd 时检查进程是否退出的间隔
+
+
+def exited_unreaped(process):
+    """进程是否已退出（POSIX 上不回收，僵尸进程继续占用其进程 ID 与进程组 ID）"""
+    if process.returncode is not None:
+        return True
+    if not hasattr(os, 'waitid'):
+        return process.poll() is not None
+    try:
+        return os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None
+    except ChildProcessError:
+        # 已经被其他地方回收
+        return True
+
+
+def pidfd_supported():
+    """当前平台是否支持 pidfd（Linux 5.3+，Python 3.9+）"""
+    if not hasattr(os, 'pidfd_open'):
+        return False
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return False
+    return True
+
+
+class ExitInfo:
+    """任务进程的退出信息"""
+
+    def __init__(self, pid, returncode, runtime):
+        self.pid = pid
+        self.returncode = returncode
+        self.runtime = runtime  # 运行时长（秒）
+        # POSIX 上被信号终止时 returncode 为负的信号编号
+        self.signal = -returncode if os.name == 'posix' and returncode < 0 else None
+
+    @property
+    def signal_name(self):
+        if self.signal is None:
+            return None
+        try:
+            return signal.Signals(self.signal).name
+        except ValueError:
+            return str(self.signal)
+
+    def describe(self):
+        """生成一行退出信息说明"""
+        if self.signal is not None:
+            text = f"被信号 {self.signal_name} 终止"
+        else:
+            text = f"退出码 {self.returncode}"
+        return f"{text}，运行 {self.runtime:.1f} 秒"
+
+
+class ProcessReaper:
+    """集中回收所有任务进程
+
+    一个线程等待所有已注册的进程退出：支持 pidfd 时通过 selectors 监视每个进程的 pidfd，
+    进程退出时才被唤醒；否则每隔 poll_interval 秒在同一线程中检查一遍所有进程。
+    进程退出后调用 wait() 回收并在回收线程中调用 on_exit(process, context, ExitInfo)。
+    before_reap(process, context) 在进程已退出、尚未回收时调用，此时进程组 ID 仍被占用，
+    可以安全地向进程组发送信号（清理残留的子进程）；任务进程只应由这里回收。
+    """
+
+    def __init__(self, on_exit, on_error=None, poll_interval=POLL_INTERVAL, before_reap=None):
+        self.on_exit = on_exit
+        self.on_error = on_error
+        self.poll_interval = poll_interval
+        self.before_reap = before_reap
+        self._lock = threading.Lock()
+        self._requests = []  # 待登记的进程
+        self._watching = {}  # process -> (context, 启动时刻, pidfd)
+        self._stopped = False
+        self._use_pidfd = pidfd_supported()
+        if self._use_pidfd:
+            self._selector = selectors.DefaultSelector()
+            self._wakeup_r, self._wakeup_w = os.pipe()
+            os.set_blocking(self._wakeup_r, False)
+            os.set_blocking(self._wakeup_w, False)
+            self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        else:
+            self._event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def process_count(self):
+        """当前等待退出的进程数量"""
+        with self._lock:
+            return len(self._watching) + len(self._requests)
+
+    def register(self, process, context=None):
+        """开始等待一个进程退出，context 原样传给 on_exit"""
+        with self._lock:
+            self._requests.append((process, context, time.monotonic()))
+        self._wakeup()
+
+    def stop(self):
+        """停止回收线程（不再通知尚未退出的进程）"""
+        if not self._thread.is_alive():
+            return
+        self._stopped = True
+        self._wakeup()
+        self._thread.join(timeout=2)
+
+    def _wakeup(self):
+        if not self._use_pidfd:
+            self._event.set()
+            return
+        # 线程退出后管道已关闭，描述符号可能已被复用，不能再写
+        with self._lock:
+            if self._wakeup_w is None:
+                return
+            try:
+                os.write(self._wakeup_w, b"\0")
+            except (BlockingIOError, OSError):
+                pass
+
+    def _run(self):
+        try:
+            if self._use_pidfd:
+                self._run_pidfd()
+            else:
+                self._run_poll()
+        finally:
+            if self._use_pidfd:
+                for _, _, pidfd in self._watching.values():
+                    os.close(pidfd)
+                self._selector.close()
+                with self._lock:
+                    os.close(self._wakeup_r)
+                    os.close(self._wakeup_w)
+                    self._wakeup_w = None
+
+    def _run_pidfd(self):
+        while not self._stopped:
+            for key, _ in self._selector.select():
+                if key.fd == self._wakeup_r:
+                    self._drain_wakeup()
+                    self._process_requests()
+                else:
+                    self._reap(key.data)
+
+    def _run_poll(self):
+        while not self._stopped:
+            self._event.wait(self.poll_interval)
+            self._event.clear()
+            self._process_requests()
+            for process in list(self._watching):
+                if exited_unreaped(process):
+                    self._reap(process)
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wakeup_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _process_requests(self):
+        with self._lock:
+            requests, self._requests = self._requests, []
+        for process, context, started in requests:
+            pidfd = None
+            if self._use_pidfd:
+                try:
+                    pidfd = os.pidfd_open(process.pid)
+                except ProcessLookupError:
+                    # 进程已经被回收
+                    pass
+                except OSError as e:
+                    self._report(e)
+            with self._lock:
+                self._watching[process] = (context, started, pidfd)
+            if pidfd is not None:
+                self._selector.register(pidfd, selectors.EVENT_READ, process)
+            elif self._use_pidfd:
+                self._reap(process)
+
+    def _reap(self, process):
+        """进程已退出：回收并通知调用方"""
+        with self._lock:
+            context, started, pidfd = self._watching.pop(process)
+        if pidfd is not None:
+            self._selector.unregister(pidfd)
+            os.close(pidfd)
+        if self.before_reap is not None:
+            try:
+                self.before_reap(process, context)
+            except Exception as e:
+                self._report(e)
+        try:
+            returncode = process.wait()
+        except Exception as e:
+            self._report(e)
+            return
+        info = ExitInfo(process.pid, returncode, time.monotonic() - started)
+        try:
+            self.on_exit(process, context, info)
+        except Exception as e:
+            self._report(e)
+
+    def _report(self, error):
+        if self.on_error:
+            try:
+                self.on_error(error)
+            except Exception:
+                pass
@@ -0,0 +1,118 @@
+import time
+
+
+DEFAULT_STOP_TIMEOUT = 5.0  # 秒
+DEFAULT_KILL_TIMEOUT = 2.0  # 秒
+POLL_INTERVAL = 0.02  # 秒
+
+# 停止结果
+EXITED = "exited"  # 发送信号前已经退出
+TERMINATED = "terminated"  # 宽限期内正常退出
+KILLED = "killed"  # 超过宽限期，被强制终止
+ALIVE = "alive"  # 强制终止后仍未退出
+
+
+class StopResult:
+    """单个任务的停止结果"""
+
+    def __init__(self, task_id, outcome, elapsed, returncode=None, error=None):
+        self.task_id = task_id
+        self.outcome = outcome
+        self.elapsed = elapsed  # 从开始停止到进程退出（或放弃等待）的秒数
+        self.returncode = returncode
+        self.error = error  # 发送信号时出现的异常
+
+    def describe(self):
+        """生成一行停止结果说明"""
+        if self.outcome == EXITED:
+            text = "进程已经退出"
+        elif self.outcome == TERMINATED:
+            text = f"进程在 {self.elapsed:.2f} 秒内正常退出"
+        elif self.outcome == KILLED:
+            text = f"进程未在宽限期内退出，已强制终止（{self.elapsed:.2f} 秒）"
+        else:
+            text = "强制终止后进程仍未退出"
+        if self.returncode is not None:
+            text += f"，退出码 {self.returncode}"
+        if self.error is not None:
+            text += f"，终止进程时出错: {self.error}"
+        return text
+
+
+class ShutdownCoordinator:
+    """并行停止多个任务进程
+
+    先向所有任务同时发送正常终止信号，让任务有机会写出缓冲并退出；
+    在同一个循环中并行等待，每个任务超过自己的宽限期后立即强制终止。
+    总耗时取决于最长的宽限期（加上强制终止后的等待），而不是各任务停止时间之和。
+    后端不支持正常退出（graceful_stop 为 False）时不等待宽限期，直接强制终止。
+
+    stop 阻塞到全部进程停止；界面线程中使用 add 加入进程，再由定时器反复调用 poll，不阻塞界面。
+    这里只查询进程是否退出而不回收（见 ProcessBackend.exit_status），正常退出后残留子进程的清理
+    由回收线程在回收前进行（见 ProcessReaper 的 before_reap），避免向已被复用的进程组 ID 发送信号。
+    """
+
+    def __init__(self, backend, kill_timeout=DEFAULT_KILL_TIMEOUT, poll_interval=POLL_INTERVAL):
+        self.backend = backend
+        self.kill_timeout = kill_timeout  # 强制终止后最多再等待的秒数
+        self.poll_interval = poll_interval
+        self._pending = {}  # task_id -> [process, 开始时刻, 截止时刻, 是否已强制终止, 错误]
+
+    @property
+    def finished(self):
+        """是否所有进程都已停止（或放弃等待）"""
+        return not self._pending
+
+    def stop(self, processes):
+        """停止进程并等待完成，processes 为 {task_id: (process, 宽限期秒数)}，返回 {task_id: StopResult}"""
+        results = self.add(processes)
+        while self._pending:
+            results.update(self.poll())
+            if self._pending:
+                nearest = min(entry[2] for entry in self._pending.values())
+                time.sleep(max(0.0, min(self.poll_interval, nearest - time.monotonic())))
+        return results
+
+    def add(self, processes):
+        """开始停止进程（发送正常终止信号后立即返回），返回已经退出的任务的 {task_id: StopResult}"""
+        start = time.monotonic()
+        results = {}
+        for task_id, (process, grace) in processes.items():
+            returncode = self.backend.exit_status(process)
+            if returncode is not None:
+                results[task_id] = StopResult(task_id, EXITED, 0.0, returncode)
+                continue
+            error = None
+            if not self.backend.graceful_stop:
+                grace = 0
+            if grace > 0:
+                try:
+                    self.backend.terminate(process)
+                except Exception as e:
+                    error = e
+                    grace = 0
+            self._pending[task_id] = [process, start, start + max(0.0, grace), False, error]
+        return results
+
+    def poll(self):
+        """检查一次各进程，超过宽限期的强制终止，返回本次停止完成的 {task_id: StopResult}"""
+        now = time.monotonic()
+        results = {}
+        for task_id, entry in list(self._pending.items()):
+            process, start, deadline, killed, error = entry
+            returncode = self.backend.exit_status(process)
+            if returncode is not None:
+                outcome = KILLED if killed else TERMINATED
+                results[task_id] = StopResult(task_id, outcome, now - start, returncode, error)
+                del self._pending[task_id]
+            elif killed and now >= deadline:
+                results[task_id] = StopResult(task_id, ALIVE, now - start, error=error)
+                del self._pending[task_id]
+            elif not killed and now >= deadline:
+                try:
+                    self.backend.kill(process)
+                except Exception as e:
+                    entry[4] = e
+                entry[2] = now + self.kill_timeout
+                entry[3] = True
+        return results
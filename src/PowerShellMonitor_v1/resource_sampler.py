@@ -0,0 +1,289 @@
+import os
+import threading
+import time
+from array import array
+
+
+DEFAULT_INTERVAL = 1.0  # 秒
+DEFAULT_HISTORY_SIZE = 300  # 每个任务保留的采样数
+
+PROC_DIR = "/proc"
+
+
+def sampler_supported(proc_dir=PROC_DIR):
+    """当前平台是否可以通过 /proc 采样进程资源"""
+    return os.path.isfile(os.path.join(proc_dir, "self", "stat"))
+
+
+def _read_proc_file(path):
+    """读取 /proc 下的小文件（直接使用系统调用，避免创建文件对象的开销）"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, 4096)
+    finally:
+        os.close(fd)
+
+
+def _field(data, name):
+    """从 "name: value" 格式的内容中取出整数值，没有时为 0"""
+    start = data.find(name)
+    if start < 0:
+        return 0
+    start += len(name)
+    end = data.find(b"\n", start)
+    return int(data[start:end if end >= 0 else None])
+
+
+class ResourceHistory:
+    """单个任务的资源采样历史
+
+    每个指标一个固定长度的 array('d') 环形缓冲区，写满后覆盖最旧的采样。
+    """
+
+    FIELDS = ("time", "cpu", "rss", "threads", "processes", "read_bytes", "write_bytes")
+
+    def __init__(self, size=DEFAULT_HISTORY_SIZE):
+        self.size = max(2, size)
+        self.count = 0
+        self._next = 0
+        self._arrays = {field: array('d', bytes(8 * self.size)) for field in self.FIELDS}
+
+    def append(self, values):
+        """追加一次采样，values 按 FIELDS 的顺序排列"""
+        index = self._next
+        for field, value in zip(self.FIELDS, values):
+            self._arrays[field][index] = value
+        self._next = (index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def latest(self):
+        """最近一次采样（附带按最近两次采样计算的读写速率），没有采样时返回 None"""
+        if not self.count:
+            return None
+        index = (self._next - 1) % self.size
+        sample = {field: self._arrays[field][index] for field in self.FIELDS}
+        sample['read_rate'] = sample['write_rate'] = 0.0
+        if self.count > 1:
+            previous = (index - 1) % self.size
+            elapsed = sample['time'] - self._arrays['time'][previous]
+            if elapsed > 0:
+                sample['read_rate'] = (sample['read_bytes'] - self._arrays['read_bytes'][previous]) / elapsed
+                sample['write_rate'] = (sample['write_bytes'] - self._arrays['write_bytes'][previous]) / elapsed
+        return sample
+
+    def history(self, count=None):
+        """最近 count 次采样（默认全部），返回 {指标: [从旧到新的值]}"""
+        count = self.count if count is None else max(0, min(count, self.count))
+        start = (self._next - count) % self.size
+        result = {}
+        for field, values in self._arrays.items():
+            if start + count <= self.size:
+                result[field] = values[start:start + count].tolist()
+            else:
+                result[field] = values[start:].tolist() + values[:self._next].tolist()
+        return result
+
+
+class ResourceSampler:
+    """任务资源采样器
+
+    一个后台线程每隔 interval 秒遍历一次 /proc，读取所有进程的 stat，
+    找出每个任务的全部进程：任务进程是会话首进程（POSIX 后端的任务都在独立的会话中运行）时取整个会话，
+    父进程退出后被重新挂到 init 下的后台进程也不会遗漏，再沿父进程关系补上另建会话的子进程；
+    不是会话首进程时只沿父进程关系查找。汇总 CPU 占用、常驻内存、线程数和磁盘读写字节数，
+    写入该任务的 ResourceHistory。CPU 与读写量按进程逐个计算与上次采样的差值，
+    子进程退出不会让累计值倒退；两次采样之间没有消耗 CPU 时间的进程不重新读取读写计数。
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, history_size=DEFAULT_HISTORY_SIZE,
+                 on_error=None, proc_dir=PROC_DIR):
+        self.interval = interval
+        self.history_size = history_size
+        self.on_error = on_error
+        self.proc_dir = proc_dir
+        self.sample_time = 0.0  # 最近一次采样耗费的 CPU 时间（秒）
+        self._ticks_per_sec = os.sysconf('SC_CLK_TCK')
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+        self._roots = {}  # key -> 根进程 pid
+        self._histories = {}  # key -> ResourceHistory
+        self._previous = {}  # key -> {pid: (启动时刻, CPU 节拍, 读字节, 写字节)}
+        self._totals = {}  # key -> [累计读字节, 累计写字节]
+        self._last_time = {}  # key -> 上次采样时刻
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def register(self, key, pid):
+        """开始采样以 pid 为根的进程树（保留该任务已有的历史）"""
+        with self._lock:
+            self._roots[key] = pid
+            self._previous.pop(key, None)
+            self._last_time.pop(key, None)
+            if key not in self._histories:
+                self._histories[key] = ResourceHistory(self.history_size)
+                self._totals[key] = [0.0, 0.0]
+
+    def unregister(self, key):
+        """停止采样（保留历史）"""
+        with self._lock:
+            self._roots.pop(key, None)
+            self._previous.pop(key, None)
+            self._last_time.pop(key, None)
+
+    def forget(self, key):
+        """停止采样并丢弃历史"""
+        with self._lock:
+            self._roots.pop(key, None)
+            self._previous.pop(key, None)
+            self._last_time.pop(key, None)
+            self._histories.pop(key, None)
+            self._totals.pop(key, None)
+
+    def latest(self, key):
+        """任务最近一次采样，没有时返回 None"""
+        with self._lock:
+            history = self._histories.get(key)
+            return history.latest() if history else None
+
+    def history(self, key, count=None):
+        """任务最近 count 次采样，返回 {指标: [值]}，没有时返回 None"""
+        with self._lock:
+            history = self._histories.get(key)
+            return history.history(count) if history else None
+
+    def stop(self):
+        """停止采样线程"""
+        self._stop_event.set()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            with self._lock:
+                if not self._roots:
+                    continue
+            start = time.thread_time()
+            try:
+                self.sample()
+            except Exception as e:
+                self._report(e)
+            self.sample_time = time.thread_time() - start
+
+    def sample(self):
+        """采样一次所有任务"""
+        with self._lock:
+            roots = dict(self._roots)
+        now = time.monotonic()
+        stats, children, sessions = self._scan()
+        for key, root in roots.items():
+            pids = self._tree(root, stats, children, sessions)
+            values = self._collect(key, pids, stats, now)
+            with self._lock:
+                # 采样期间可能已被注销
+                if self._roots.get(key) == root and values is not None:
+                    self._histories[key].append(values)
+
+    def _scan(self):
+        """读取所有进程的 stat
+
+        返回 ({pid: (启动时刻, CPU 节拍, 线程数, 常驻页数)}, {ppid: [pid]}, {会话 ID: [pid]})。
+        """
+        stats = {}
+        children = {}
+        sessions = {}
+        proc_dir = self.proc_dir
+        for name in os.listdir(proc_dir):
+            if not name.isdigit():
+                continue
+            try:
+                data = _read_proc_file(f"{proc_dir}/{name}/stat")
+            except OSError:
+                continue
+            # 进程名可能包含空格和括号，从最后一个 ')' 之后开始解析
+            fields = data[data.rfind(b")") + 2:].split(None, 22)
+            if len(fields) < 22 or fields[0] == b"Z":
+                continue
+            pid = int(name)
+            stats[pid] = (fields[19], int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21]))
+            ppid = int(fields[1])
+            if ppid in children:
+                children[ppid].append(pid)
+            else:
+                children[ppid] = [pid]
+            session = int(fields[3])
+            if session in sessions:
+                sessions[session].append(pid)
+            else:
+                sessions[session] = [pid]
+        return stats, children, sessions
+
+    def _tree(self, root, stats, children, sessions):
+        """以 root 为根的任务的所有进程的 pid"""
+        if root not in stats:
+            return []
+        # 会话 ID 等于 root 的进程都属于 root 所在的会话（root 退出前该 ID 不会被复用）
+        pids = list(sessions.get(root, ())) or [root]
+        seen = set(pids)
+        for pid in pids:
+            for child in children.get(pid, ()):
+                if child not in seen:
+                    seen.add(child)
+                    pids.append(child)
+        return pids
+
+    def _read_io(self, pid):
+        """进程的磁盘读写字节数，无法读取时为 (0, 0)"""
+        try:
+            data = _read_proc_file(f"{self.proc_dir}/{pid}/io")
+            return _field(data, b"\nread_bytes:"), _field(data, b"\nwrite_bytes:")
+        except (OSError, ValueError):
+            return 0, 0
+
+    def _collect(self, key, pids, stats, now):
+        """汇总进程树的资源，返回按 ResourceHistory.FIELDS 排列的值；首次采样只记录基准"""
+        if not pids:
+            return None
+        previous = self._previous.get(key)
+        current = {}
+        ticks = read = write = 0
+        rss = threads = 0
+        for pid in pids:
+            start, pid_ticks, pid_threads, pid_rss = stats[pid]
+            before = previous.get(pid) if previous is not None else None
+            if before is not None and before[0] == start and before[1] == pid_ticks:
+                # 没有消耗 CPU 时间的进程不会产生读写，沿用上次的读写计数
+                io = before[2:]
+            else:
+                io = self._read_io(pid)
+            current[pid] = (start, pid_ticks, io[0], io[1])
+            rss += pid_rss
+            threads += pid_threads
+            if previous is None:
+                continue
+            if before is None or before[0] != start:
+                # 上次采样之后启动的进程
+                before = (start, 0, 0, 0)
+            ticks += max(0, pid_ticks - before[1])
+            read += max(0, io[0] - before[2])
+            write += max(0, io[1] - before[3])
+
+        last_time = self._last_time.get(key)
+        with self._lock:
+            if key not in self._roots:
+                return None
+            self._previous[key] = current
+            self._last_time[key] = now
+            totals = self._totals[key]
+            totals[0] += read
+            totals[1] += write
+        if previous is None or not last_time or now <= last_time:
+            return None
+        cpu = ticks / self._ticks_per_sec / (now - last_time) * 100
+        return (time.time(), cpu, rss * self._page_size, threads, len(pids), totals[0], totals[1])
+
+    def _report(self, error):
+        if self.on_error:
+            try:
+                self.on_error(error)
+            except Exception:
+                pass
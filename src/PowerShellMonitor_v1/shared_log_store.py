@@ -0,0 +1,488 @@
+import json
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from log_index import LineIndex
+from log_time_index import filter_time_range, TIME_PREFIX_RESOLUTION
+from log_writer import LogWriter, DEFAULT_FLUSH_INTERVAL, DEFAULT_BUFFER_SIZE
+
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024  # 单个分段文件的大小上限
+INDEX_FILE = "index.bin"
+TASKS_FILE = "tasks.json"
+
+_SEGMENT_PATTERN = re.compile(r"segment-(\d{6})\.log$")
+_HEADER = struct.Struct("<HI")  # 分段中每条记录的头部: 任务编号, 内容长度
+_ENTRY = struct.Struct("<IIqId")  # 索引记录: 任务编号, 分段号, 内容在分段中的偏移, 内容长度, 最早时刻
+_CLEARED = 0xFFFFFFFF  # 分段号为该值的索引记录表示任务日志已被清空
+_FIND_CHUNK = 64 * 1024  # 在任务日志中查找换行符时每次读取的字节数
+
+
+def segment_name(number):
+    return f"segment-{number:06d}.log"
+
+
+class _TaskChunks:
+    """一个任务写入共享日志的所有内容块
+
+    任务日志的位置是虚拟偏移：把任务的所有块按顺序拼接后的偏移，从 base 开始。
+    清空日志或删除最旧的分段时 epoch 加一，查看器据此重建行索引。
+    """
+
+    def __init__(self, base=0):
+        self.base = base
+        self.epoch = 0
+        self.segments = array("I")
+        self.offsets = array("q")
+        self.ends = array("q")  # 每块结束处的虚拟偏移
+        self.times = array("d")
+
+    @property
+    def end(self):
+        return self.ends[-1] if self.ends else self.base
+
+    def add(self, segment, offset, length, ts):
+        self.segments.append(segment)
+        self.offsets.append(offset)
+        self.ends.append(self.end + length)
+        self.times.append(ts)
+
+    def drop_before(self, count):
+        """丢弃最前面的 count 块"""
+        if not count:
+            return
+        self.base = self.ends[count - 1]
+        for values in (self.segments, self.offsets, self.ends, self.times):
+            del values[:count]
+        self.epoch += 1
+
+    def clear(self):
+        self.drop_before(len(self.ends))
+
+    def entries(self):
+        """生成 (分段号, 偏移, 长度, 时刻)"""
+        start = self.base
+        for segment, offset, end, ts in zip(self.segments, self.offsets, self.ends, self.times):
+            yield segment, offset, end - start, ts
+            start = end
+
+
+class SharedLogStore:
+    """多个任务共用的追加式分段日志
+
+    所有任务的输出按写入顺序追加到同一个分段文件（segment-NNNNNN.log），每条记录带有任务编号与长度；
+    索引文件 index.bin 记录每块内容属于哪个任务、位于哪个分段的什么位置，以及块中最早一行的时刻。
+    写入集中为一个顺序写入流，由后台刷新线程定时一次写出（与 LogWriter 相同的组提交），
+    每个任务的日志通过内存中的块列表按虚拟偏移读取。
+
+    分段超过 segment_bytes 后切换到新的分段；keep_segments 不为 0 时只保留最新的这么多个分段，
+    最旧的分段连同其中所有任务的内容一起删除。清空任务日志只在索引中记录，内容随分段删除时释放。
+    任务列表（tasks.json）损坏时把异常交给 on_error，原文件改名保留，索引只追加不重写，避免丢失其中的记录。
+    """
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES, keep_segments=0,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, on_error=None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.keep_segments = keep_segments
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self.index_file = os.path.join(directory, INDEX_FILE)
+        self.tasks_file = os.path.join(directory, TASKS_FILE)
+        self._lock = threading.RLock()
+        self._task_numbers = {}  # task_id -> 任务编号
+        self._tasks_lost = False  # 任务列表未能读取，索引中的记录无法对应到任务
+        self._max_number = 0  # 索引中出现过的最大任务编号，新任务的编号不能与之重复
+        self._chunks = {}  # task_id -> _TaskChunks
+        self._pending = []  # 尚未写入索引文件的索引记录
+        self._segment = None  # 当前写入的分段文件
+        self._segment_number = 1
+        self._segment_size = 0
+        self._last_flush = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # 加载
+
+    def _load(self):
+        """读取任务编号与索引；索引文件缺失时根据分段中的记录头重建"""
+        try:
+            with open(self.tasks_file, "r", encoding="utf-8") as f:
+                self._task_numbers = {task_id: int(number) for task_id, number in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, AttributeError) as e:
+            self._task_numbers = {}
+            self._tasks_lost = True
+            if self.on_error:
+                self.on_error(e)
+            try:
+                os.replace(self.tasks_file, self.tasks_file + ".corrupt")
+            except OSError:
+                pass
+        names = {number: task_id for task_id, number in self._task_numbers.items()}
+
+        segments = self._segment_numbers()
+        if segments:
+            self._segment_number = segments[-1]
+            self._segment_size = os.path.getsize(self._segment_path(segments[-1]))
+        first = segments[0] if segments else self._segment_number
+
+        try:
+            with open(self.index_file, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = None
+        if data is None and segments:
+            entries = list(self._scan_segments(segments))
+        else:
+            data = data or b""
+            entries = _ENTRY.iter_unpack(data[:len(data) - len(data) % _ENTRY.size])
+
+        stale = False
+        for number, segment, offset, length, ts in entries:
+            self._max_number = max(self._max_number, number)
+            task_id = names.get(number)
+            if task_id is None:
+                continue
+            chunks = self._chunks.setdefault(task_id, _TaskChunks())
+            if segment == _CLEARED:
+                chunks.clear()
+                stale = True
+            elif first <= segment <= self._segment_number:
+                chunks.add(segment, offset, length, ts)
+            else:
+                stale = True  # 所在的分段已被删除
+        if stale or data is None:
+            self._rewrite_index()
+
+    def _scan_segments(self, segments):
+        """从分段的记录头恢复索引记录（时刻取分段的修改时间）"""
+        for segment in segments:
+            path = self._segment_path(segment)
+            mtime = os.path.getmtime(path)
+            with open(path, "rb") as f:
+                data = f.read()
+            pos = 0
+            while pos + _HEADER.size <= len(data):
+                number, length = _HEADER.unpack_from(data, pos)
+                pos += _HEADER.size
+                if pos + length > len(data):
+                    break
+                yield number, segment, pos, length, mtime
+                pos += length
+
+    def _segment_numbers(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_PATTERN.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, segment_name(number))
+
+    # 写入
+
+    def append(self, task_id, data, ts):
+        """追加任务的一段输出（字节串，由整行组成），ts 为其中最早一行的时刻"""
+        if not data:
+            return
+        with self._lock:
+            number = self._task_number(task_id)
+            incoming = _HEADER.size + len(data)
+            if self._segment_size and self._segment_size + incoming > self.segment_bytes:
+                self._next_segment()
+            if self._segment is None:
+                self._segment = open(self._segment_path(self._segment_number), "ab")
+            self._segment.write(_HEADER.pack(number, len(data)))
+            self._segment.write(data)
+            offset = self._segment_size + _HEADER.size
+            self._segment_size += incoming
+            self._chunks.setdefault(task_id, _TaskChunks()).add(self._segment_number, offset, len(data), ts)
+            self._pending.append(_ENTRY.pack(number, self._segment_number, offset, len(data), ts))
+
+    def flush_if_due(self, now=None):
+        """如果距离上次写出已超过时间间隔，则写出缓冲的内容（由 LogFlusher 调用）"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._pending and now - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self):
+        """立即写出缓冲的内容与索引"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        # 先写出分段内容，再写出指向它的索引记录
+        if self._segment is not None:
+            self._segment.flush()
+        with open(self.index_file, "ab") as f:
+            f.write(b"".join(self._pending))
+        self._pending = []
+
+    def _task_number(self, task_id):
+        number = self._task_numbers.get(task_id)
+        if number is None:
+            number = max(max(self._task_numbers.values(), default=0), self._max_number) + 1
+            if number > 0xFFFF:
+                raise ValueError("共享日志中的任务数量超过上限")
+            self._task_numbers[task_id] = number
+            _write_atomic(self.tasks_file, json.dumps(self._task_numbers, ensure_ascii=False).encode("utf-8"))
+        return number
+
+    def _next_segment(self):
+        """切换到新的分段，必要时删除最旧的分段"""
+        self._flush_locked()
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        self._segment_number += 1
+        self._segment_size = 0
+        if self.keep_segments > 0:
+            self._prune(self._segment_number - self.keep_segments + 1)
+
+    def _prune(self, first):
+        """删除分段号小于 first 的分段"""
+        removed = False
+        for number in self._segment_numbers():
+            if number >= first:
+                break
+            try:
+                os.remove(self._segment_path(number))
+            except OSError:
+                # 分段正被读取（Windows）等情况，下次切换分段时再删除
+                first = number
+                break
+            removed = True
+        if not removed:
+            return
+        for chunks in self._chunks.values():
+            chunks.drop_before(bisect_left(chunks.segments, first))
+        self._rewrite_index()
+
+    def _rewrite_index(self):
+        """按内存中的块列表重写索引文件（去掉已删除分段与已清空任务的记录）"""
+        if self._tasks_lost:
+            # 内存中缺少无法对应到任务的记录，重写会把它们从索引中删掉
+            self._flush_locked()
+            return
+        if self._segment is not None:
+            self._segment.flush()
+        records = []
+        for task_id, chunks in self._chunks.items():
+            number = self._task_numbers[task_id]
+            records.extend((segment, offset, number, length, ts)
+                           for segment, offset, length, ts in chunks.entries())
+        records.sort()
+        _write_atomic(self.index_file, b"".join(_ENTRY.pack(number, segment, offset, length, ts)
+                                                for segment, offset, number, length, ts in records))
+        self._pending = []
+
+    # 任务日志操作
+
+    def clear(self, task_id):
+        """清空任务日志"""
+        with self._lock:
+            chunks = self._chunks.get(task_id)
+            if chunks is None or not chunks.ends:
+                return
+            chunks.clear()
+            self._pending.append(_ENTRY.pack(self._task_numbers[task_id], _CLEARED, 0, 0, time.time()))
+            self._flush_locked()
+
+    def state(self, task_id):
+        """返回任务日志的 (版本, 起始虚拟偏移, 结束虚拟偏移)"""
+        with self._lock:
+            chunks = self._chunks.get(task_id)
+            if chunks is None:
+                return 0, 0, 0
+            return chunks.epoch, chunks.base, chunks.end
+
+    def read(self, task_id, start, end):
+        """读取任务日志虚拟偏移 [start, end) 范围内的内容"""
+        with self._lock:
+            chunks = self._chunks.get(task_id)
+            if chunks is None:
+                return b""
+            start, end = max(start, chunks.base), min(end, chunks.end)
+            if start >= end:
+                return b""
+            if self._pending:
+                self._flush_locked()
+            pieces = []
+            i = bisect_right(chunks.ends, start)
+            position = start
+            while position < end:
+                chunk_start = chunks.ends[i - 1] if i else chunks.base
+                stop = min(end, chunks.ends[i])
+                pieces.append((chunks.segments[i], chunks.offsets[i] + position - chunk_start, stop - position))
+                position = stop
+                i += 1
+        return self._read_pieces(pieces)
+
+    def _read_pieces(self, pieces):
+        data = []
+        current, f = None, None
+        try:
+            for segment, offset, length in pieces:
+                if segment != current:
+                    if f is not None:
+                        f.close()
+                    f = open(self._segment_path(segment), "rb")
+                    current = segment
+                f.seek(offset)
+                data.append(f.read(length))
+        finally:
+            if f is not None:
+                f.close()
+        return b"".join(data)
+
+    def range_for_time(self, task_id, start, end):
+        """按块的时刻返回可能包含时间范围 [start, end] 内各行的虚拟偏移范围"""
+        with self._lock:
+            chunks = self._chunks.get(task_id)
+            if chunks is None:
+                return 0, 0
+            first = max(bisect_left(chunks.times, start) - 1, 0)
+            # 行首时间戳可能被截断，多返回时刻不超过 end + 精度的块，由调用方按行精确过滤
+            stop = bisect_right(chunks.times, end + TIME_PREFIX_RESOLUTION)
+            begin = chunks.ends[first - 1] if first else chunks.base
+            return begin, chunks.ends[stop - 1] if stop else begin
+
+    def close(self):
+        """写出缓冲的内容并关闭分段文件"""
+        with self._lock:
+            self._flush_locked()
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+
+def _write_atomic(path, data):
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+    os.replace(temp, path)
+
+
+class SharedLogWriter(LogWriter):
+    """把任务输出写入共享日志的写入器（缓冲与组提交行为与 LogWriter 相同）"""
+
+    def __init__(self, store, task_id, log_file=None, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        super().__init__(log_file, flush_interval, buffer_size)
+        self.store = store
+        self.task_id = task_id
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        self._buffer = []
+        self._buffered_bytes = 0
+        self.store.append(self.task_id, data.encode("utf-8"), self._buffer_time)
+
+
+class _TaskView:
+    """以类似 mmap 的方式（长度、切片、查找）访问共享日志中一个任务的内容"""
+
+    def __init__(self, store, task_id, base, size):
+        self.store = store
+        self.task_id = task_id
+        self.base = base
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(self.size)
+        if start >= stop:
+            return b""
+        try:
+            return self.store.read(self.task_id, self.base + start, self.base + stop)
+        except FileNotFoundError:
+            # 分段刚被删除，下次更新时会重建索引
+            return b""
+
+    def find(self, sub, start=0):
+        position = start
+        while position < self.size:
+            data = self[position:position + _FIND_CHUNK]
+            if not data:
+                break
+            found = data.find(sub)
+            if found >= 0:
+                return position + found
+            position += len(data) - len(sub) + 1
+        return -1
+
+    def close(self):
+        pass
+
+
+class SharedLineIndex(LineIndex):
+    """共享日志中一个任务的行索引，行为与基于文件的 LineIndex 相同"""
+
+    def __init__(self, store, task_id, tail_bytes=0):
+        self.store = store
+        self.task_id = task_id
+        self._epoch = None
+        super().__init__(f"{store.directory}#{task_id}", tail_bytes=tail_bytes)
+
+    def _remap(self):
+        """任务日志增长时更新视图，被清空或删除了开头的内容时重建索引"""
+        epoch, base, end = self.store.state(self.task_id)
+        if self._epoch is not None and epoch != self._epoch:
+            self._unmap()
+            self._reset()
+            self.generation += 1
+        self._epoch = epoch
+        # 虚拟偏移转换为从 0 开始的位置
+        self._mmap = _TaskView(self.store, self.task_id, base, end - base) if end > base else None
+
+
+class SharedTaskLog:
+    """共享日志中一个任务的日志，供日志窗口与时间范围查询使用"""
+
+    def __init__(self, store, task_id):
+        self.store = store
+        self.task_id = task_id
+
+    def create_line_index(self, tail_bytes=0):
+        return SharedLineIndex(self.store, self.task_id, tail_bytes)
+
+    def clear(self):
+        self.store.clear(self.task_id)
+
+    def query(self, start, end):
+        """按时间范围（Unix 时间）读取任务日志，逐行生成文本"""
+        begin, stop = self.store.range_for_time(self.task_id, start, end)
+        return filter_time_range(self._raw_lines(begin, stop), start, end)
+
+    def _raw_lines(self, begin, stop):
+        rest = b""
+        position = begin
+        while position < stop:
+            data = self.store.read(self.task_id, position, min(stop, position + _FIND_CHUNK))
+            if not data:
+                break
+            position += len(data)
+            lines = (rest + data).split(b"\n")
+            rest = lines.pop()
+            for line in lines:
+                yield line + b"\n"
+        if rest:
+            yield rest
@@ -0,0 +1,189 @@
+import os
+import re
+import time
+
+
+DEFAULT_MAX_CONCURRENT = 0  # 0 表示 CPU 核心数
+DEFAULT_SETTLE_TIME = 2.0  # 秒
+DEFAULT_READY_TIMEOUT = 60.0  # 秒
+
+# 任务的启动状态
+PENDING = "pending"  # 等待依赖就绪或启动名额
+DELAYED = "delayed"  # 依赖已就绪，等待 start_delay
+STARTING = "starting"  # 已启动，尚未就绪
+READY = "ready"
+FAILED = "failed"  # 启动失败、就绪前退出或等待就绪超时
+SKIPPED = "skipped"  # 依赖无法满足（循环依赖、依赖失败或未启用）
+
+
+def find_cycles(dependencies):
+    """找出依赖图中的循环，dependencies 为 {task_id: [依赖的 task_id]}，返回处于循环中的任务集合"""
+    visiting, done, in_cycle = set(), set(), set()
+
+    for root in dependencies:
+        if root in done:
+            continue
+        # 迭代的深度优先遍历，path 为当前路径
+        path = [root]
+        iterators = [iter(dependencies.get(root, ()))]
+        visiting.add(root)
+        while iterators:
+            node = next(iterators[-1], None)
+            if node is None:
+                finished = path.pop()
+                iterators.pop()
+                visiting.discard(finished)
+                done.add(finished)
+            elif node in visiting:
+                in_cycle.update(path[path.index(node):])
+            elif node not in done and node in dependencies:
+                path.append(node)
+                iterators.append(iter(dependencies.get(node, ())))
+                visiting.add(node)
+    return in_cycle
+
+
+class _Entry:
+    def __init__(self, task_id, config, order):
+        self.task_id = task_id
+        self.priority = int(config.get('priority', 0))
+        self.order = order  # 同优先级按配置顺序启动
+        depends_on = config.get('depends_on', [])
+        self.depends_on = [depends_on] if isinstance(depends_on, str) else list(depends_on)
+        self.delay = max(0.0, float(config.get('start_delay', 0)))
+        pattern = config.get('ready_pattern')
+        self.ready_pattern = re.compile(pattern) if pattern else None
+        self.ready_timeout = float(config.get('ready_timeout', DEFAULT_READY_TIMEOUT))
+        self.state = PENDING
+        self.due = None  # DELAYED: 启动时刻；STARTING: 判定就绪或超时的时刻
+        self.started = None
+        self.reason = ""
+
+
+class StartupScheduler:
+    """启动调度器：按依赖关系、优先级和并发上限分批启动任务
+
+    同时处于“启动中”的任务不超过 max_concurrent 个（0 表示 CPU 核心数）。任务在输出匹配 ready_pattern 时就绪；
+    没有 ready_pattern 的任务在第一次输出或启动 settle_time 秒后就绪。
+    任务只在 depends_on 中的所有任务就绪后才开始计算 start_delay 并启动，
+    循环依赖、依赖启动失败或依赖未参与调度（且没有在运行）的任务会被跳过。
+
+    调度器只负责决策，不启动进程也不计时：调用方定期调用 poll 取得应当启动的任务并启动，
+    再通过 on_started、on_output、on_exit 报告任务的进展。
+    """
+
+    def __init__(self, tasks, running=(), max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 settle_time=DEFAULT_SETTLE_TIME, clock=time.monotonic):
+        """tasks 为按顺序排列的 {task_id: 任务配置}，running 为已经在运行（视为就绪）的任务"""
+        self.max_concurrent = int(max_concurrent) if max_concurrent > 0 else (os.cpu_count() or 1)
+        self.settle_time = settle_time
+        self.clock = clock
+        self.running = set(running)
+        self.entries = {}
+        self.events = []  # (task_id, 状态, 说明)，由调用方取出显示
+        for order, (task_id, config) in enumerate(tasks.items()):
+            try:
+                self.entries[task_id] = _Entry(task_id, config, order)
+            except (ValueError, TypeError, re.error) as e:
+                self.events.append((task_id, SKIPPED, f"启动配置无效: {e}"))
+
+        for task_id in find_cycles({task_id: entry.depends_on for task_id, entry in self.entries.items()}):
+            self._finish(self.entries[task_id], SKIPPED, "存在循环依赖")
+        for entry in self.entries.values():
+            missing = [dep for dep in entry.depends_on
+                       if dep not in self.entries and dep not in self.running]
+            if entry.state == PENDING and missing:
+                self._finish(entry, SKIPPED, f"依赖的任务未启动: {', '.join(missing)}")
+
+    @property
+    def finished(self):
+        """所有任务都已就绪、失败或被跳过"""
+        return all(entry.state in (READY, FAILED, SKIPPED) for entry in self.entries.values())
+
+    def starting_count(self):
+        return sum(1 for entry in self.entries.values() if entry.state == STARTING)
+
+    def poll(self):
+        """处理超时并返回现在应当启动的任务（按优先级从高到低）"""
+        now = self.clock()
+        for entry in self.entries.values():
+            if entry.state == STARTING and now >= entry.due:
+                if entry.ready_pattern is None:
+                    self._finish(entry, READY, "")
+                else:
+                    self._finish(entry, FAILED, f"{entry.ready_timeout:.0f} 秒内没有输出就绪标志")
+        # 依赖失败的任务被跳过，可能连锁影响其他任务
+        changed = True
+        while changed:
+            changed = False
+            for entry in self.entries.values():
+                if entry.state != PENDING:
+                    continue
+                failed = [dep for dep in entry.depends_on
+                          if dep in self.entries and self.entries[dep].state in (FAILED, SKIPPED)]
+                if failed:
+                    self._finish(entry, SKIPPED, f"依赖的任务未能就绪: {', '.join(failed)}")
+                    changed = True
+                elif all(self._dependency_ready(dep) for dep in entry.depends_on):
+                    entry.state = DELAYED
+                    entry.due = now + entry.delay
+
+        slots = self.max_concurrent - self.starting_count()
+        due = sorted((entry for entry in self.entries.values()
+                      if entry.state == DELAYED and now >= entry.due),
+                     key=lambda entry: (-entry.priority, entry.order))
+        return [entry.task_id for entry in due[:max(0, slots)]]
+
+    def _dependency_ready(self, task_id):
+        entry = self.entries.get(task_id)
+        if entry is None:
+            return task_id in self.running
+        return entry.state == READY
+
+    def on_started(self, task_id, success=True):
+        """任务已启动（或启动失败）"""
+        entry = self.entries.get(task_id)
+        if entry is None or entry.state != DELAYED:
+            return
+        if not success:
+            self._finish(entry, FAILED, "启动失败")
+            return
+        entry.state = STARTING
+        entry.started = self.clock()
+        timeout = self.settle_time if entry.ready_pattern is None else entry.ready_timeout
+        entry.due = entry.started + timeout
+
+    def on_output(self, task_id, lines):
+        """任务有新的输出，启动中的任务检查是否就绪"""
+        entry = self.entries.get(task_id)
+        if entry is None or entry.state != STARTING or not lines:
+            return
+        if entry.ready_pattern is None:
+            self._finish(entry, READY, "")
+        elif any(entry.ready_pattern.search(line) for line in lines):
+            self._finish(entry, READY, "")
+
+    def on_exit(self, task_id):
+        """任务进程退出"""
+        entry = self.entries.get(task_id)
+        if entry is not None and entry.state == STARTING:
+            self._finish(entry, FAILED, "就绪前进程已退出")
+
+    def cancel(self, task_id=None):
+        """取消尚未启动的任务（默认全部）"""
+        for entry in self.entries.values():
+            if entry.state in (PENDING, DELAYED) and task_id in (None, entry.task_id):
+                self._finish(entry, SKIPPED, "已取消")
+
+    def take_events(self):
+        """取出自上次调用以来的状态变化"""
+        events, self.events = self.events, []
+        return events
+
+    def _finish(self, entry, state, reason):
+        entry.state = state
+        entry.reason = reason
+        entry.due = None
+        if state == READY and entry.started is not None:
+            reason = f"已就绪（启动后 {self.clock() - entry.started:.1f} 秒）"
+        self.events.append((entry.task_id, state, reason))
@@ -1,9 +1,13 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                                QLineEdit, QTextEdit, QCheckBox, QPushButton,
-                               QGroupBox, QMessageBox)
+                               QGroupBox, QMessageBox, QComboBox, QSpinBox)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon
 
+from output_decoder import normalize_encoding
+from periodic_scheduler import parse_schedule
+from task_runner import prepare_launch
+
 
 class TaskEditDialog(QDialog):
     """任务编辑器"""
@@ -47,6 +51,19 @@ class TaskEditDialog(QDialog):
         ps_group = QGroupBox("PowerShell 命令")
         ps_layout = QVBoxLayout()
 
+        # 启动方式（执行命令的解释器）
+        runner_layout = QHBoxLayout()
+        runner_layout.addWidget(QLabel("启动方式:"))
+        self.runner_combo = QComboBox()
+        self.runner_combo.addItem("自动（.exe 直接运行，其他交给 PowerShell）", "auto")
+        self.runner_combo.addItem("PowerShell", "pwsh")
+        self.runner_combo.addItem("Shell（sh / cmd）", "shell")
+        self.runner_combo.addItem("Python", "python")
+        self.runner_combo.addItem("直接运行（按引号切分参数）", "exec")
+        runner_layout.addWidget(self.runner_combo)
+        runner_layout.addStretch()
+        ps_layout.addLayout(runner_layout)
+
         self.ps_edit = QTextEdit()
         self.ps_edit.setPlaceholderText("请输入 PowerShell 命令或可执行文件路径...")
         self.ps_edit.setMinimumHeight(150)
@@ -64,9 +81,100 @@ class TaskEditDialog(QDialog):
         options_group = QGroupBox("选项")
         options_layout = QVBoxLayout()
 
+        timestamp_layout = QHBoxLayout()
         self.timestamp_check = QCheckBox("在日志中添加时间戳")
         self.timestamp_check.setChecked(True)
-        options_layout.addWidget(self.timestamp_check)
+        timestamp_layout.addWidget(self.timestamp_check)
+        self.timestamp_format_combo = QComboBox()
+        self.timestamp_format_combo.addItem("精确到秒", ("s", "wall"))
+        self.timestamp_format_combo.addItem("精确到毫秒", ("ms", "wall"))
+        self.timestamp_format_combo.addItem("相对启动时间（秒）", ("s", "monotonic"))
+        self.timestamp_format_combo.addItem("相对启动时间（毫秒）", ("ms", "monotonic"))
+        self.timestamp_check.toggled.connect(self.timestamp_format_combo.setEnabled)
+        timestamp_layout.addWidget(self.timestamp_format_combo)
+        timestamp_layout.addStretch()
+        options_layout.addLayout(timestamp_layout)
+
+        # 输出编码（留空为自动检测）
+        encoding_layout = QHBoxLayout()
+        encoding_layout.addWidget(QLabel("输出编码:"))
+        self.encoding_combo = QComboBox()
+        self.encoding_combo.setEditable(True)
+        self.encoding_combo.addItem("自动检测", "")
+        self.encoding_combo.addItem("utf-8", "utf-8")
+        self.encoding_combo.addItem("gbk", "gbk")
+        encoding_layout.addWidget(self.encoding_combo)
+        encoding_layout.addStretch()
+        options_layout.addLayout(encoding_layout)
+
+        # 日志格式（留空跟随全局设置）
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(QLabel("日志格式:"))
+        self.log_format_combo = QComboBox()
+        self.log_format_combo.addItem("跟随全局设置", "")
+        self.log_format_combo.addItem("纯文本", "text")
+        self.log_format_combo.addItem("JSONL 结构化记录", "jsonl")
+        format_layout.addWidget(self.log_format_combo)
+        format_layout.addStretch()
+        options_layout.addLayout(format_layout)
+
+        # 输出速率限制（0 表示不限制）
+        limit_layout = QHBoxLayout()
+        limit_layout.addWidget(QLabel("每秒最多行数:"))
+        self.lines_limit_spin = QSpinBox()
+        self.lines_limit_spin.setRange(0, 1000000)
+        self.lines_limit_spin.setSpecialValueText("不限制")
+        limit_layout.addWidget(self.lines_limit_spin)
+        limit_layout.addWidget(QLabel("每秒最多字节数:"))
+        self.bytes_limit_spin = QSpinBox()
+        self.bytes_limit_spin.setRange(0, 1000000000)
+        self.bytes_limit_spin.setSpecialValueText("不限制")
+        limit_layout.addWidget(self.bytes_limit_spin)
+        limit_layout.addStretch()
+        options_layout.addLayout(limit_layout)
+
+        # 资源限制（0 表示不限制）
+        resource_layout = QHBoxLayout()
+        self.limit_spins = {}
+        for key, label, maximum, suffix in (('memory_max_mb', "内存上限:", 1048576, " MB"),
+                                            ('cpu_quota', "CPU 配额:", 100000, "%"),
+                                            ('max_pids', "最大进程数:", 1000000, ""),
+                                            ('max_open_files', "最大打开文件数:", 1048576, "")):
+            resource_layout.addWidget(QLabel(label))
+            spin = QSpinBox()
+            spin.setRange(0, maximum)
+            spin.setSuffix(suffix)
+            spin.setSpecialValueText("不限制")
+            resource_layout.addWidget(spin)
+            self.limit_spins[key] = spin
+        resource_layout.addStretch()
+        options_layout.addLayout(resource_layout)
+
+        # 退出后自动重启（留空跟随全局设置）
+        restart_layout = QHBoxLayout()
+        restart_layout.addWidget(QLabel("退出后自动重启:"))
+        self.restart_policy_combo = QComboBox()
+        self.restart_policy_combo.addItem("跟随全局设置", "")
+        self.restart_policy_combo.addItem("不重启", "never")
+        self.restart_policy_combo.addItem("失败时重启", "on-failure")
+        self.restart_policy_combo.addItem("总是重启", "always")
+        restart_layout.addWidget(self.restart_policy_combo)
+        restart_layout.addStretch()
+        options_layout.addLayout(restart_layout)
+
+        # 运行计划（cron 表达式或间隔秒数，留空表示常驻运行）
+        schedule_layout = QHBoxLayout()
+        schedule_layout.addWidget(QLabel("运行计划:"))
+        self.schedule_edit = QLineEdit()
+        self.schedule_edit.setPlaceholderText("留空为常驻运行；cron 表达式如 */5 * * * *，或间隔秒数如 300")
+        schedule_layout.addWidget(self.schedule_edit)
+        schedule_layout.addWidget(QLabel("上次未结束时:"))
+        self.overlap_combo = QComboBox()
+        self.overlap_combo.addItem("跳过本次", "skip")
+        self.overlap_combo.addItem("结束后运行", "queue")
+        self.overlap_combo.addItem("停止上次", "kill")
+        schedule_layout.addWidget(self.overlap_combo)
+        options_layout.addLayout(schedule_layout)
 
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
@@ -106,7 +214,31 @@ class TaskEditDialog(QDialog):
             self.name_edit.setText(self.task_data.get('name', ''))
             self.enabled_check.setChecked(self.task_data.get('enabled', True))
             self.ps_edit.setPlainText(self.task_data.get('ps_command', ''))
+            index = self.runner_combo.findData(self.task_data.get('runner', 'auto'))
+            self.runner_combo.setCurrentIndex(max(index, 0))
             self.timestamp_check.setChecked(self.task_data.get('time_stamp', True))
+            timestamp_format = (self.task_data.get('time_stamp_precision', 's'),
+                                self.task_data.get('time_stamp_mode', 'wall'))
+            index = self.timestamp_format_combo.findData(timestamp_format)
+            self.timestamp_format_combo.setCurrentIndex(max(index, 0))
+            encoding = self.task_data.get('encoding', '')
+            index = self.encoding_combo.findData(encoding)
+            if index >= 0:
+                self.encoding_combo.setCurrentIndex(index)
+            else:
+                self.encoding_combo.setEditText(encoding)
+            index = self.log_format_combo.findData(self.task_data.get('log_format', ''))
+            self.log_format_combo.setCurrentIndex(max(index, 0))
+            self.lines_limit_spin.setValue(self.task_data.get('max_lines_per_sec', 0))
+            self.bytes_limit_spin.setValue(self.task_data.get('max_bytes_per_sec', 0))
+            for key, spin in self.limit_spins.items():
+                spin.setValue(int(self.task_data.get(key, 0)))
+            index = self.restart_policy_combo.findData(self.task_data.get('restart_policy', ''))
+            self.restart_policy_combo.setCurrentIndex(max(index, 0))
+            interval = self.task_data.get('interval')
+            self.schedule_edit.setText(self.task_data.get('schedule') or (f"{float(interval):g}" if interval else ""))
+            index = self.overlap_combo.findData(self.task_data.get('overlap', 'skip'))
+            self.overlap_combo.setCurrentIndex(max(index, 0))
 
     def insert_example(self):
         """插入示例命令"""
@@ -132,15 +264,84 @@ class TaskEditDialog(QDialog):
             QMessageBox.warning(self, "错误", "请输入 PowerShell 命令")
             return
 
-        self.task_data = {
+        runner = self.runner_combo.currentData()
+        try:
+            prepare_launch({'runner': runner, 'ps_command': ps_command,
+                            'args': self.task_data.get('args') if runner == 'exec' else None})
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", f"无效的命令: {e}")
+            return
+
+        encoding = self.get_encoding()
+        if encoding and not normalize_encoding(encoding):
+            QMessageBox.warning(self, "错误", f"无效的输出编码: {encoding}")
+            return
+
+        schedule = self.schedule_edit.text().strip()
+        try:
+            # 纯数字为间隔秒数，否则为 cron 表达式
+            schedule_config = {'interval': float(schedule)} if schedule else {}
+        except ValueError:
+            schedule_config = {'schedule': schedule}
+        try:
+            parse_schedule(schedule_config)
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", f"无效的运行计划: {e}")
+            return
+
+        # 保留界面中未涉及的其他配置项
+        task_data = dict(self.task_data)
+        task_data.update({
             'name': name,
             'enabled': self.enabled_check.isChecked(),
             'ps_command': ps_command,
             'time_stamp': self.timestamp_check.isChecked()
-        }
+        })
+        if runner != 'auto':
+            task_data['runner'] = runner
+        else:
+            task_data.pop('runner', None)
+        if encoding:
+            task_data['encoding'] = encoding
+        else:
+            task_data.pop('encoding', None)
+        precision, mode = self.timestamp_format_combo.currentData()
+        task_data['time_stamp_precision'] = precision
+        task_data['time_stamp_mode'] = mode
+        if self.log_format_combo.currentData():
+            task_data['log_format'] = self.log_format_combo.currentData()
+        else:
+            task_data.pop('log_format', None)
+        for key, spin in (('max_lines_per_sec', self.lines_limit_spin),
+                          ('max_bytes_per_sec', self.bytes_limit_spin),
+                          *self.limit_spins.items()):
+            if spin.value():
+                task_data[key] = spin.value()
+            else:
+                task_data.pop(key, None)
+        if self.restart_policy_combo.currentData():
+            task_data['restart_policy'] = self.restart_policy_combo.currentData()
+        else:
+            task_data.pop('restart_policy', None)
+        task_data.pop('schedule', None)
+        task_data.pop('interval', None)
+        task_data.update(schedule_config)
+        if schedule_config and self.overlap_combo.currentData() != 'skip':
+            task_data['overlap'] = self.overlap_combo.currentData()
+        else:
+            task_data.pop('overlap', None)
+        self.task_data = task_data
 
         self.accept()
 
+    def get_encoding(self):
+        """获取输入的输出编码，自动检测时返回空字符串"""
+        text = self.encoding_combo.currentText().strip()
+        index = self.encoding_combo.findText(text)
+        if index >= 0:
+            return self.encoding_combo.itemData(index)
+        return text
+
     def get_task_data(self):
         """获取任务数据"""
         return self.task_data
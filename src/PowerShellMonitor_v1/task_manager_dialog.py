@@ -1,14 +1,15 @@
-import os
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QListWidget,
                                QPushButton, QLabel, QListWidgetItem, QCheckBox,
                                QWidget, QMessageBox)
-from PySide6.QtCore import Signal, Qt
+from PySide6.QtCore import Signal, Qt, QTimer
 from PySide6.QtGui import QIcon
+import time
 import uuid
 
 from task_edit_dialog import TaskEditDialog
 from config import save_config
 from log_dialog import LogDialog
+from startup_scheduler import PENDING, DELAYED
 
 
 class TaskManagerDialog(QDialog):
@@ -31,6 +32,11 @@ class TaskManagerDialog(QDialog):
         self.init_ui()
         self.update_task_list()
 
+        # 定时刷新任务统计信息
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_task_stats)
+        self.stats_timer.start(1000)
+
     def init_ui(self):
         layout = QVBoxLayout()
 
@@ -96,11 +102,20 @@ class TaskManagerDialog(QDialog):
             item = QListWidgetItem()
             widget = TaskListItemWidget(task_id, task_config,
                                         self.process_manager.get_task_status(task_id))
+            widget.update_stats(self.process_manager.get_task_stats(task_id))
             item.setSizeHint(widget.sizeHint())
 
             self.task_list.addItem(item)
             self.task_list.setItemWidget(item, widget)
 
+    def refresh_task_stats(self):
+        """刷新列表中各任务的统计信息"""
+        for row in range(self.task_list.count()):
+            widget = self.task_list.itemWidget(self.task_list.item(row))
+            if widget:
+                widget.update_status(self.process_manager.get_task_status(widget.task_id))
+                widget.update_stats(self.process_manager.get_task_stats(widget.task_id))
+
     def get_selected_task_id(self):
         """获取选中的任务ID"""
         current_item = self.task_list.currentItem()
@@ -146,8 +161,8 @@ class TaskManagerDialog(QDialog):
             log_file = f"task_{new_task_id}.log"
             self.process_manager.add_task(new_task_id, new_data, log_file)
 
-            # 如果任务启用，自动启动
-            if new_data.get('enabled', False):
+            # 如果任务启用，自动启动（按计划定时运行的任务到时再启动）
+            if new_data.get('enabled', False) and not self.process_manager.is_scheduled(new_task_id):
                 self.process_manager.start_task(new_task_id)
 
             self.save_config_and_update()
@@ -175,19 +190,16 @@ class TaskManagerDialog(QDialog):
         log_file = self.log_files[task_id]
 
         if task_id not in self.task_log_dialogs:
-            self.task_log_dialogs[task_id] = LogDialog(log_file)
+            settings = self.process_manager.settings
+            self.task_log_dialogs[task_id] = LogDialog(
+                log_file, settings['log_view_max_lines'], settings['log_view_window_kb'] * 1024,
+                self.process_manager.get_search_indexer(),
+                self.process_manager.get_task_log_storage(task_id))
             self.task_log_dialogs[task_id].setWindowTitle(
                 f"PSMonitor - 任务日志 - {self.tasks[task_id].get('name', f'任务 {task_id}')}")
 
-        # 读取并显示日志内容
-        try:
-            if os.path.exists(log_file):
-                with open(log_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                self.task_log_dialogs[task_id].text_edit.setPlainText(content)
-        except Exception as e:
-            self.task_log_dialogs[task_id].text_edit.setPlainText(
-                f"读取日志文件时出错: {str(e)}")
+        # 先写出缓冲中的日志，对话框显示后在后台索引日志文件
+        self.process_manager.flush_task_log(task_id)
 
         self.task_log_dialogs[task_id].show()
         self.task_log_dialogs[task_id].raise_()
@@ -203,6 +215,14 @@ class TaskManagerDialog(QDialog):
             QMessageBox.warning(self, "错误", "保存配置失败")
 
 
+def format_bytes(size):
+    """把字节数格式化为带单位的文本"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
 class TaskListItemWidget(QWidget):
     def __init__(self, task_id, task_config, is_running, parent=None):
         super().__init__(parent)
@@ -212,18 +232,17 @@ class TaskListItemWidget(QWidget):
         layout = QHBoxLayout()
 
         # 状态指示图标
-        status_icon = QLabel("●")
-        status_icon.setStyleSheet(f"color: {'green' if is_running else 'red'}; font-weight: bold;")
-        layout.addWidget(status_icon)
+        self.status_icon = QLabel("●")
+        layout.addWidget(self.status_icon)
 
         # 任务名称
         self.name_label = QLabel(task_config.get('name', f'任务 {task_id}'))
         layout.addWidget(self.name_label)
 
         # 状态文本
-        status_text = "运行中" if is_running else "已停止"
-        self.status_label = QLabel(status_text)
+        self.status_label = QLabel()
         layout.addWidget(self.status_label)
+        self.update_status(is_running)
 
         # 启用复选框
         self.enabled_check = QCheckBox("启用")
@@ -231,5 +250,103 @@ class TaskListItemWidget(QWidget):
         self.enabled_check.setEnabled(False)  # 在列表中不可编辑
         layout.addWidget(self.enabled_check)
 
+        # 丢弃行数
+        self.dropped_label = QLabel()
+        self.dropped_label.setStyleSheet("color: #c07000;")
+        layout.addWidget(self.dropped_label)
+
+        # 资源占用（CPU、内存、线程、读写速率）
+        self.resource_label = QLabel()
+        self.resource_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.resource_label)
+
+        # 资源限制事件（OOM 终止、CPU 受限、进程数达到上限）
+        self.limit_label = QLabel()
+        self.limit_label.setStyleSheet("color: red;")
+        layout.addWidget(self.limit_label)
+
+        # 自动重启次数与崩溃循环状态
+        self.restart_label = QLabel()
+        layout.addWidget(self.restart_label)
+
+        # 运行计划与下次运行时刻
+        self.schedule_label = QLabel()
+        self.schedule_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.schedule_label)
+
         layout.addStretch()
         self.setLayout(layout)
+
+    def update_status(self, is_running):
+        """更新运行状态显示"""
+        self.is_running = is_running
+        self.status_icon.setStyleSheet(f"color: {'green' if is_running else 'red'}; font-weight: bold;")
+        self.status_label.setText("运行中" if is_running else "已停止")
+
+    def update_stats(self, stats):
+        """更新统计信息显示"""
+        last_exit = stats.get('last_exit')
+        self.status_label.setToolTip(f"上次退出: {last_exit.describe()}" if last_exit else "")
+        if last_exit and not self.is_running:
+            self.status_label.setText(f"已停止（{last_exit.describe()}）")
+        dropped = stats.get('dropped_lines', 0)
+        self.dropped_label.setVisible(dropped > 0)
+        self.dropped_label.setText(f"已丢弃 {dropped} 行")
+        self.dropped_label.setToolTip(
+            f"超出速率限制: {stats.get('rate_dropped', 0)} 行\n"
+            f"缓冲区溢出: {stats.get('overflow_dropped', 0)} 行")
+
+        resources = stats.get('resources')
+        self.resource_label.setVisible(bool(resources) and self.is_running)
+        if resources:
+            self.resource_label.setText(
+                f"CPU {resources['cpu']:.1f}%  内存 {format_bytes(resources['rss'])}")
+            self.resource_label.setToolTip(
+                f"进程数: {resources['processes']:.0f}\n"
+                f"线程数: {resources['threads']:.0f}\n"
+                f"磁盘读取: {format_bytes(resources['read_rate'])}/s（累计 {format_bytes(resources['read_bytes'])}）\n"
+                f"磁盘写入: {format_bytes(resources['write_rate'])}/s（累计 {format_bytes(resources['write_bytes'])}）")
+
+        limits = stats.get('limits') or {}
+        events = []
+        if limits.get('oom_kills'):
+            events.append(f"OOM 终止 {limits['oom_kills']} 次")
+        if limits.get('throttled_time'):
+            events.append(f"CPU 受限 {limits['throttled_time']:.1f} 秒")
+        if limits.get('pids_max_hits'):
+            events.append(f"进程数达到上限 {limits['pids_max_hits']} 次")
+        self.limit_label.setVisible(bool(events))
+        self.limit_label.setText("，".join(events))
+        self.limit_label.setToolTip(
+            f"达到内存上限: {limits.get('memory_max_hits', 0)} 次\n"
+            f"CPU 受限: {limits.get('throttled', 0)} 个周期" if limits else "")
+
+        if not self.is_running and stats.get('startup') in (PENDING, DELAYED):
+            self.status_label.setText("等待启动")
+
+        restarts = stats.get('restarts', 0)
+        next_restart = stats.get('next_restart')
+        if stats.get('crash_loop'):
+            text, color = f"崩溃循环，已停止自动重启（已重启 {restarts} 次）", "red"
+        elif next_restart is not None:
+            text, color = f"{next_restart:.0f} 秒后重启（已重启 {restarts} 次）", "#c07000"
+        elif restarts:
+            text, color = f"已重启 {restarts} 次", "gray"
+        else:
+            text, color = "", "gray"
+        self.restart_label.setVisible(bool(text))
+        self.restart_label.setText(text)
+        self.restart_label.setStyleSheet(f"color: {color};")
+
+        schedule = stats.get('schedule')
+        self.schedule_label.setVisible(bool(schedule))
+        if schedule:
+            next_run = schedule['next_run']
+            self.schedule_label.setText(
+                f"下次运行 {time.strftime('%m-%d %H:%M:%S', time.localtime(next_run))}"
+                if next_run is not None else "没有下次运行")
+            self.schedule_label.setToolTip(
+                f"计划: {schedule['schedule']}\n"
+                f"已运行: {schedule['runs']} 次\n"
+                f"因上次未结束跳过: {schedule['skipped']} 次\n"
+                f"错过: {schedule['missed']} 次" + ("\n有一次运行在排队" if schedule['queued'] else ""))
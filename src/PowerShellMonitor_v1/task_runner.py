@@ -0,0 +1,87 @@
+import os
+import shlex
+import shutil
+
+
+RUNNERS = ("auto", "pwsh", "shell", "python", "exec")
+
+_path_cache = {}  # (名称, PATH) -> 可执行文件路径
+
+
+def find_executable(name):
+    """在 PATH 中查找可执行文件，结果按 PATH 缓存；带路径的名称不查找，找不到时原样返回（启动时由系统报错）"""
+    if os.path.dirname(name):
+        return name
+    key = (name, os.environ.get("PATH", ""))
+    path = _path_cache.get(key)
+    if path is None:
+        path = shutil.which(name)
+        if path is None:
+            return name
+        _path_cache[key] = path
+    return path
+
+
+def split_command(command):
+    """按 shell 的引号规则把命令行切分为参数列表（Windows 上不把反斜杠视为转义）"""
+    if os.name != 'nt':
+        return shlex.split(command)
+    lexer = shlex.shlex(command, posix=False)
+    lexer.whitespace_split = True
+    return [token[1:-1] if len(token) > 1 and token[0] == token[-1] == '"' else token
+            for token in lexer]
+
+
+class LaunchSpec:
+    """准备好的任务启动方式
+
+    args 为进程参数列表；命令交给可预热的解释器执行时，interpreter 与 script 为解释器路径与脚本，否则为 None。
+    """
+
+    def __init__(self, runner, args, interpreter=None, script=None):
+        self.runner = runner
+        self.args = args
+        self.interpreter = interpreter
+        self.script = script
+
+
+def prepare_launch(task_config, powershell="powershell"):
+    """按任务配置的 runner 生成 LaunchSpec，配置无效时抛出 ValueError
+
+    runner 为 auto（默认）时 .exe 直接运行，其他命令交给 PowerShell（powershell 为当前平台的解释器名称）；
+    pwsh、shell、python 把命令交给对应的解释器，interpreter 可指定解释器；exec 直接运行，
+    参数取自 args 列表，没有 args 时按引号规则切分命令。
+    """
+    runner = task_config.get('runner') or 'auto'
+    if runner not in RUNNERS:
+        raise ValueError(f"未知的启动方式 {runner}，可选: {', '.join(RUNNERS)}")
+    command = task_config.get('ps_command', '')
+    if runner == 'auto':
+        runner = 'exec' if command.lower().endswith('.exe') else 'pwsh'
+
+    if runner == 'exec':
+        args = task_config.get('args')
+        if args is None:
+            args = split_command(command)
+        elif isinstance(args, str) or not all(isinstance(arg, str) for arg in args):
+            raise ValueError("args 必须是字符串列表")
+        if not args:
+            raise ValueError("没有要运行的命令")
+        args = list(args)
+        args[0] = find_executable(args[0])
+        return LaunchSpec(runner, args)
+
+    if runner == 'shell':
+        if os.name == 'nt':
+            shell = find_executable(task_config.get('interpreter') or os.environ.get("COMSPEC", "cmd.exe"))
+            return LaunchSpec(runner, [shell, "/d", "/c", command])
+        shell = find_executable(task_config.get('interpreter') or "/bin/sh")
+        return LaunchSpec(runner, [shell, "-c", command])
+
+    if runner == 'python':
+        default = "python" if os.name == 'nt' else "python3"
+        interpreter = find_executable(task_config.get('interpreter') or default)
+        return LaunchSpec(runner, [interpreter, "-c", command], interpreter, command)
+
+    interpreter = find_executable(task_config.get('interpreter') or powershell)
+    return LaunchSpec(runner, [interpreter, "-Command", command], interpreter, command)
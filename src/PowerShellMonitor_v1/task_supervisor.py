@@ -0,0 +1,141 @@
+import random
+import time
+from collections import deque
+
+
+RESTART_POLICIES = ("never", "on-failure", "always")
+
+# 任务配置与全局设置共用的重启选项
+RESTART_OPTIONS = ("restart_policy", "restart_delay", "restart_max_delay", "restart_jitter",
+                   "restart_max_count", "restart_window")
+
+
+class RestartPolicy:
+    """任务的重启策略
+
+    mode 为 never（不重启）、on-failure（退出码非 0 时重启）或 always（退出后总是重启）。
+    重启前等待 delay * 2^n 秒（n 为 window 秒内已重启的次数，最多 max_delay 秒），
+    并随机增减 jitter 比例，避免大量任务同时重启；window 秒内重启超过 max_count 次视为崩溃循环。
+    """
+
+    def __init__(self, mode="never", delay=1.0, max_delay=60.0, jitter=0.1, max_count=5, window=300.0):
+        if mode not in RESTART_POLICIES:
+            raise ValueError(f"未知的重启策略: {mode}")
+        self.mode = mode
+        self.delay = max(0.0, float(delay))
+        self.max_delay = max(self.delay, float(max_delay))
+        self.jitter = min(1.0, max(0.0, float(jitter)))
+        self.max_count = int(max_count)  # 0 表示不限制
+        self.window = max(0.0, float(window))
+
+    @classmethod
+    def from_config(cls, task_config, settings):
+        """按任务配置（缺省时使用全局设置）生成重启策略"""
+        def option(key):
+            return task_config.get(key, settings[key])
+
+        return cls(mode=option('restart_policy'),
+                   delay=option('restart_delay'),
+                   max_delay=option('restart_max_delay'),
+                   jitter=option('restart_jitter'),
+                   max_count=option('restart_max_count'),
+                   window=option('restart_window'))
+
+    def should_restart(self, returncode):
+        """按退出码判断是否需要重启，returncode 为 None 表示进程未能启动（视为失败）"""
+        if self.mode == "always":
+            return True
+        return self.mode == "on-failure" and returncode != 0
+
+    def backoff(self, recent):
+        """已在窗口内重启 recent 次时，下一次重启前的等待秒数"""
+        delay = min(self.max_delay, self.delay * (2 ** min(recent, 32)))
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return delay
+
+
+class _TaskState:
+    def __init__(self):
+        self.restarts = 0  # 自动重启的总次数
+        self.recent = deque()  # 窗口内各次重启的时刻
+        self.crash_loop = False
+        self.next_restart = None  # 已安排的下次重启时刻
+        self.generation = 0  # 取消已安排的重启时递增
+
+
+class TaskSupervisor:
+    """任务监督器：任务意外退出时按重启策略决定是否重启、何时重启
+
+    只负责决策与计数，不启动进程也不计时；调用方按返回的等待时间安排重启，
+    到时用 begin_restart 确认这次重启仍然有效（期间没有被手动启动、停止或取消）。
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._states = {}
+
+    def _state(self, task_id):
+        state = self._states.get(task_id)
+        if state is None:
+            state = self._states[task_id] = _TaskState()
+        return state
+
+    def on_exit(self, task_id, policy, returncode):
+        """任务退出（自动重启时未能启动则 returncode 为 None），返回 (等待秒数, 重启令牌)；
+        不需要重启或进入崩溃循环时返回 None
+        """
+        state = self._state(task_id)
+        state.generation += 1
+        state.next_restart = None
+        if not policy.should_restart(returncode):
+            return None
+        now = self.clock()
+        while state.recent and now - state.recent[0] > policy.window:
+            state.recent.popleft()
+        if policy.max_count and len(state.recent) >= policy.max_count:
+            state.crash_loop = True
+            return None
+        delay = policy.backoff(len(state.recent))
+        state.next_restart = now + delay
+        return delay, state.generation
+
+    def begin_restart(self, task_id, token):
+        """到达重启时刻，令牌仍然有效时记录一次重启并返回 True"""
+        state = self._states.get(task_id)
+        if state is None or state.generation != token or state.next_restart is None:
+            return False
+        state.next_restart = None
+        state.restarts += 1
+        state.recent.append(self.clock())
+        return True
+
+    def cancel(self, task_id):
+        """取消已安排的重启"""
+        state = self._states.get(task_id)
+        if state is not None:
+            state.generation += 1
+            state.next_restart = None
+
+    def reset(self, task_id):
+        """手动启动任务：取消已安排的重启，清除崩溃循环状态与退避（保留重启总次数）"""
+        state = self._states.get(task_id)
+        if state is not None:
+            self.cancel(task_id)
+            state.recent.clear()
+            state.crash_loop = False
+
+    def remove(self, task_id):
+        """移除任务的全部状态"""
+        self._states.pop(task_id, None)
+
+    def get_stats(self, task_id):
+        """任务的重启统计：总次数、是否处于崩溃循环、距离下次重启的秒数（未安排时为 None）"""
+        state = self._states.get(task_id)
+        if state is None:
+            return {'restarts': 0, 'crash_loop': False, 'next_restart': None}
+        next_restart = None
+        if state.next_restart is not None:
+            next_restart = max(0.0, state.next_restart - self.clock())
+        return {'restarts': state.restarts, 'crash_loop': state.crash_loop,
+                'next_restart': next_restart}
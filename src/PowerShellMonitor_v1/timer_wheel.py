@@ -0,0 +1,134 @@
+import math
+
+
+DEFAULT_TICK = 1.0  # 秒
+WHEEL_SLOTS = 64
+WHEEL_LEVELS = 4  # 每层 64 个槽，4 层可覆盖 64^4 个刻度（1 秒刻度时约 194 天）
+
+
+class Timer:
+    """时间轮中的一个定时器，由 TimerWheel.schedule 返回，可用于取消"""
+
+    __slots__ = ("tick", "when", "item", "cancelled")
+
+    def __init__(self, tick, when, item):
+        self.tick = tick  # 到期的刻度
+        self.when = when  # 到期时刻
+        self.item = item
+        self.cancelled = False
+
+
+class TimerWheel:
+    """分层时间轮
+
+    定时器按距离到期的刻度数放入不同层：第 0 层每个槽对应一个刻度，
+    第 n 层每个槽对应 64^n 个刻度；时间前进到某个高层槽的起点时，把其中的定时器重新分配到低层。
+    添加、取消定时器的开销与定时器总数无关，每个刻度只处理到期或需要下移的定时器，
+    可以容纳数千个定时器。超出最高层范围的定时器先放在溢出列表中，最高层转满一圈时重新分配。
+    """
+
+    def __init__(self, now, tick=DEFAULT_TICK, slots=WHEEL_SLOTS, levels=WHEEL_LEVELS):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self._overflow = []
+        self._current = self._tick_of(now)  # 已处理到的刻度
+        self._count = 0
+
+    def __len__(self):
+        """尚未到期且没有取消的定时器数量"""
+        return self._count
+
+    @property
+    def time(self):
+        """已处理到的时刻"""
+        return self._current * self.tick
+
+    def _tick_of(self, when):
+        return int(math.floor(when / self.tick))
+
+    def schedule(self, when, item):
+        """添加一个在 when 时刻到期的定时器，返回 Timer"""
+        timer = Timer(max(self._tick_of(when), self._current + 1), when, item)
+        self._place(timer)
+        self._count += 1
+        return timer
+
+    def cancel(self, timer):
+        """取消定时器（在它所在的槽被处理时才真正移除）"""
+        if not timer.cancelled:
+            timer.cancelled = True
+            self._count -= 1
+
+    def advance(self, now):
+        """时间前进到 now，返回到期的定时器（按到期刻度排列）"""
+        target = self._tick_of(now)
+        if target <= self._current:
+            return []
+        if target - self._current > self.slots:
+            # 跨度较大（如系统休眠后）时直接重新分配所有定时器，不逐个刻度推进
+            return self._jump(target)
+        expired = []
+        while self._current < target:
+            self._current += 1
+            self._cascade(self._current)
+            slot = self._wheels[0][self._current % self.slots]
+            if slot:
+                self._wheels[0][self._current % self.slots] = []
+                self._collect(slot, expired)
+        return expired
+
+    def _place(self, timer):
+        delta = timer.tick - self._current
+        span = 1
+        for level in range(self.levels):
+            if delta < span * self.slots:
+                self._wheels[level][(timer.tick // span) % self.slots].append(timer)
+                return
+            span *= self.slots
+        self._overflow.append(timer)
+
+    def _cascade(self, tick):
+        """到达高层槽的起点时，把其中的定时器重新分配到低层（从最高层开始）"""
+        if tick % (self.slots ** self.levels) == 0 and self._overflow:
+            overflow, self._overflow = self._overflow, []
+            for timer in overflow:
+                if not timer.cancelled:
+                    self._place(timer)
+        for level in range(self.levels - 1, 0, -1):
+            span = self.slots ** level
+            if tick % span:
+                continue
+            index = (tick // span) % self.slots
+            slot = self._wheels[level][index]
+            if slot:
+                self._wheels[level][index] = []
+                for timer in slot:
+                    if not timer.cancelled:
+                        self._place(timer)
+
+    def _collect(self, slot, expired):
+        for timer in slot:
+            if not timer.cancelled:
+                timer.cancelled = True
+                self._count -= 1
+                expired.append(timer)
+
+    def _jump(self, target):
+        timers = [timer for wheel in self._wheels for slot in wheel for timer in slot]
+        timers.extend(self._overflow)
+        self._wheels = [[[] for _ in range(self.slots)] for _ in range(self.levels)]
+        self._overflow = []
+        self._current = target
+        expired = []
+        for timer in sorted(timers, key=lambda timer: timer.tick):
+            if timer.cancelled:
+                continue
+            if timer.tick <= target:
+                timer.cancelled = True
+                self._count -= 1
+                expired.append(timer)
+            else:
+                self._place(timer)
+        return expired
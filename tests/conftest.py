@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUILDS = ("PowerShellMonitor", "PowerShellMonitor_v1")
+
+
+def run_in_build(build, script, *args, timeout=60):
+    """在某个版本的源码目录中用独立进程运行 script（两个版本的模块同名，不能在同一进程中导入）
+
+    使用 offscreen 平台运行 Qt，返回标准输出；进程失败（包括崩溃）时测试失败。
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run([sys.executable, "-c", script, *map(str, args)],
+                            cwd=os.path.join(ROOT, "src", build), env=env,
+                            capture_output=True, text=True, timeout=timeout)
+    assert result.returncode == 0, f"退出码 {result.returncode}\n{result.stdout}\n{result.stderr}"
+    return result.stdout
+
+
+@pytest.fixture
+def numbered_log(tmp_path):
+    """写入 count 行 "line NNNNNNN" 的日志文件，返回路径"""
+    def make(count):
+        path = tmp_path / "task.log"
+        with open(path, "w") as f:
+            for number in range(count):
+                f.write(f"line {number:07d}\n")
+        return path
+    return make
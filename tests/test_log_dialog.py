@@ -0,0 +1,31 @@
+from conftest import run_in_build
+
+
+SEARCH = """
+import sys, time
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+from log_dialog import LogDialog
+
+dialog = LogDialog(sys.argv[1])
+dialog.show()
+dialog.search_edit.setText("line 0001234")
+begin = time.monotonic()
+dialog.search_log()
+print(dialog.search_status.text())
+deadline = time.monotonic() + 20
+while dialog.search_results.count() == 0 and time.monotonic() < deadline:
+    app.processEvents()
+    time.sleep(0.01)
+print(dialog.search_results.count())
+print(dialog.search_results.item(0).text())
+dialog.hide()
+"""
+
+
+def test_search_runs_in_background(numbered_log):
+    log = numbered_log(200000)
+    status, count, first = run_in_build("PowerShellMonitor_v1", SEARCH, log).split("\n")[:3]
+    assert status == "正在搜索…"
+    assert count == "1"
+    assert first == "line 0001234"
@@ -0,0 +1,51 @@
+import pytest
+
+from conftest import BUILDS, run_in_build
+
+
+# 行在读取时刻打上时间戳，写入器稍后才刷新；按秒截断的时间戳也要能按范围查到
+QUERY_FILE_LOG = """
+import sys, time
+from log_writer import LogWriter, TimestampFormatter
+from log_time_index import TimeIndexWriter, query_time_range
+
+log_file = sys.argv[1]
+writer = LogWriter(log_file, time_index=TimeIndexWriter(log_file, interval_bytes=0))
+formatter = TimestampFormatter()
+base = int(time.time()) - 3600 + 0.7
+for i in range(3):
+    now = base + i * 10
+    writer.write(formatter.format(f"line {i}\\n", now), now)
+    writer.flush()
+writer.close()
+for line in query_time_range(log_file, int(base), int(base) + 10):
+    print(line[22:])
+"""
+
+
+@pytest.mark.parametrize("build", BUILDS)
+def test_query_uses_line_time(build, tmp_path):
+    assert run_in_build(build, QUERY_FILE_LOG, tmp_path / "t.log").splitlines() == ["line 0", "line 1"]
+
+
+QUERY_SHARED_LOG = """
+import sys, time
+from log_writer import TimestampFormatter
+from shared_log_store import SharedLogStore, SharedLogWriter, SharedTaskLog
+
+store = SharedLogStore(sys.argv[1])
+writer = SharedLogWriter(store, "t")
+formatter = TimestampFormatter()
+base = int(time.time()) - 3600 + 0.7
+for i in range(3):
+    now = base + i * 10
+    writer.write(formatter.format(f"line {i}\\n", now), now)
+    writer.flush()
+for line in SharedTaskLog(store, "t").query(int(base), int(base) + 10):
+    print(line[22:])
+store.close()
+"""
+
+
+def test_shared_query_uses_line_time(tmp_path):
+    assert run_in_build("PowerShellMonitor_v1", QUERY_SHARED_LOG, tmp_path).splitlines() == ["line 0", "line 1"]
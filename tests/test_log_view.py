@@ -0,0 +1,75 @@
+import pytest
+
+from conftest import BUILDS, run_in_build
+
+
+SHOW_LOG_VIEW = """
+import sys, time
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+from log_view import LogView
+
+view = LogView(sys.argv[1], window_bytes=0)
+view.resize(400, 300)
+view.show()
+view.start()
+deadline = time.monotonic() + 20
+while view.line_model.rowCount() < int(sys.argv[2]) and time.monotonic() < deadline:
+    app.processEvents()
+    time.sleep(0.01)
+view.scrollToBottom()
+app.processEvents()
+model = view.line_model
+print(model.rowCount())
+print(model.line_text(0))
+print(model.line_text(model.rowCount() - 1))
+view.stop()
+"""
+
+
+@pytest.mark.parametrize("build", BUILDS)
+def test_log_view_shows_log(build, numbered_log):
+    log = numbered_log(1000)
+    rows, first, last = run_in_build(build, SHOW_LOG_VIEW, log, 1000).split("\n")[:3]
+    assert rows == "1000"
+    assert first == "line 0000000"
+    assert last == "line 0000999"
+
+
+LOAD_EARLIER = """
+import sys, time
+from PySide6.QtCore import QPoint
+from PySide6.QtWidgets import QApplication, QAbstractItemView
+app = QApplication([])
+from log_view import LogView
+
+view = LogView(sys.argv[1], window_bytes=64 * 1024)
+view.resize(400, 300)
+view.show()
+view.start()
+deadline = time.monotonic() + 20
+while view.line_index.indexed_bytes < view.line_index.size or not view.line_model.rowCount():
+    app.processEvents()
+    time.sleep(0.01)
+    assert time.monotonic() < deadline
+view.refresh()
+view.scrollTo(view.line_model.index_for_row(200), QAbstractItemView.PositionAtTop)
+app.processEvents()
+before = view.line_model.line_text(view.indexAt(QPoint(0, 0)).row())
+rows = view.line_model.rowCount()
+view.load_earlier()
+app.processEvents()
+print(before)
+print(view.line_model.line_text(view.indexAt(QPoint(0, 0)).row()))
+print(view.line_model.rowCount() > rows)
+view.stop()
+"""
+
+
+@pytest.mark.parametrize("build", BUILDS)
+def test_load_earlier_keeps_top_line(build, numbered_log):
+    log = numbered_log(50000)
+    before, after, grew = run_in_build(build, LOAD_EARLIER, log).split("\n")[:3]
+    assert before.startswith("line ")
+    assert after == before
+    assert grew == "True"
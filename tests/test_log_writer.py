@@ -0,0 +1,22 @@
+import pytest
+
+from conftest import BUILDS, run_in_build
+
+
+BUFFER_BYTES = """
+import os, sys
+from log_writer import LogWriter
+
+writer = LogWriter(sys.argv[1], flush_interval=3600, buffer_size=10)
+writer.write("abc")
+print(os.path.exists(sys.argv[1]))
+# 4 个字符、12 个字节，超过按字节计算的缓冲区大小
+writer.write("中文中文")
+print(os.path.getsize(sys.argv[1]))
+writer.close()
+"""
+
+
+@pytest.mark.parametrize("build", BUILDS)
+def test_buffer_size_counts_bytes(build, tmp_path):
+    assert run_in_build(build, BUFFER_BYTES, tmp_path / "t.log").split() == ["False", "15"]
@@ -0,0 +1,28 @@
+from conftest import run_in_build
+
+
+DELAYED_DRAIN = """
+import time
+from log_writer import TimestampFormatter
+from log_records import RecordFormatter, parse_record
+from output_gate import OutputGate
+
+received = []
+gate = OutputGate(received.extend)
+before = time.time()
+gate.put("first\\n")
+time.sleep(1.1)
+gate.flush_if_due()
+(text, timestamp), = received
+assert text == "first\\n"
+assert before <= timestamp < before + 0.5, timestamp
+
+stamp = time.strftime("[%Y-%m-%d %H:%M:%S", time.localtime(int(timestamp)))
+assert TimestampFormatter().format(text, timestamp).startswith(stamp)
+assert parse_record(RecordFormatter("t").format(text, timestamp))["ts"] == round(timestamp, 6)
+print("ok")
+"""
+
+
+def test_output_keeps_read_time():
+    assert run_in_build("PowerShellMonitor_v1", DELAYED_DRAIN).strip() == "ok"
@@ -0,0 +1,63 @@
+import pytest
+
+from conftest import BUILDS, run_in_build
+
+
+PIPELINE = """
+import sys
+from line_assembler import LineAssembler
+from output_decoder import OutputDecoder
+from output_pipeline import OutputPipeline
+
+encoding = sys.argv[1]
+lines = []
+pipeline = OutputPipeline(LineAssembler(), OutputDecoder(encoding), lines.append)
+data = "ab\\n中文\\r\\ncd".encode(encoding)
+# 逐字节输入，检验跨读取边界的字符与换行
+for i in range(len(data)):
+    pipeline.feed(data[i:i + 1])
+pipeline.close()
+print(repr(lines))
+"""
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "gbk", "utf-16-le", "utf-16-be", "utf-32-le"])
+def test_pipeline_splits_lines_after_decoding(encoding):
+    output = run_in_build("PowerShellMonitor_v1", PIPELINE, encoding)
+    assert output.strip() == repr(["ab\n", "中文\n", "cd\n"])
+
+
+DECODER = """
+from output_decoder import OutputDecoder, normalize_encoding
+
+assert normalize_encoding("base64") is None
+assert normalize_encoding("UTF-16") == "utf-16"
+for encoding, data in [("utf-16", "ab\\n".encode("utf-16-le")),
+                       ("utf-16", "ab\\n".encode("utf-16")),
+                       ("utf-32", "ab\\n".encode("utf-32-le"))]:
+    decoder = OutputDecoder(encoding)
+    text = "".join(decoder.decode(data[i:i + 1]) for i in range(len(data))) + decoder.flush()
+    assert text == "ab\\n", (encoding, text)
+print("ok")
+"""
+
+
+@pytest.mark.parametrize("build", BUILDS)
+def test_decoder_accepts_missing_bom(build):
+    assert run_in_build(build, DECODER).strip() == "ok"
+
+
+UNDETECTED = """
+from output_decoder import OutputDecoder
+
+# 既不是 utf-8 也不是 gbk 的输出不能变成替代字符，要能还原出原始字节
+data = b"caf\\xe9 \\xff\\n"
+decoder = OutputDecoder()
+text = decoder.decode(data) + decoder.flush()
+print(text.encode(decoder.encoding) == data and "\\ufffd" not in text)
+"""
+
+
+@pytest.mark.parametrize("build", BUILDS)
+def test_decoder_fallback_is_lossless(build):
+    assert run_in_build(build, UNDETECTED).strip() == "True"
@@ -0,0 +1,109 @@
+import pytest
+
+from conftest import run_in_build
+
+
+NEXT_RUNS = """
+import sys
+from datetime import datetime
+from periodic_scheduler import CronSchedule
+
+schedule = CronSchedule(sys.argv[1])
+when = datetime.strptime(sys.argv[2], "%Y-%m-%d %H:%M").timestamp()
+for _ in range(int(sys.argv[3])):
+    when = schedule.next_after(when)
+    print(datetime.fromtimestamp(when).strftime("%Y-%m-%d_%H:%M"))
+"""
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    # 步长与范围
+    ("*/15 9-17/4 * * *", "2024-03-11 09:50", ["2024-03-11_13:00", "2024-03-11_13:15"]),
+    ("5/20 * * * *", "2024-03-11 10:30", ["2024-03-11_10:45", "2024-03-11_11:05"]),
+    ("0 8 * * mon-fri", "2024-03-08 09:00", ["2024-03-11_08:00", "2024-03-12_08:00"]),
+    # 日和周都有限制时满足其中之一即可
+    ("0 0 13 * fri", "2024-09-01 00:00", ["2024-09-06_00:00", "2024-09-13_00:00", "2024-09-20_00:00"]),
+    # 周日可以写成 0 或 7
+    ("0 0 * * 7", "2024-09-02 00:00", ["2024-09-08_00:00", "2024-09-15_00:00"]),
+    # 跨月、跨年与闰日
+    ("0 0 31 * *", "2024-04-01 00:00", ["2024-05-31_00:00", "2024-07-31_00:00"]),
+    ("30 23 * * *", "2024-12-31 23:45", ["2025-01-01_23:30"]),
+    ("0 12 1 jan,jul *", "2024-02-01 00:00", ["2024-07-01_12:00", "2025-01-01_12:00"]),
+    ("0 0 29 2 *", "2025-03-01 00:00", ["2028-02-29_00:00"]),
+    ("@monthly", "2024-12-15 00:00", ["2025-01-01_00:00", "2025-02-01_00:00"]),
+])
+def test_cron_next_runs(expression, after, expected):
+    output = run_in_build("PowerShellMonitor_v1", NEXT_RUNS, expression, after, len(expected))
+    assert output.split() == expected
+
+
+INVALID_CRON = """
+import sys
+from periodic_scheduler import CronSchedule
+try:
+    CronSchedule(sys.argv[1])
+except ValueError:
+    print("invalid")
+"""
+
+
+@pytest.mark.parametrize("expression", ["*/0 * * * *", "60 * * * *", "0 0 * 13 *", "5-1 * * * *", "0 0 * *"])
+def test_cron_rejects_invalid(expression):
+    assert run_in_build("PowerShellMonitor_v1", INVALID_CRON, expression).strip() == "invalid"
+
+
+WHEEL_CASCADE = """
+from timer_wheel import TimerWheel
+
+# 每层 4 个槽、2 层：0-3 个刻度在第 0 层，4-15 个在第 1 层，更远的进入溢出列表
+wheel = TimerWheel(0, tick=1, slots=4, levels=2)
+ticks = [1, 3, 4, 6, 15, 16, 17, 40, 100]
+timers = {tick: wheel.schedule(tick + 0.5, tick) for tick in ticks}
+wheel.cancel(timers[6])
+wheel.cancel(timers[40])
+fired = []
+for now in range(1, 121):
+    for timer in wheel.advance(now + 0.1):
+        fired.append((timer.item, now))
+print(fired)
+print(len(wheel))
+
+# 跨度较大时直接重新分配
+wheel = TimerWheel(0, tick=1, slots=4, levels=2)
+for tick in (2, 30, 200):
+    wheel.schedule(tick, tick)
+print([timer.item for timer in wheel.advance(50)], len(wheel))
+print([timer.item for timer in wheel.advance(200)], len(wheel))
+"""
+
+
+def test_timer_wheel_cascades_across_levels():
+    fired, remaining, jumped, rest = run_in_build("PowerShellMonitor_v1", WHEEL_CASCADE).splitlines()
+    assert fired == repr([(tick, tick) for tick in (1, 3, 4, 15, 16, 17, 100)])
+    assert remaining == "0"
+    assert jumped == "[2, 30] 1"
+    assert rest == "[200] 0"
+
+
+MISFIRE = """
+from datetime import datetime
+from periodic_scheduler import PeriodicScheduler, START
+
+clock = [datetime(2024, 3, 11, 9, 59, 30).timestamp()]
+scheduler = PeriodicScheduler(clock=lambda: clock[0])
+scheduler.set_schedule("t", {"schedule": "*/10 * * * *", "misfire": "run", "misfire_grace": 60})
+clock[0] += 31
+print(scheduler.poll(lambda task_id: False))
+# 系统挂起了 35 分钟，错过的 3 次只补运行一次
+clock[0] += 35 * 60
+print(scheduler.poll(lambda task_id: False))
+print(scheduler.get_stats("t")["missed"], scheduler.get_stats("t")["runs"])
+print(datetime.fromtimestamp(scheduler.next_run("t")).strftime("%H:%M"))
+"""
+
+
+def test_scheduler_runs_missed_once():
+    on_time, late, stats, next_run = run_in_build("PowerShellMonitor_v1", MISFIRE).splitlines()
+    assert on_time == late == "[('t', 'start')]"
+    assert stats == "3 2"
+    assert next_run == "10:40"
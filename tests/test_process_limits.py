@@ -0,0 +1,42 @@
+import sys
+
+import pytest
+
+from conftest import run_in_build
+
+
+pytestmark = pytest.mark.skipif(sys.platform != "linux", reason="资源限制只在 Linux 上应用")
+
+
+RLIMIT_AFTER_SPAWN = """
+import sys
+from process_backend import PosixProcessBackend
+from process_limits import TaskLimits
+
+# 不可用的 cgroup 目录，改用 prlimit
+backend = PosixProcessBackend(cgroup_root=sys.argv[1])
+process = backend.spawn(["sh", "-c", "sleep 0.3; ulimit -n"], limits=TaskLimits(max_open_files=64), name="t")
+print(process.stdout.read().decode().strip())
+process.wait()
+"""
+
+
+def test_open_files_limit_applied_after_spawn(tmp_path):
+    assert run_in_build("PowerShellMonitor_v1", RLIMIT_AFTER_SPAWN, tmp_path).strip() == "64"
+
+
+MOVE_SELF = """
+import os, sys
+from process_limits import CgroupLimiter
+
+root = sys.argv[1]
+for name, content in [("cgroup.controllers", "cpu memory pids"), ("cgroup.procs", "1\\n"),
+                      ("cgroup.subtree_control", "")]:
+    with open(os.path.join(root, name), "w") as f:
+        f.write(content)
+print(CgroupLimiter(root).prepare(), os.path.exists(os.path.join(root, "monitor")))
+"""
+
+
+def test_cgroup_does_not_move_monitor_by_default(tmp_path):
+    assert run_in_build("PowerShellMonitor_v1", MOVE_SELF, tmp_path).strip() == "False False"
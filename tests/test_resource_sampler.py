@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from conftest import run_in_build
+
+
+pytestmark = pytest.mark.skipif(not os.path.isfile("/proc/self/stat"), reason="需要 /proc")
+
+
+DAEMONIZED_CHILD = """
+import os, signal, subprocess, time
+from resource_sampler import ResourceSampler
+
+# 子 shell 启动后台的 sleep 后立即退出，sleep 被重新挂到 init 下，但仍在任务的会话中
+process = subprocess.Popen(["sh", "-c", "(sleep 30 &); exec sleep 30"], start_new_session=True)
+time.sleep(0.3)
+sampler = ResourceSampler(interval=3600)
+sampler.register("t", process.pid)
+sampler.sample()
+time.sleep(0.05)
+sampler.sample()
+print(int(sampler.latest("t")["processes"]))
+sampler.stop()
+os.killpg(process.pid, signal.SIGKILL)
+process.wait()
+"""
+
+
+def test_sampler_keeps_reparented_processes():
+    assert run_in_build("PowerShellMonitor_v1", DAEMONIZED_CHILD).strip() == "2"
@@ -0,0 +1,38 @@
+from conftest import run_in_build
+
+
+CORRUPT_TASKS = """
+import json, os, sys
+from shared_log_store import SharedLogStore
+
+directory = sys.argv[1]
+store = SharedLogStore(directory, keep_segments=1)
+store.append("a", b"line a\\n", 1.0)
+store.close()
+index = os.path.join(directory, "index.bin")
+with open(index, "rb") as f:
+    before = f.read()
+with open(os.path.join(directory, "tasks.json"), "w") as f:
+    f.write("{broken")
+
+errors = []
+store = SharedLogStore(directory, keep_segments=1, on_error=errors.append)
+store.append("b", b"line b\\n", 2.0)
+store._next_segment()  # 删除旧分段时也不能重写索引
+store.close()
+with open(index, "rb") as f:
+    after = f.read()
+print(len(errors))
+print(after.startswith(before) and len(after) > len(before))
+print(os.path.exists(os.path.join(directory, "tasks.json.corrupt")))
+with open(os.path.join(directory, "tasks.json")) as f:
+    print(json.load(f))
+"""
+
+
+def test_corrupt_task_list_keeps_index(tmp_path):
+    errors, kept, saved, tasks = run_in_build("PowerShellMonitor_v1", CORRUPT_TASKS, tmp_path).splitlines()
+    assert errors == "1"
+    assert kept == "True"
+    assert saved == "True"
+    assert tasks == "{'b': 2}"
@@ -0,0 +1,135 @@
+import os
+
+import pytest
+
+from conftest import run_in_build
+
+
+STOP_ALL = """
+import sys, time
+from PySide6.QtCore import QCoreApplication
+app = QCoreApplication([])
+from multi_process_manager import MultiProcessManager
+
+manager = MultiProcessManager({"stop_timeout": 1.0})
+# 忽略 SIGTERM 的任务要等宽限期结束后被强制终止
+manager.add_task("t", {"ps_command": "trap '' TERM; sleep 30", "runner": "shell", "time_stamp": False},
+                 sys.argv[1])
+manager.start_task("t")
+time.sleep(0.2)
+finished = []
+begin = time.monotonic()
+manager.stop_all_tasks(on_finished=finished.append)
+print(round(time.monotonic() - begin, 1))  # 不等待进程退出
+print(manager.start_task("t"))  # 停止完成前不能再次启动
+deadline = time.monotonic() + 10
+while not finished and time.monotonic() < deadline:
+    app.processEvents()
+    time.sleep(0.01)
+print(finished[0]["t"].outcome)
+print(manager.get_task_status("t"))
+manager.shutdown()
+"""
+
+
+def test_stop_all_does_not_block(tmp_path):
+    elapsed, restarted, outcome, running = run_in_build(
+        "PowerShellMonitor_v1", STOP_ALL, tmp_path / "t.log").split()[:4]
+    assert float(elapsed) < 0.5
+    assert restarted == "False"
+    assert outcome == "killed"
+    assert running == "False"
+
+
+NO_GRACEFUL_STOP = """
+from process_shutdown import ShutdownCoordinator
+
+class Process:
+    returncode = None
+    def poll(self):
+        return self.returncode
+
+class Backend:
+    graceful_stop = False
+    calls = []
+    def terminate(self, process):
+        self.calls.append("terminate")
+    def kill(self, process):
+        self.calls.append("kill")
+        process.returncode = 1
+    def exit_status(self, process):
+        return process.poll()
+
+backend = Backend()
+results = ShutdownCoordinator(backend).stop({"t": (Process(), 30.0)})
+print(backend.calls, results["t"].outcome, results["t"].elapsed < 1)
+"""
+
+
+def test_backend_without_graceful_stop_kills_at_once():
+    assert run_in_build("PowerShellMonitor_v1", NO_GRACEFUL_STOP).strip() == "['kill'] killed True"
+
+
+RELEASE_GROUP = """
+import os, sys, time
+from PySide6.QtCore import QCoreApplication
+app = QCoreApplication([])
+from multi_process_manager import MultiProcessManager
+
+manager = MultiProcessManager({"stop_timeout": 5.0})
+# 任务进程收到 SIGTERM 后正常退出，留下一个忽略 SIGTERM 的子进程
+manager.add_task("t", {"ps_command": "(trap '' TERM; sleep 30) & trap 'exit 0' TERM; wait",
+                       "runner": "shell", "time_stamp": False}, sys.argv[1])
+manager.start_task("t")
+pgid = manager.processes["t"].pid
+time.sleep(0.3)
+finished = []
+manager.stop_all_tasks(on_finished=finished.append)
+deadline = time.monotonic() + 10
+while not finished and time.monotonic() < deadline:
+    app.processEvents()
+    time.sleep(0.01)
+print(finished[0]["t"].outcome)
+time.sleep(0.2)
+# 进程组中仍在运行（不是僵尸）的进程
+alive = []
+for pid in filter(str.isdigit, os.listdir("/proc")):
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            fields = f.read().rsplit(b")", 1)[1].split()
+    except OSError:
+        continue
+    if int(fields[2]) == pgid and fields[0] != b"Z":
+        alive.append(pid)
+print("left" if alive else "cleaned")
+manager.shutdown()
+"""
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="需要 /proc")
+def test_stop_all_cleans_up_process_group(tmp_path):
+    outcome, group = run_in_build("PowerShellMonitor_v1", RELEASE_GROUP, tmp_path / "t.log").split()[:2]
+    assert outcome == "terminated"
+    assert group == "cleaned"
+
+
+SHUTDOWN_TWICE = """
+import sys
+from PySide6.QtCore import QCoreApplication
+app = QCoreApplication([])
+from multi_process_manager import MultiProcessManager
+
+manager = MultiProcessManager()
+manager.add_task("t", {"ps_command": "echo hello", "runner": "shell"}, sys.argv[1])
+manager.shutdown()
+manager.shutdown()
+# 线程退出后再次停止不能写入已关闭的唤醒管道
+manager.reaper.stop()
+for engine in manager.io_engines:
+    engine.stop()
+print(manager.reaper._wakeup_w is None or not manager.reaper._use_pidfd)
+"""
+
+
+def test_shutdown_is_idempotent(tmp_path):
+    assert run_in_build("PowerShellMonitor_v1", SHUTDOWN_TWICE, tmp_path / "t.log").split() == ["True"]
@@ -0,0 +1,36 @@
+from conftest import run_in_build
+
+
+READY_ON_OUTPUT = """
+import sys, time
+from PySide6.QtCore import QCoreApplication
+app = QCoreApplication([])
+from multi_process_manager import MultiProcessManager
+from startup_scheduler import STARTING, READY
+
+manager = MultiProcessManager({"startup_settle_time": 30})
+manager.add_task("t", {"ps_command": "sleep 1; echo hello; sleep 5", "runner": "shell", "time_stamp": False,
+                       "encoding": "no-such-encoding"},
+                 sys.argv[1])
+manager.start_tasks(["t"])
+entry = manager.startup.entries["t"]
+
+def wait(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline and entry.state == STARTING:
+        app.processEvents()
+        time.sleep(0.01)
+
+# 监控程序自身的消息（这里是编码无效的提示）不能让任务就绪
+wait(0.5)
+print(entry.state)
+wait(10)
+print(entry.state)
+manager.shutdown()
+"""
+
+
+def test_ready_only_on_task_output(tmp_path):
+    before, after = run_in_build("PowerShellMonitor_v1", READY_ON_OUTPUT, tmp_path / "t.log").split()[:2]
+    assert before == "starting"
+    assert after == "ready"
@@ -0,0 +1,19 @@
+import sys
+
+import pytest
+
+from conftest import run_in_build
+
+
+IMPORT_TRAY = """
+import sys
+import {module}
+print({module}.winreg is None)
+"""
+
+
+@pytest.mark.parametrize("build, module", [("PowerShellMonitor", "system_tray"),
+                                           ("PowerShellMonitor_v1", "multi_system_tray")])
+def test_tray_imports_without_winreg(build, module):
+    output = run_in_build(build, IMPORT_TRAY.format(module=module)).strip()
+    assert output == str(sys.platform != "win32")
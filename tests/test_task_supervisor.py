@@ -0,0 +1,71 @@
+from conftest import run_in_build
+
+
+BACKOFF = """
+from task_supervisor import RestartPolicy, TaskSupervisor
+
+clock = [0.0]
+supervisor = TaskSupervisor(clock=lambda: clock[0])
+policy = RestartPolicy("on-failure", delay=1, max_delay=5, jitter=0, max_count=6, window=100)
+
+def crash():
+    decision = supervisor.on_exit("t", policy, 1)
+    if decision is None:
+        return None
+    delay, token = decision
+    clock[0] += delay
+    assert supervisor.begin_restart("t", token)
+    return delay
+
+print(supervisor.on_exit("t", policy, 0))  # 正常退出不重启
+print([crash() for _ in range(7)])  # 等待时间翻倍到上限，第 7 次进入崩溃循环
+print(supervisor.get_stats("t"))
+supervisor.reset("t")  # 手动启动后清除崩溃循环与退避
+print(crash(), supervisor.get_stats("t")["crash_loop"])
+# 窗口外的重启不再计数
+clock[0] += 101
+print(crash())
+"""
+
+
+def test_supervisor_backoff_and_crash_loop():
+    normal, delays, stats, after_reset, after_window = run_in_build(
+        "PowerShellMonitor_v1", BACKOFF).splitlines()
+    assert normal == "None"
+    assert delays == "[1.0, 2.0, 4.0, 5.0, 5.0, 5.0, None]"
+    assert stats == "{'restarts': 6, 'crash_loop': True, 'next_restart': None}"
+    assert after_reset == "1.0 False"
+    assert after_window == "1.0"
+
+
+FAILED_RESTART = """
+import sys, time
+from PySide6.QtCore import QCoreApplication
+app = QCoreApplication([])
+from multi_process_manager import MultiProcessManager
+
+manager = MultiProcessManager({"restart_policy": "on-failure", "restart_delay": 0.05,
+                               "restart_jitter": 0, "restart_max_count": 3})
+manager.add_task("t", {"ps_command": "exit 1", "runner": "shell", "time_stamp": False}, sys.argv[1])
+alerts = []
+manager.task_alert.connect(lambda task_id, message: alerts.append(message))
+print(manager.start_task("t"))
+
+def fail(*args):
+    raise OSError("spawn failed")
+
+# 第一次退出后，自动重启时都无法启动
+manager._spawn_task = fail
+deadline = time.monotonic() + 10
+while not alerts and time.monotonic() < deadline:
+    app.processEvents()
+    time.sleep(0.01)
+print(manager.supervisor.get_stats("t"))
+manager.shutdown()
+"""
+
+
+def test_failed_restart_counts_toward_crash_loop(tmp_path):
+    started, stats = run_in_build("PowerShellMonitor_v1", FAILED_RESTART, tmp_path / "t.log").splitlines()[:2]
+    assert started == "True"
+    assert stats == "{'restarts': 3, 'crash_loop': True, 'next_restart': None}"